@@ -2,16 +2,27 @@ import os
 import json
 import shutil
 import sys
+import argparse
 import threading
 import subprocess
 import time
 import uuid
 import zipfile
 import math
+import atexit
+import mmap
 import winreg
 import ctypes
 import logging
 import queue
+import bisect
+import hashlib
+import re
+import errno
+import zlib
+from array import array
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from tkinter import filedialog
 
@@ -20,49 +31,25 @@ from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from PIL import Image
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
 current_filter = "mods"
 mod_states = {}
 selected_modpack = None
 
-MOD_NAME_MAPPING = {
-    "Replace Font": "replace_font",
-    "Optimizer": "optimizer",
-    "Cheat": "cheat",
-    "Change celestial bodies": "celestials",
-    "Hide gui": "hidegui",
-    "Remove grass": "remove_grass_mesh",
-    "Display fps": "displayfps",
-    "Disable remotes": "disable_remotes",
-    "Unlock fps": "unlock_fps",
-    "Custom death sound": "custom_ouch_sound",
-    "Google browser": "google_browser",
-    "Chat gpt": "chat_gpt",
-    "R63 avatar": "character_meshes",
-    "Faster inputs": "faster_inputs",
-    "Graphic boost": "graphic_boost",
-    "Beautiful sky": "beautiful_sky",
-    "Anime chan sky": "anime_chan_sky",
-    "Bloxstrap Theme": "bloxstrap_theme"
-}
-
-texture_packs = [
-    "Replace Font",
-    "Change celestial bodies",
-    "Custom death sound",
-    "R63 avatar",
-    "Remove grass",
-    "Beautiful sky",
-    "Anime chan sky",
-    "Bloxstrap Theme",
-]
-
-INTERNAL_TO_DISPLAY = {v: k for k, v in MOD_NAME_MAPPING.items()}
-
-CONFLICTING_MODS = {
-    "Google browser": ["Chat gpt"],
-    "Chat gpt": ["Google browser"],
-    "Beautiful sky": ["Anime chan sky"],
-    "Anime chan sky": ["Beautiful sky"]
+FLAG_LAYER_PRIORITIES = {
+    "base": 0,
+    "builtin": 100,
+    "external": 200,
+    "fflag_editor": 1000
 }
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -71,6 +58,78 @@ external_mods_dir = os.path.join(script_dir, "ExternalMods")
 images_folder = os.path.join(script_dir, "Assets", "images")
 sounds_folder = os.path.join(script_dir, "Assets", "sounds")
 meshes_folder = os.path.join(script_dir, "Assets", "meshes")
+builtin_mods_file = os.path.join(script_dir, "Assets", "builtin_mods.json")
+builtin_manifest_file = os.path.join(script_dir, "Assets", "builtin_manifest.json")
+blob_store_dir = os.path.join(script_dir, "BlobStore")
+blob_objects_dir = os.path.join(blob_store_dir, "objects")
+manifests_dir = os.path.join(blob_store_dir, "manifests")
+backup_store_dir = os.path.join(script_dir, "BackupStore")
+staging_dir = os.path.join(script_dir, "Staging")
+
+COPY_WORKERS = min(32, (os.cpu_count() or 4) * 2)
+COPY_BATCH_SIZE = 64
+SMALL_FILE_LIMIT = 1024 * 1024
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+BACKUP_COMPRESSION_SAMPLE = 256 * 1024
+ALREADY_COMPRESSED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".ogg", ".mp3", ".zip", ".woff", ".woff2", ".ktx2"}
+FICLONE = 0x40049409
+UNSUPPORTED_COPY_ERRNOS = {
+    errno.EINVAL, errno.ENOSYS, errno.ENOTTY,
+    errno.EOPNOTSUPP, errno.EBADF, errno.EPERM
+}
+
+windows_kernel32 = ctypes.WinDLL("kernel32", use_last_error=True) if sys.platform == "win32" else None
+
+copy_backends = {
+    "copyfile": windows_kernel32 is not None,
+    "reflink": fcntl is not None,
+    "copy_file_range": hasattr(os, "copy_file_range"),
+    "sendfile": hasattr(os, "sendfile") and sys.platform.startswith("linux"),
+}
+
+MUTABLE_TREE_FILES = {
+    os.path.join("ClientSettings", "ClientAppSettings.json")
+}
+
+def load_builtin_mods():
+    with open(builtin_mods_file, "r") as f:
+        builtin_mods = json.load(f)
+    for mod in builtin_mods.values():
+        mod["target_paths"] = [os.path.normpath(path) for path in mod.get("target_paths", [])]
+        for file_entry in mod.get("replace_files", []):
+            file_entry["source"] = os.path.normpath(file_entry["source"])
+            file_entry["destination"] = os.path.normpath(file_entry["destination"])
+            if "legacy_backup" in file_entry:
+                file_entry["legacy_backup"] = os.path.normpath(file_entry["legacy_backup"])
+    return builtin_mods
+
+BUILTIN_MODS = load_builtin_mods()
+
+MOD_NAME_MAPPING = {mod["name"]: internal_name for internal_name, mod in BUILTIN_MODS.items()}
+
+texture_packs = [mod["name"] for mod in BUILTIN_MODS.values() if mod["type"] == "texturepack"]
+
+INTERNAL_TO_DISPLAY = {v: k for k, v in MOD_NAME_MAPPING.items()}
+
+CONFLICTING_MODS = {
+    mod["name"]: [BUILTIN_MODS[conflict]["name"] for conflict in mod["conflicts"]]
+    for mod in BUILTIN_MODS.values() if mod.get("conflicts")
+}
+
+MOD_FLAG_LAYERS = {
+    internal_name: mod["fast_flags"]
+    for internal_name, mod in BUILTIN_MODS.items() if "fast_flags" in mod
+}
+
+SAVED_MOD_FILES = {
+    internal_name: mod["saved_file"]
+    for internal_name, mod in BUILTIN_MODS.items() if "saved_file" in mod
+}
+
+MOD_TARGET_PATHS = {
+    internal_name: mod["target_paths"]
+    for internal_name, mod in BUILTIN_MODS.items() if mod["target_paths"]
+}
 
 
 external_mods_dir = os.path.join(os.path.dirname(__file__), "ExternalMods")
@@ -82,6 +141,31 @@ if not os.path.exists(external_mods_file):
     with open(external_mods_file, "w") as f:
         json.dump({}, f, indent=4)
 
+app_settings_file = os.path.join(script_dir, "settings.json")
+DEFAULT_APP_SETTINGS = {
+    "io_concurrency": 4,
+    "use_catalog": True
+}
+
+def load_app_settings():
+    settings = dict(DEFAULT_APP_SETTINGS)
+    try:
+        if os.path.exists(app_settings_file):
+            with open(app_settings_file, "r") as f:
+                settings.update(json.load(f))
+    except Exception as e:
+        logging.warning(f"Could not read settings file {app_settings_file}: {e}")
+    return settings
+
+def save_app_settings(settings):
+    try:
+        with open(app_settings_file, "w") as f:
+            json.dump(settings, f, indent=4)
+        return True
+    except Exception as e:
+        logging.error(f"Error saving settings: {str(e)}")
+        return False
+
 
 def set_default_modpack(modpack_name):
     try:
@@ -91,6 +175,7 @@ def set_default_modpack(modpack_name):
             return False
 
         version = os.listdir(modpack_path)[0]
+        wait_for_modpack_paths(modpack_name, ["RobloxPlayerBeta.exe"])
         roblox_exe_path = os.path.join(modpack_path, version, "RobloxPlayerBeta.exe")
 
         if not os.path.exists(roblox_exe_path):
@@ -110,24 +195,957 @@ def set_default_modpack(modpack_name):
         QMessageBox.critical(None, "Error", f"Failed to set default modpack: {str(e)}")
         return False
 
+class ModStateStore:
+    def __init__(self, flush_delay=0.5):
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()
+        self.states = {}
+        self.signatures = {}
+        self.dirty = set()
+        self.timer = None
+
+    def path(self, modpack):
+        return os.path.join(modpacks_dir, modpack, "mod_state.json")
+
+    def signature(self, modpack):
+        try:
+            stat = os.stat(self.path(modpack))
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def load(self, modpack):
+        with self.lock:
+            if modpack in self.dirty:
+                return self.states[modpack]
+            signature = self.signature(modpack)
+            if modpack in self.states and signature == self.signatures.get(modpack):
+                return self.states[modpack]
+
+            state = {}
+            if signature is not None:
+                try:
+                    with open(self.path(modpack), "r") as f:
+                        state = json.load(f)
+                except Exception as e:
+                    logging.warning(f"Could not read mod state for {modpack}: {e}")
+                    state = self.states.get(modpack, {})
+            self.states[modpack] = state
+            self.signatures[modpack] = signature
+            if mod_state_matrix is not None and signature is not None:
+                mod_state_matrix.set_row(modpack, state, signature)
+            if mod_catalog is not None and signature is not None:
+                mod_catalog.sync_modpack(modpack, state, signature)
+            return state
+
+    def exists(self, modpack):
+        with self.lock:
+            return modpack in self.dirty or self.signature(modpack) is not None
+
+    def get(self, modpack):
+        with self.lock:
+            return dict(self.load(modpack))
+
+    def is_enabled(self, modpack, key):
+        with self.lock:
+            return bool(self.load(modpack).get(key, False))
+
+    def set(self, modpack, key, value):
+        self.update(modpack, {key: value})
+
+    def update(self, modpack, values):
+        with self.lock:
+            self.load(modpack).update(values)
+            self.dirty.add(modpack)
+            if mod_state_matrix is not None:
+                mod_state_matrix.set_bits(modpack, values)
+            self.schedule_flush()
+
+    def replace(self, modpack, state):
+        with self.lock:
+            self.load(modpack)
+            self.states[modpack] = dict(state)
+            self.dirty.add(modpack)
+            if mod_state_matrix is not None:
+                mod_state_matrix.set_row(modpack, state)
+            self.schedule_flush()
+
+    def remove_keys(self, modpack, keys):
+        with self.lock:
+            state = self.load(modpack)
+            for key in keys:
+                state.pop(key, None)
+            self.dirty.add(modpack)
+            if mod_state_matrix is not None:
+                mod_state_matrix.set_bits(modpack, {key: False for key in keys})
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.timer is None:
+            self.timer = threading.Timer(self.flush_delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self, modpack=None):
+        with self.lock:
+            self.timer = None
+            pending = [modpack] if modpack is not None else list(self.dirty)
+            for name in pending:
+                if name not in self.dirty:
+                    continue
+                self.dirty.discard(name)
+                try:
+                    write_json_atomic(self.path(name), self.states[name])
+                    self.signatures[name] = self.signature(name)
+                    if mod_state_matrix is not None:
+                        mod_state_matrix.set_stamp(name, self.signatures[name])
+                    if mod_catalog is not None:
+                        mod_catalog.sync_modpack(name, self.states[name], self.signatures[name])
+                except Exception as e:
+                    logging.error(f"Error writing mod state for {name}: {str(e)}")
+            if self.dirty:
+                self.schedule_flush()
+
+        if mod_state_matrix is not None:
+            mod_state_matrix.save()
+
+    def forget(self, modpack):
+        with self.lock:
+            self.dirty.discard(modpack)
+            self.states.pop(modpack, None)
+            self.signatures.pop(modpack, None)
+            if mod_state_matrix is not None:
+                mod_state_matrix.remove_row(modpack)
+            if mod_catalog is not None:
+                mod_catalog.remove_modpack(modpack)
+
+
+class ModStateMatrix:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.modpacks = []
+        self.modpack_index = {}
+        self.free_rows = []
+        self.mods = []
+        self.mod_index = {}
+        self.columns = []
+        self.words = 1
+        self.stamps = {}
+        self.dirty = False
+
+    def path(self):
+        return os.path.join(modpacks_dir, "mod_state_matrix.bin")
+
+    def load(self):
+        try:
+            with open(self.path(), "rb") as f:
+                header = json.loads(f.readline())
+                data = f.read()
+        except (OSError, ValueError):
+            return False
+
+        words = header["words"]
+        column_size = words * 8
+        if len(data) != len(header["mods"]) * column_size:
+            logging.warning(f"Ignoring mod state matrix {self.path()} with unexpected size")
+            return False
+
+        self.words = words
+        self.modpacks = header["modpacks"]
+        self.modpack_index = {modpack: row for row, modpack in enumerate(self.modpacks) if modpack is not None}
+        self.free_rows = [row for row, modpack in enumerate(self.modpacks) if modpack is None]
+        self.mods = header["mods"]
+        self.mod_index = {mod: index for index, mod in enumerate(self.mods)}
+        self.columns = [
+            array("Q", data[index * column_size:(index + 1) * column_size]) for index in range(len(self.mods))]
+        self.stamps = {modpack: tuple(stamp) for modpack, stamp in header["stamps"].items()}
+        return True
+
+    def save(self):
+        with self.save_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                header = {
+                    "modpacks": list(self.modpacks), "mods": list(self.mods),
+                    "words": self.words, "stamps": dict(self.stamps)}
+                data = b"".join(column.tobytes() for column in self.columns)
+                self.dirty = False
+
+            path = self.path()
+            temp_path = f"{path}.tmp"
+            try:
+                with open(temp_path, "wb") as f:
+                    f.write(json.dumps(header).encode("utf-8") + b"\n")
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, path)
+            except OSError as e:
+                logging.error(f"Error writing mod state matrix {path}: {e}")
+                with self.lock:
+                    self.dirty = True
+
+    def row(self, modpack):
+        row = self.modpack_index.get(modpack)
+        if row is not None:
+            return row
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.modpacks[row] = modpack
+        else:
+            row = len(self.modpacks)
+            self.modpacks.append(modpack)
+            if row >= self.words * 64:
+                self.words += 1
+                for column in self.columns:
+                    column.append(0)
+        self.modpack_index[modpack] = row
+        return row
+
+    def column(self, mod):
+        index = self.mod_index.get(mod)
+        if index is None:
+            index = len(self.mods)
+            self.mods.append(mod)
+            self.mod_index[mod] = index
+            self.columns.append(array("Q", bytes(8 * self.words)))
+        return self.columns[index]
+
+    def set_bits(self, modpack, values):
+        with self.lock:
+            word, bit = divmod(self.row(modpack), 64)
+            mask = 1 << bit
+            for mod, enabled in values.items():
+                column = self.column(mod)
+                if enabled:
+                    column[word] |= mask
+                else:
+                    column[word] &= ~mask & 0xFFFFFFFFFFFFFFFF
+            self.stamps.pop(modpack, None)
+            self.dirty = True
+
+    def set_row(self, modpack, state, stamp=None):
+        with self.lock:
+            word, bit = divmod(self.row(modpack), 64)
+            mask = 1 << bit
+            for column in self.columns:
+                column[word] &= ~mask & 0xFFFFFFFFFFFFFFFF
+            for mod, enabled in state.items():
+                column = self.column(mod)
+                if enabled:
+                    column[word] |= mask
+            if stamp is None:
+                self.stamps.pop(modpack, None)
+            else:
+                self.stamps[modpack] = tuple(stamp)
+            self.dirty = True
+
+    def set_stamp(self, modpack, stamp):
+        with self.lock:
+            if modpack in self.modpack_index and stamp is not None:
+                self.stamps[modpack] = tuple(stamp)
+                self.dirty = True
+
+    def remove_row(self, modpack):
+        with self.lock:
+            row = self.modpack_index.pop(modpack, None)
+            if row is None:
+                return
+            word, bit = divmod(row, 64)
+            for column in self.columns:
+                column[word] &= ~(1 << bit) & 0xFFFFFFFFFFFFFFFF
+            self.modpacks[row] = None
+            self.free_rows.append(row)
+            self.stamps.pop(modpack, None)
+            self.dirty = True
+
+    def modpacks_enabling(self, mod):
+        with self.lock:
+            index = self.mod_index.get(mod)
+            if index is None:
+                return []
+            modpacks = []
+            for word_index, word in enumerate(self.columns[index]):
+                while word:
+                    lowest = word & -word
+                    modpacks.append(self.modpacks[word_index * 64 + lowest.bit_length() - 1])
+                    word ^= lowest
+            return sorted(modpacks)
+
+    def count_enabling(self, mod):
+        with self.lock:
+            index = self.mod_index.get(mod)
+            if index is None:
+                return 0
+            return sum(bin(word).count("1") for word in self.columns[index] if word)
+
+    def enabled_counts(self):
+        with self.lock:
+            return {
+                mod: sum(bin(word).count("1") for word in column if word)
+                for mod, column in zip(self.mods, self.columns)}
+
+    def mods_enabled_nowhere(self, mods=None):
+        with self.lock:
+            candidates = self.mods if mods is None else mods
+            return [
+                mod for mod in candidates
+                if mod not in self.mod_index or not any(self.columns[self.mod_index[mod]])]
+
+    def enabled_mods(self, modpack):
+        with self.lock:
+            row = self.modpack_index.get(modpack)
+            if row is None:
+                return []
+            word, bit = divmod(row, 64)
+            mask = 1 << bit
+            return [mod for mod, column in zip(self.mods, self.columns) if column[word] & mask]
+
+
+mod_state_store = ModStateStore()
+mod_state_matrix = None
+mod_state_matrix_lock = threading.Lock()
+atexit.register(mod_state_store.flush)
+
 def update_mod_state(modpack_path, key, value):
-    mod_state_path = os.path.join(modpack_path, "mod_state.json")
-    mod_state = {}
+    mod_state_store.set(os.path.basename(modpack_path), key, value)
+    print(f"Updated mod state '{key}' to '{value}' for {os.path.basename(modpack_path)}")
+
+client_settings_batch = threading.local()
+
+def read_client_settings(settings_path):
+    pending = getattr(client_settings_batch, "settings", None)
+    if pending is not None and settings_path in pending:
+        return pending[settings_path]
+    with open(settings_path, "r") as f:
+        settings = json.load(f)
+    if pending is not None:
+        pending[settings_path] = settings
+    return settings
+
+def write_client_settings(settings_path, settings):
+    pending = getattr(client_settings_batch, "settings", None)
+    if pending is not None:
+        pending[settings_path] = settings
+        return
+    write_json_atomic(settings_path, settings)
+    note_client_settings_written(settings_path, settings)
+
+def begin_client_settings_batch():
+    client_settings_batch.settings = {}
+
+def flush_client_settings_batch():
+    pending = client_settings_batch.settings
+    client_settings_batch.settings = None
+    for settings_path, settings in pending.items():
+        write_json_atomic(settings_path, settings)
+        note_client_settings_written(settings_path, settings)
+
+def discard_client_settings_batch():
+    client_settings_batch.settings = None
+
+def get_client_settings_path(modpack):
+    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
+    version = os.listdir(roblox_path)[0]
+    return os.path.join(roblox_path, version, "ClientSettings", "ClientAppSettings.json")
+
+def get_flag_layer_priority(layer):
+    if layer in FLAG_LAYER_PRIORITIES:
+        return (FLAG_LAYER_PRIORITIES[layer], layer)
+    if layer.startswith("external_"):
+        return (FLAG_LAYER_PRIORITIES["external"], layer)
+    return (FLAG_LAYER_PRIORITIES["builtin"], layer)
+
+def get_mod_flags(internal_name, external_mods=None):
+    if not internal_name.startswith("external_"):
+        return MOD_FLAG_LAYERS.get(internal_name, {})
     try:
-        if os.path.exists(mod_state_path):
-            with open(mod_state_path, "r") as f:
-                mod_state = json.load(f)
-    except Exception as e:
-        print(f"Warning: Could not read mod state file {mod_state_path}: {e}")
+        if external_mods is None:
+            external_mods = load_external_mods()
+        mod_info = external_mods.get(internal_name)
+        if not mod_info:
+            return {}
+        with open(mod_info["config_path"], "r") as f:
+            return json.load(f).get("fast_flags", {})
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Could not read FastFlags of {internal_name}: {e}")
+        return {}
+
+class FlagCompositor:
+    def __init__(self, modpack):
+        self.modpack = modpack
+        self.layers_path = os.path.join(modpacks_dir, modpack, "flag_layers.json")
+        self.lock = threading.RLock()
+        self.layers = {}
+        self.key_layers = {}
+        self.composed = {}
+        self.owners = {}
+        self.settings_stat = None
+        self.load()
+
+    def load(self):
+        settings_path = get_client_settings_path(self.modpack)
+        settings = self.read_settings(settings_path)
+        if os.path.exists(self.layers_path):
+            with open(self.layers_path, "r") as f:
+                self.layers = json.load(f)
+        else:
+            self.layers = self.migrate_layers(settings)
+            logging.info(f"Split FastFlags of {self.modpack} into {len(self.layers)} layers")
+        for layer, flags in self.layers.items():
+            self.index_layer(layer, flags)
+        self.recompose(list(self.key_layers))
+        if not os.path.exists(self.layers_path):
+            write_json_atomic(self.layers_path, self.layers)
+        self.absorb_edits(settings)
+        self.settings_stat = self.stat_settings(settings_path)
+
+    def migrate_layers(self, settings):
+        layers = {}
+        owned = set()
+        external_mods = None
+        for internal_name, enabled in mod_state_store.get(self.modpack).items():
+            if not enabled:
+                continue
+            if internal_name.startswith("external_") and external_mods is None:
+                try:
+                    external_mods = load_external_mods()
+                except (OSError, ValueError):
+                    external_mods = {}
+            flags = {
+                key: value for key, value in get_mod_flags(internal_name, external_mods).items()
+                if key in settings}
+            if flags:
+                layers[internal_name] = flags
+                owned.update(flags)
+        layers["base"] = {key: value for key, value in settings.items() if key not in owned}
+        return layers
+
+    def read_settings(self, settings_path):
+        if not os.path.exists(settings_path):
+            return {}
+        return read_client_settings(settings_path)
+
+    def stat_settings(self, settings_path):
+        try:
+            stat = os.stat(settings_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def index_layer(self, layer, flags):
+        for key in flags:
+            self.key_layers.setdefault(key, set()).add(layer)
+
+    def unindex_layer(self, layer, flags):
+        for key in flags:
+            owners = self.key_layers.get(key)
+            if owners is None:
+                continue
+            owners.discard(layer)
+            if not owners:
+                del self.key_layers[key]
+
+    def recompose(self, keys):
+        for key in keys:
+            layers = self.key_layers.get(key)
+            if not layers:
+                self.composed.pop(key, None)
+                self.owners.pop(key, None)
+                continue
+            owner = max(layers, key=get_flag_layer_priority)
+            self.owners[key] = owner
+            value = self.layers[owner][key]
+            if value is None:
+                self.composed.pop(key, None)
+            else:
+                self.composed[key] = value
+
+    def compose_without(self, excluded):
+        settings = {}
+        for key, layers in self.key_layers.items():
+            candidates = [layer for layer in layers if layer != excluded]
+            if not candidates:
+                continue
+            value = self.layers[max(candidates, key=get_flag_layer_priority)][key]
+            if value is not None:
+                settings[key] = value
+        return settings
+
+    def absorb_edits(self, settings):
+        editor = dict(self.layers.get("fflag_editor", {}))
+        changed = False
+        for key, value in settings.items():
+            if key not in self.composed or self.composed[key] != value:
+                editor[key] = value
+                changed = True
+        for key in self.composed:
+            if key not in settings:
+                editor[key] = None
+                changed = True
+        if changed:
+            logging.info(f"Keeping outside edits of ClientAppSettings.json for {self.modpack} in the editor layer")
+            self.apply_layer("fflag_editor", editor)
+
+    def sync_external_edits(self, settings_path):
+        pending = getattr(client_settings_batch, "settings", None)
+        if pending is not None and settings_path in pending:
+            return
+        stat = self.stat_settings(settings_path)
+        if stat == self.settings_stat:
+            return
+        try:
+            settings = self.read_settings(settings_path) if stat is not None else None
+        except ValueError as e:
+            logging.warning(f"Rewriting unreadable {settings_path}: {e}")
+            settings = None
+        if settings is None:
+            write_client_settings(settings_path, dict(self.composed))
+        else:
+            self.absorb_edits(settings)
+        self.settings_stat = self.stat_settings(settings_path)
+
+    def sync(self):
+        with self.lock:
+            self.sync_external_edits(get_client_settings_path(self.modpack))
+
+    def apply_layer(self, layer, flags):
+        old_flags = self.layers.get(layer, {})
+        if flags == old_flags:
+            return False
+        self.unindex_layer(layer, old_flags)
+        if flags:
+            self.layers[layer] = flags
+            self.index_layer(layer, flags)
+        else:
+            self.layers.pop(layer, None)
+        self.recompose(set(old_flags) | set(flags))
+
+        settings_path = get_client_settings_path(self.modpack)
+        write_json_atomic(self.layers_path, self.layers)
+        write_client_settings(settings_path, dict(self.composed))
+        self.settings_stat = self.stat_settings(settings_path)
+        return True
 
-    mod_state[key] = value
+    def set_layer(self, layer, flags, restore_removed=True):
+        with self.lock:
+            self.sync_external_edits(get_client_settings_path(self.modpack))
+            flags = dict(flags or {})
+            editor = self.layers.get("fflag_editor")
+            if restore_removed and flags and editor and layer != "fflag_editor":
+                # Turning a mod on brings back flags that were deleted in the editor.
+                removed = [key for key in flags if key in editor and editor[key] is None]
+                if removed:
+                    self.apply_layer("fflag_editor", {
+                        key: value for key, value in editor.items() if key not in removed})
+            return self.apply_layer(layer, flags)
+
+    def snapshot(self):
+        with self.lock:
+            return {layer: dict(flags) for layer, flags in self.layers.items()}
+
+    def restore(self, layers):
+        with self.lock:
+            for layer in set(self.layers) | set(layers):
+                self.apply_layer(layer, layers.get(layer, {}))
+
+    def set_editor_flags(self, settings):
+        with self.lock:
+            lower = self.compose_without("fflag_editor")
+            editor = {
+                key: value for key, value in settings.items()
+                if key not in lower or lower[key] != value}
+            editor.update({key: None for key in lower if key not in settings})
+            return self.apply_layer("fflag_editor", editor)
+
+    def explain(self):
+        with self.lock:
+            self.sync_external_edits(get_client_settings_path(self.modpack))
+            rows = []
+            for key in sorted(self.key_layers):
+                layers = sorted(self.key_layers[key], key=get_flag_layer_priority, reverse=True)
+                rows.append((key, self.composed.get(key), layers[0], layers[1:]))
+            return rows
+
+
+flag_compositors = {}
+flag_compositors_lock = threading.Lock()
+
+def get_flag_compositor(modpack):
+    with flag_compositors_lock:
+        compositor = flag_compositors.get(modpack)
+        if compositor is None:
+            compositor = FlagCompositor(modpack)
+            flag_compositors[modpack] = compositor
+        return compositor
+
+def forget_flag_compositor(modpack):
+    with flag_compositors_lock:
+        flag_compositors.pop(modpack, None)
+
+def set_mod_flag_layer(modpack, internal_name, flags):
+    return get_flag_compositor(modpack).set_layer(internal_name, flags)
+
+class FlagIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.modpack_flags = {}
+        self.flags = {}
+        self.stamps = {}
+        self.names = []
+        self.names_text = ""
+        self.names_offsets = []
+        self.names_stale = True
+        self.dirty = False
+
+    def path(self):
+        return os.path.join(modpacks_dir, "flag_index.json")
+
+    def load(self):
+        try:
+            with open(self.path(), "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for modpack, settings in data["modpacks"].items():
+            self.set_modpack(modpack, settings, tuple(data["stamps"].get(modpack, ())))
+        self.dirty = False
+        return True
 
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {"stamps": dict(self.stamps), "modpacks": dict(self.modpack_flags)}
+            self.dirty = False
+        try:
+            write_json_atomic(self.path(), data)
+        except OSError as e:
+            logging.error(f"Error writing fast flag index {self.path()}: {e}")
+            with self.lock:
+                self.dirty = True
+
+    def set_modpack(self, modpack, settings, stamp):
+        with self.lock:
+            old = self.modpack_flags.get(modpack, {})
+            for key in old:
+                if key not in settings:
+                    self.drop_entry(key, modpack)
+            for key, value in settings.items():
+                if key in old and old[key] == value:
+                    continue
+                owners = self.flags.get(key)
+                if owners is None:
+                    owners = self.flags[key] = {}
+                    self.names_stale = True
+                owners[modpack] = value
+            self.modpack_flags[modpack] = dict(settings)
+            self.stamps[modpack] = stamp
+            self.dirty = True
+
+    def remove_modpack(self, modpack):
+        with self.lock:
+            for key in self.modpack_flags.pop(modpack, {}):
+                self.drop_entry(key, modpack)
+            self.stamps.pop(modpack, None)
+            self.dirty = True
+
+    def drop_entry(self, key, modpack):
+        owners = self.flags[key]
+        del owners[modpack]
+        if not owners:
+            del self.flags[key]
+            self.names_stale = True
+
+    def rebuild_names(self):
+        self.names = sorted(self.flags, key=str.lower)
+        self.names_offsets = []
+        offset = 0
+        for name in self.names:
+            self.names_offsets.append(offset)
+            offset += len(name) + 1
+        self.names_text = "\n".join(name.lower() for name in self.names)
+        self.names_stale = False
+
+    def lookup(self, key):
+        with self.lock:
+            return dict(self.flags.get(key, {}))
+
+    def search(self, text, limit=None):
+        text = text.lower()
+        results = {}
+        with self.lock:
+            if self.names_stale:
+                self.rebuild_names()
+            if not text:
+                return results
+            position = self.names_text.find(text)
+            while position != -1 and (limit is None or len(results) < limit):
+                index = bisect.bisect_right(self.names_offsets, position) - 1
+                name = self.names[index]
+                results[name] = dict(self.flags[name])
+                next_name = index + 1
+                if next_name == len(self.names):
+                    break
+                position = self.names_text.find(text, self.names_offsets[next_name])
+        return results
+
+    def compare(self, first, second):
+        with self.lock:
+            first_flags = self.modpack_flags.get(first, {})
+            second_flags = self.modpack_flags.get(second, {})
+            only_first = {key: value for key, value in first_flags.items() if key not in second_flags}
+            only_second = {key: value for key, value in second_flags.items() if key not in first_flags}
+            differing = {
+                key: (value, second_flags[key]) for key, value in first_flags.items()
+                if key in second_flags and second_flags[key] != value}
+        return only_first, only_second, differing
+
+    def modpacks(self):
+        with self.lock:
+            return sorted(self.modpack_flags)
+
+flag_index = None
+flag_index_lock = threading.Lock()
+
+def stat_client_settings(settings_path):
     try:
-        with open(mod_state_path, "w") as f:
-            json.dump(mod_state, f, indent=4)
-        print(f"Updated mod state '{key}' to '{value}' in {mod_state_path}")
-    except Exception as e:
-        print(f"Error writing mod state file {mod_state_path}: {e}")
+        stat = os.stat(settings_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def get_flag_index(refresh=False):
+    global flag_index
+    with flag_index_lock:
+        index = flag_index
+        loaded = index is None
+        if loaded:
+            index = FlagIndex()
+            index.load()
+            flag_index = index
+        if not loaded and not refresh:
+            return index
+
+        start = time.perf_counter()
+        modpacks = set()
+        if os.path.exists(modpacks_dir):
+            modpacks = {
+                modpack for modpack in os.listdir(modpacks_dir)
+                if os.path.isdir(os.path.join(modpacks_dir, modpack, "RobloxCopy"))}
+        for modpack in index.modpacks():
+            if modpack not in modpacks:
+                index.remove_modpack(modpack)
+
+        refreshed = 0
+        for modpack in modpacks:
+            try:
+                settings_path = get_client_settings_path(modpack)
+            except (OSError, IndexError):
+                index.remove_modpack(modpack)
+                continue
+            stamp = stat_client_settings(settings_path)
+            if stamp is None:
+                index.remove_modpack(modpack)
+                continue
+            if index.stamps.get(modpack) == stamp:
+                continue
+            try:
+                with open(settings_path, "r") as f:
+                    settings = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not index fast flags of {modpack}: {e}")
+                continue
+            index.set_modpack(modpack, settings if isinstance(settings, dict) else {}, stamp)
+            refreshed += 1
+
+    index.save()
+    logging.info(
+        f"Loaded fast flag index: {len(index.flags)} flags in {len(modpacks)} modpacks, "
+        f"{refreshed} re-read in {time.perf_counter() - start:.3f}s")
+    return index
+
+def note_client_settings_written(settings_path, settings):
+    index = flag_index
+    if index is None:
+        return
+    parts = os.path.relpath(settings_path, modpacks_dir).split(os.sep)
+    if len(parts) != 5 or parts[1] != "RobloxCopy":
+        return
+    index.set_modpack(parts[0], settings, stat_client_settings(settings_path))
+
+def forget_flag_index_entry(modpack):
+    if flag_index is not None:
+        flag_index.remove_modpack(modpack)
+        flag_index.save()
+
+def save_flag_index():
+    if flag_index is not None:
+        flag_index.save()
+
+atexit.register(save_flag_index)
+
+def format_flag_search(results):
+    lines = []
+    for key, owners in results.items():
+        lines.append(key)
+        for modpack, value in sorted(owners.items()):
+            lines.append(f"    {modpack} = {json.dumps(value)}")
+    return "\n".join(lines)
+
+def format_flag_comparison(first, second, only_first, only_second, differing):
+    lines = []
+    for key, (first_value, second_value) in sorted(differing.items()):
+        lines.append(f"{key}: {json.dumps(first_value)} | {json.dumps(second_value)}")
+    for modpack, flags in ((first, only_first), (second, only_second)):
+        for key, value in sorted(flags.items()):
+            lines.append(f"{key} = {json.dumps(value)} (only in {modpack})")
+    return "\n".join(lines) or "Both modpacks set the same fast flags."
+
+def run_flags_cli(args):
+    parser = argparse.ArgumentParser(prog="app.py flags", description="Query fast flags across modpacks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    get_parser = commands.add_parser("get", help="show every modpack that sets a flag")
+    get_parser.add_argument("flag")
+    search_parser = commands.add_parser("search", help="find flags whose name contains the text")
+    search_parser.add_argument("text")
+    search_parser.add_argument("--limit", type=int, default=None)
+    compare_parser = commands.add_parser("compare", help="show flags that differ between two modpacks")
+    compare_parser.add_argument("first")
+    compare_parser.add_argument("second")
+    options = parser.parse_args(args)
+
+    index = get_flag_index(refresh=True)
+    if options.command == "get":
+        owners = index.lookup(options.flag)
+        print(format_flag_search({options.flag: owners}) if owners else f"No modpack sets {options.flag}.")
+    elif options.command == "search":
+        results = index.search(options.text, options.limit)
+        print(format_flag_search(results) if results else "No modpack sets a matching fast flag.")
+    else:
+        known = index.modpacks()
+        for modpack in (options.first, options.second):
+            if modpack not in known:
+                print(f"Unknown modpack '{modpack}'")
+                return 1
+        print(format_flag_comparison(
+            options.first, options.second, *index.compare(options.first, options.second)))
+    return 0
+
+FFLAG_KIND_PATTERN = re.compile(r"^(?:(?:D|S)?F(Flag|Int|String|Log)[A-Za-z0-9_]+$|.*$)", re.M)
+FFLAG_KEY_LINE_PATTERN = re.compile(r'^[ \t]*"((?:[^"\\\n]|\\.)*)"[ \t]*:', re.M)
+FFLAG_INT_PATTERN = re.compile(r"-?[0-9]+")
+FFLAG_BOOL_STRINGS = {"True", "False", "true", "false"}
+FFLAG_INT_RANGE = (-2 ** 31, 2 ** 31 - 1)
+KNOWN_UNPREFIXED_FFLAGS = {
+    flag for flags in MOD_FLAG_LAYERS.values() for flag in flags
+    if not FFLAG_KIND_PATTERN.match(flag).group(1)
+}
+
+def find_invalid_fflag_bools(settings, keys):
+    return [
+        (key, "expected True or False") for key in keys
+        if not (type(settings[key]) is bool or type(settings[key]) is str and settings[key] in FFLAG_BOOL_STRINGS)]
+
+def find_invalid_fflag_ints(settings, keys):
+    invalid = []
+    for key in keys:
+        value = settings[key]
+        if type(value) is str and FFLAG_INT_PATTERN.fullmatch(value):
+            value = int(value)
+        elif type(value) is not int:
+            invalid.append((key, "expected an integer"))
+            continue
+        if not FFLAG_INT_RANGE[0] <= value <= FFLAG_INT_RANGE[1]:
+            invalid.append((key, "integer out of 32-bit range"))
+    return invalid
+
+def find_invalid_fflag_strings(settings, keys):
+    return [(key, "expected a string") for key in keys if type(settings[key]) is not str]
+
+FFLAG_VALUE_CHECKS = {
+    "Flag": find_invalid_fflag_bools,
+    "Int": find_invalid_fflag_ints,
+    "Log": find_invalid_fflag_ints,
+    "String": find_invalid_fflag_strings
+}
+
+def classify_fflag_keys(keys):
+    kinds = FFLAG_KIND_PATTERN.findall("\n".join(keys))
+    if len(kinds) != len(keys):
+        kinds = [FFLAG_KIND_PATTERN.match(key).group(1) or "" if "\n" not in key else "" for key in keys]
+    groups = {"": [], "Flag": [], "Int": [], "Log": [], "String": []}
+    for key, kind in zip(keys, kinds):
+        groups[kind].append(key)
+    return groups
+
+def scan_fflag_key_lines(text, pattern, keys, positions):
+    line = 1
+    previous = 0
+    for match in pattern.finditer(text):
+        line += text.count("\n", previous, match.start())
+        previous = match.start()
+        key = match.group(1)
+        if "\\" in key:
+            key = json.loads(f'"{key}"')
+        if key in keys:
+            positions.setdefault(key, []).append(line)
+
+def locate_fflag_keys(text, keys):
+    positions = {}
+    if len(keys) <= 200:
+        alternatives = sorted((re.escape(json.dumps(key)[1:-1]) for key in keys), key=len, reverse=True)
+        pattern = re.compile(r'^[ \t]*"(' + "|".join(alternatives) + r')"[ \t]*:', re.M)
+        scan_fflag_key_lines(text, pattern, keys, positions)
+    if len(positions) < len(keys):
+        scan_fflag_key_lines(text, FFLAG_KEY_LINE_PATTERN, keys - set(positions), positions)
+    for key in keys:
+        if key not in positions:
+            position = text.find(json.dumps(key))
+            positions[key] = [text.count("\n", 0, position) + 1 if position != -1 else 1]
+    return positions
+
+def validate_fflags(text):
+    duplicates = []
+
+    def collect_object(pairs):
+        nonlocal duplicates
+        settings = dict(pairs)
+        duplicates = []
+        if len(settings) != len(pairs):
+            counts = Counter([pair[0] for pair in pairs])
+            duplicates = [key for key, count in counts.items() if count > 1]
+        return settings
+
+    try:
+        settings = json.loads(text, object_pairs_hook=collect_object)
+    except json.JSONDecodeError as e:
+        return None, [f"Line {e.lineno}, column {e.colno}: {e.msg}"]
+    if not isinstance(settings, dict):
+        return None, ["Line 1: fast flags must be a JSON object"]
+
+    groups = classify_fflag_keys(list(settings))
+    invalid = [(key, "unknown flag prefix") for key in groups.pop("") if key not in KNOWN_UNPREFIXED_FFLAGS]
+    for kind, keys in groups.items():
+        invalid.extend(FFLAG_VALUE_CHECKS[kind](settings, keys))
+    if not invalid and not duplicates:
+        return settings, []
+
+    positions = locate_fflag_keys(text, {key for key, _ in invalid} | set(duplicates))
+    errors = [(positions[key][-1], f"{key}: {message}") for key, message in invalid]
+    errors.extend(
+        (positions[key][-1], f"{key}: duplicate flag, earlier value on line {positions[key][0]} is ignored")
+        for key in duplicates)
+    errors.sort()
+    return settings, [f"Line {line}: {message}" for line, message in errors]
+
+def format_fflag_errors(errors, limit=30):
+    text = "\n".join(errors[:limit])
+    if len(errors) > limit:
+        text += f"\n... and {len(errors) - limit} more"
+    return text
 
 def load_external_mods():
     with open(external_mods_file, "r") as f:
@@ -153,181 +1171,1867 @@ def validate_external_mod_entry(internal_name, mod_info):
         logging.error(f"Error validating mod entry {internal_name}: {str(e)}")
         return False
 
-def reapply_enabled_mods(modpack):
+def apply_mod_to_modpack(modpack, internal_name, enabled, external_mods=None):
+    if not internal_name.startswith("external_"):
+        func = mod_apply_functions.get(internal_name)
+        if func:
+            with get_reconcile_lock(modpack):
+                return func(enabled, modpack=modpack)
+        return None
+
+    if external_mods is None:
+        external_mods = load_external_mods()
+    mod_info = external_mods.get(internal_name)
+    if not mod_info:
+        logging.warning(f"External mod {internal_name} not found in external_mods.json")
+        return False
+    if not validate_external_mod_entry(internal_name, mod_info):
+        return False
+    with open(mod_info["config_path"], "r") as f:
+        mod_config = json.load(f)
+    return apply_external_mod(modpack, internal_name, mod_config, enabled)
+
+def reapply_enabled_mods(modpack, only=None):
     if not modpack:
         logging.warning("No modpack selected for reapply_enabled_mods.")
         return
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    if not os.path.exists(mod_state_path):
+    if not mod_state_store.exists(modpack):
         logging.debug(f"No mod_state.json found for modpack {modpack}")
         return
 
     try:
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-            
-        for internal_name, enabled in mod_state.items():
-            if not internal_name.startswith("external_") and enabled:
-                func = mod_apply_functions.get(internal_name)
-                if func:
-                    try:
-                        func(True)
-                        logging.info(f"Reapplied internal mod {internal_name} for modpack {modpack}")
-                    except Exception as e:
-                        logging.error(f"Failed to reapply internal mod {internal_name}: {str(e)}")
+        mod_state = mod_state_store.get(modpack)
+
+        enabled_mods = [
+            internal_name for internal_name, enabled in mod_state.items()
+            if enabled and (only is None or internal_name in only)]
+        enabled_mods.sort(key=lambda internal_name: internal_name.startswith("external_"))
 
         external_mods = load_external_mods()
-        for internal_name, enabled in mod_state.items():
-            if internal_name.startswith("external_") and enabled:
-                mod_info = external_mods.get(internal_name)
-                if not mod_info:
-                    logging.warning(f"External mod {internal_name} not found in external_mods.json")
-                    continue
-                if not validate_external_mod_entry(internal_name, mod_info):
-                    continue
-                try:
-                    with open(mod_info["config_path"], "r") as f:
-                        mod_config = json.load(f)
-                    logging.info(f"Reapplying enabled mod {mod_info['name']} ({internal_name}) for modpack {modpack}")
-                    apply_external_mod(modpack, internal_name, mod_config, True)
-                except Exception as e:
-                    logging.error(f"Failed to reapply mod {internal_name}: {str(e)}")
+        for internal_name in enabled_mods:
+            try:
+                apply_mod_to_modpack(modpack, internal_name, True, external_mods)
+                logging.info(f"Reapplied mod {internal_name} for modpack {modpack}")
+            except Exception as e:
+                logging.error(f"Failed to reapply mod {internal_name}: {str(e)}")
     except Exception as e:
         logging.error(f"Error reading mod_state.json for modpack {modpack}: {str(e)}")
 
-def handle_mod_conflicts(activated_display_name):
-    modpack = selected_modpack
+def apply_mod_batch(modpack, changes):
+    with get_reconcile_lock(modpack):
+        return apply_mod_batch_locked(modpack, changes)
+
+def apply_mod_batch_locked(modpack, changes):
+    before = mod_state_store.get(modpack)
+    pending = [
+        (internal_name, enabled) for internal_name, enabled in changes.items()
+        if bool(before.get(internal_name, False)) != enabled]
+    if not pending:
+        return True
+    pending.sort(key=lambda item: (item[1], item[0].startswith("external_")))
+
+    start = time.perf_counter()
+    external_mods = load_external_mods()
+    target_paths = []
+    for internal_name, _ in pending:
+        target_paths.extend(get_mod_target_paths(internal_name))
+    wait_for_modpack_paths(modpack, target_paths)
+
+    try:
+        compositor = get_flag_compositor(modpack)
+        layers_before = compositor.snapshot()
+    except OSError:
+        compositor = None
+
+    applied = []
+    current = None
+    begin_client_settings_batch()
+    try:
+        for internal_name, enabled in pending:
+            current = (internal_name, enabled)
+            if apply_mod_to_modpack(modpack, internal_name, enabled, external_mods) is False:
+                raise RuntimeError(f"could not {'enable' if enabled else 'disable'} {internal_name}")
+            applied.append(current)
+            current = None
+            mod_state_store.set(modpack, internal_name, enabled)
+    except Exception as e:
+        logging.error(f"Mod batch for {modpack} failed, rolling back {len(applied) + bool(current)} mods: {str(e)}")
+        touched = dict(applied)
+        rollback = []
+        if current:
+            touched[current[0]] = current[1]
+            rollback.append((current[0], not current[1]))
+        rollback += [(internal_name, not enabled) for internal_name, enabled in reversed(applied)]
+        rollback += [
+            (internal_name, bool(before.get(internal_name, False)))
+            for internal_name, enabled in mod_state_store.get(modpack).items()
+            if bool(before.get(internal_name, False)) != bool(enabled) and internal_name not in touched]
+        for internal_name, enabled in rollback:
+            try:
+                apply_mod_to_modpack(modpack, internal_name, enabled, external_mods)
+            except Exception as rollback_error:
+                logging.error(f"Failed to roll back {internal_name} for {modpack}: {str(rollback_error)}")
+        if compositor is not None:
+            compositor.restore(layers_before)
+        discard_client_settings_batch()
+        mod_state_store.replace(modpack, before)
+        raise
+
+    flush_client_settings_batch()
+    logging.info(f"Applied {len(applied)} mod changes to {modpack} in {time.perf_counter() - start:.2f}s")
+    return True
+
+def handle_mod_conflicts(activated_display_name, modpack=None):
+    modpack = modpack or selected_modpack
     if not modpack or activated_display_name not in CONFLICTING_MODS:
         return
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    if not os.path.exists(mod_state_path):
+    if not mod_state_store.exists(modpack):
         return
 
-    with open(mod_state_path, "r") as f:
-        mod_state = json.load(f)
-
-    changed = False
     for conflicting_display_name in CONFLICTING_MODS[activated_display_name]:
 
         internal_key = MOD_NAME_MAPPING.get(conflicting_display_name)
         if not internal_key:
             continue
 
-        if internal_key in mod_state and mod_state[internal_key]:
+        if mod_state_store.is_enabled(modpack, internal_key):
 
-            mod_state[internal_key] = False
+            mod_state_store.set(modpack, internal_key, False)
 
             if conflicting_display_name in mod_states:
                 mod_states[conflicting_display_name].set(False)
 
             func_name = MOD_NAME_MAPPING.get(conflicting_display_name)
             if func_name and func_name in mod_apply_functions:
-                mod_apply_functions[func_name](False)
+                mod_apply_functions[func_name](False, modpack=modpack)
 
-            changed = True
             print(f"Disabled conflicting mod: {conflicting_display_name}")
 
-    if changed:
-        with open(mod_state_path, "w") as f:
-            json.dump(mod_state, f, indent=4)
+roblox_install_cache = {"key": None, "incomplete": {}, "installs": []}
+roblox_install_lock = threading.Lock()
 
-def get_roblox_folder():
-
-    potential_paths = [
-        os.path.join(os.getenv("LOCALAPPDATA"), "Roblox", "Versions"),
+def get_roblox_version_roots():
+    roots = [
         os.path.join("C:\\Program Files (x86)", "Roblox", "Versions"),
         os.path.join("C:\\Program Files", "Roblox", "Versions")
     ]
+    if os.getenv("LOCALAPPDATA"):
+        roots.insert(0, os.path.join(os.getenv("LOCALAPPDATA"), "Roblox", "Versions"))
+    return roots
 
-    for path in potential_paths:
-        if os.path.exists(path):
-            for root, dirs, files in os.walk(path):
-                if "RobloxPlayerBeta.exe" in files and "RobloxPlayerBeta.dll" in files:
-                    print(root)
-                    return root
-    return None
+def get_directory_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
-def generate_unique_internal_name(display_name):
-    base_name = display_name.lower().replace(' ', '_')
-    unique_id = str(uuid.uuid4())[:8]
-    return f"external_{base_name}_{unique_id}"
+def list_roblox_installs():
+    key = tuple((root, get_directory_mtime(root)) for root in get_roblox_version_roots())
 
+    with roblox_install_lock:
+        if roblox_install_cache["key"] == key and all(
+                get_directory_mtime(path) == mtime
+                for path, mtime in roblox_install_cache["incomplete"].items()):
+            return roblox_install_cache["installs"]
 
-def save_external_mods(mod_data):
-    try:
-        with open(external_mods_file, "w") as f:
-            json.dump(mod_data, f, indent=4)
-        return True
-    except Exception as e:
-        logging.error(f"Error saving external mods: {str(e)}")
-        return False
+        installs = []
+        incomplete = {}
+        for root, mtime in key:
+            if mtime is None:
+                continue
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    try:
+                        exe_stat = os.stat(os.path.join(entry.path, "RobloxPlayerBeta.exe"))
+                        os.stat(os.path.join(entry.path, "RobloxPlayerBeta.dll"))
+                    except OSError:
+                        incomplete[entry.path] = get_directory_mtime(entry.path)
+                        continue
+                    installs.append({
+                        "path": entry.path,
+                        "version": entry.name,
+                        "build_time": exe_stat.st_mtime
+                    })
+
+        installs.sort(key=lambda install: (install["build_time"], install["version"]), reverse=True)
+        roblox_install_cache.update({"key": key, "incomplete": incomplete, "installs": installs})
+        logging.info(f"Found {len(installs)} Roblox installs: {[install['version'] for install in installs]}")
+        return installs
 
+def get_roblox_folder():
+    installs = list_roblox_installs()
+    if not installs:
+        return None
+    return installs[0]["path"]
 
-def create_external_mod():
-    dialog = QDialog()
-    dialog.setWindowTitle("Create External Mod")
-    dialog.setMinimumSize(500, 600)
+def _copy_with_kernel(fsrc, fdst, size):
+    src_fd = fsrc.fileno()
+    dst_fd = fdst.fileno()
 
-    layout = QVBoxLayout()
+    if copy_backends["reflink"]:
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return "reflink"
+        except OSError as e:
+            if e.errno in UNSUPPORTED_COPY_ERRNOS:
+                copy_backends["reflink"] = False
 
-    name_label = QLabel("Mod Name:")
-    name_input = QLineEdit()
-    layout.addWidget(name_label)
-    layout.addWidget(name_input)
+    if copy_backends["copy_file_range"]:
+        try:
+            copied = 0
+            while copied < size:
+                sent = os.copy_file_range(src_fd, dst_fd, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            if copied == size:
+                return "copy_file_range"
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            return None
+        except OSError as e:
+            if e.errno in UNSUPPORTED_COPY_ERRNOS:
+                copy_backends["copy_file_range"] = False
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+
+    if copy_backends["sendfile"]:
+        try:
+            copied = 0
+            while copied < size:
+                sent = os.sendfile(dst_fd, src_fd, copied, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            if copied == size:
+                return "sendfile"
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            return None
+        except OSError as e:
+            if e.errno in UNSUPPORTED_COPY_ERRNOS:
+                copy_backends["sendfile"] = False
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
 
-    type_label = QLabel("Mod Type:")
-    type_combo = QComboBox()
-    type_combo.addItems(["mod", "texturepack"])
-    layout.addWidget(type_label)
-    layout.addWidget(type_combo)
+    return None
 
-    icon_label = QLabel("Mod Icon:")
-    icon_preview = QLabel()
-    icon_preview.setFixedSize(100, 100)
-    icon_preview.setStyleSheet("background-color: #333; border: 1px solid #444;")
+def _copy_with_windows(src_path, dst_path):
+    if windows_kernel32.CopyFileW(src_path, dst_path, False):
+        return True
+    logging.debug(f"CopyFileW {src_path} -> {dst_path} failed with error {ctypes.get_last_error()}")
+    return False
 
-    def select_icon():
-        icon_path, _ = QFileDialog.getOpenFileName(
-            dialog,
-            "Select Mod Icon",
-            "",
-            "Image Files (*.png *.jpg *.jpeg)"
-        )
-        if icon_path:
+def copy_file_fast(src_path, dst_path):
+    break_hardlink(dst_path, keep_contents=False)
+    if copy_backends["copyfile"] and _copy_with_windows(src_path, dst_path):
+        return os.path.getsize(dst_path)
+    with open(src_path, "rb") as fsrc, open(dst_path, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        if size == 0 or not _copy_with_kernel(fsrc, fdst, size):
+            shutil.copyfileobj(fsrc, fdst, SMALL_FILE_LIMIT)
+    shutil.copystat(src_path, dst_path)
+    return size
+
+def log_copy_stats(label, files, total_bytes, elapsed):
+    elapsed = max(elapsed, 1e-6)
+    logging.info(
+        f"{label}: {files} files, {total_bytes / 1048576:.1f} MB in {elapsed:.2f}s "
+        f"({total_bytes / 1048576 / elapsed:.1f} MB/s, {files / elapsed:.0f} files/s)")
+
+def make_parent_dirs(paths):
+    made = set()
+    for dst_dir in sorted({os.path.dirname(path) for path in paths}, reverse=True):
+        if dst_dir in made:
+            continue
+        os.makedirs(dst_dir, exist_ok=True)
+        while dst_dir and dst_dir not in made:
+            made.add(dst_dir)
+            dst_dir = os.path.dirname(dst_dir)
+
+def map_files_parallel(func, items, max_workers=None):
+    items = list(items)
+    if len(items) <= COPY_BATCH_SIZE:
+        return [func(item) for item in items]
+
+    batches = [items[i:i + COPY_BATCH_SIZE] for i in range(0, len(items), COPY_BATCH_SIZE)]
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers or COPY_WORKERS) as pool:
+        for batch_results in pool.map(lambda batch: [func(item) for item in batch], batches):
+            results.extend(batch_results)
+    return results
+
+def copy_files_parallel(pairs, max_workers=None, label="Copy"):
+    pairs = list(pairs)
+    start = time.perf_counter()
+
+    make_parent_dirs(dst for _, dst in pairs)
+
+    batches = []
+    small_batch = []
+    for src, dst in pairs:
+        try:
+            size = os.path.getsize(src)
+        except OSError:
+            size = 0
+        if size >= SMALL_FILE_LIMIT:
+            batches.append([(src, dst)])
+            continue
+        small_batch.append((src, dst))
+        if len(small_batch) >= COPY_BATCH_SIZE:
+            batches.append(small_batch)
+            small_batch = []
+    if small_batch:
+        batches.append(small_batch)
+
+    def copy_batch(batch):
+        copied_bytes = 0
+        errors = []
+        for src, dst in batch:
             try:
-                img = Image.open(icon_path)
-                img = img.resize((100, 100))
-                img.save("temp_icon.png")
-                pixmap = QPixmap("temp_icon.png")
-                os.remove("temp_icon.png")
-                icon_preview.setPixmap(pixmap)
-                return icon_path
+                copied_bytes += copy_file_fast(src, dst)
             except Exception as e:
-                QMessageBox.warning(dialog, "Error", f"Could not load image: {str(e)}")
+                errors.append((src, dst, e))
+        return len(batch) - len(errors), copied_bytes, errors
+
+    stats = {"files": 0, "bytes": 0, "errors": [], "seconds": 0.0}
+    if batches:
+        with ThreadPoolExecutor(max_workers=max_workers or COPY_WORKERS) as pool:
+            for files, copied_bytes, errors in pool.map(copy_batch, batches):
+                stats["files"] += files
+                stats["bytes"] += copied_bytes
+                stats["errors"].extend(errors)
+
+    stats["seconds"] = time.perf_counter() - start
+    log_copy_stats(label, stats["files"], stats["bytes"], stats["seconds"])
+    for src, dst, e in stats["errors"]:
+        logging.error(f"{label}: failed to copy {src} -> {dst}: {e}")
+    return stats
+
+def hash_file(path):
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return file_hash.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                for offset in range(0, size, HASH_CHUNK_SIZE):
+                    file_hash.update(view[offset:offset + HASH_CHUNK_SIZE])
+    return file_hash.hexdigest()
+
+def get_blob_path(file_hash):
+    return os.path.join(blob_objects_dir, file_hash[:2], file_hash)
+
+version_manifests = {}
+version_manifests_lock = threading.Lock()
+
+def load_version_manifest(version):
+    with version_manifests_lock:
+        if version in version_manifests:
+            return version_manifests[version]
+
+    manifest = {"version": version, "source": None, "complete": False, "files": {}, "dirs": []}
+    manifest_path = os.path.join(manifests_dir, f"{version}.json")
+    try:
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                manifest.update(json.load(f))
+    except Exception as e:
+        logging.warning(f"Could not read version manifest {manifest_path}: {e}")
+
+    with version_manifests_lock:
+        return version_manifests.setdefault(version, manifest)
+
+def save_version_manifest(version, manifest):
+    os.makedirs(manifests_dir, exist_ok=True)
+    manifest_path = os.path.join(manifests_dir, f"{version}.json")
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, manifest_path)
+    with version_manifests_lock:
+        version_manifests[version] = manifest
+
+blob_writers = 0
+blob_writers_lock = threading.Lock()
+
+def begin_blob_writes():
+    global blob_writers
+    with blob_writers_lock:
+        blob_writers += 1
+
+def end_blob_writes():
+    global blob_writers
+    with blob_writers_lock:
+        blob_writers -= 1
+
+def store_blob(src_path, file_hash):
+    blob_path = get_blob_path(file_hash)
+    if not os.path.exists(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        temp_path = f"{blob_path}.{uuid.uuid4().hex[:8]}.tmp"
+        copy_file_fast(src_path, temp_path)
+        os.replace(temp_path, blob_path)
+    return blob_path
+
+def scan_tree(folder):
+    files = []
+    empty_dirs = []
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        has_entries = False
+        with os.scandir(os.path.join(folder, rel_dir)) as entries:
+            for entry in entries:
+                has_entries = True
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(rel_path)
+                else:
+                    files.append((rel_path, entry.stat()))
+        if rel_dir and not has_entries:
+            empty_dirs.append(rel_dir)
+    return files, empty_dirs
+
+def is_manifest_entry_fresh(entry, stat):
+    return (entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns
+            and os.path.exists(get_blob_path(entry[2])))
+
+def ingest_roblox_file(folder, rel_path, stat=None):
+    src_path = os.path.join(folder, rel_path)
+    if stat is None:
+        stat = os.stat(src_path)
+    file_hash = hash_file(src_path)
+    store_blob(src_path, file_hash)
+    return [stat.st_size, stat.st_mtime_ns, file_hash]
+
+def build_version_manifest(folder):
+    version = os.path.basename(folder)
+    known_files = load_version_manifest(version)["files"]
+    manifest_files = {}
+    stale_files = []
+
+    files, empty_dirs = scan_tree(folder)
+    for rel_path, stat in files:
+        entry = known_files.get(rel_path)
+        if is_manifest_entry_fresh(entry, stat):
+            manifest_files[rel_path] = entry
+        else:
+            stale_files.append((rel_path, stat))
+
+    manifest = {
+        "version": version,
+        "source": folder,
+        "complete": True,
+        "files": manifest_files,
+        "dirs": empty_dirs
+    }
+    begin_blob_writes()
+    try:
+        if stale_files:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+                entries = pool.map(lambda item: ingest_roblox_file(folder, *item), stale_files)
+                for (rel_path, _), entry in zip(stale_files, entries):
+                    manifest_files[rel_path] = entry
+            log_copy_stats(
+                f"Hash {version}", len(stale_files),
+                sum(stat.st_size for _, stat in stale_files), time.perf_counter() - start)
+        save_version_manifest(version, manifest)
+    finally:
+        end_blob_writes()
+    logging.info(f"Built manifest for Roblox version {version}: {len(manifest_files)} files")
+    return manifest
+
+def get_version_manifest(folder):
+    version = os.path.basename(folder)
+    manifest = load_version_manifest(version)
+    if not manifest["complete"]:
+        return build_version_manifest(folder)
+    if manifest["source"] != folder:
+        manifest = dict(manifest, source=folder)
+        save_version_manifest(version, manifest)
+    return manifest
+
+def get_modpack_version(modpack):
+    roblox_copy_dir = os.path.join(modpacks_dir, modpack, "RobloxCopy")
+    if not os.path.exists(roblox_copy_dir):
         return None
+    versions = os.listdir(roblox_copy_dir)
+    return versions[0] if versions else None
 
-    icon_button = QPushButton("Select Icon")
-    icon_button.clicked.connect(select_icon)
-
-    icon_layout = QHBoxLayout()
-    icon_layout.addWidget(icon_preview)
-    icon_layout.addWidget(icon_button)
-    layout.addLayout(icon_layout)
+def verify_modpack_tree(modpack, repair=False):
+    version = get_modpack_version(modpack)
+    manifest = load_version_manifest(version) if version else None
+    if not manifest or not manifest["complete"]:
+        return None
 
-    files_label = QLabel("File Replacements:")
-    files_table = QTableWidget()
-    files_table.setColumnCount(2)
-    files_table.setHorizontalHeaderLabels(["Source Path", "Destination Path"])
-    files_table.horizontalHeader().setStretchLastSection(True)
+    version_path = os.path.join(modpacks_dir, modpack, "RobloxCopy", version)
+    mod_state = mod_state_store.get(modpack)
+    owned_paths = []
+    for internal_name, enabled in mod_state.items():
+        if enabled:
+            owned_paths.extend(get_mod_target_paths(internal_name))
 
-    def add_file_replacement():
-        row = files_table.rowCount()
-        files_table.insertRow(row)
+    def check_file(item):
+        rel_path, (size, mtime_ns, file_hash) = item
+        if rel_path in MUTABLE_TREE_FILES or paths_intersect([rel_path], owned_paths):
+            return None
+        dst_path = os.path.join(version_path, rel_path)
+        try:
+            stat = os.stat(dst_path)
+        except FileNotFoundError:
+            return ("missing", rel_path)
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+            return None
+        try:
+            if os.path.samestat(stat, os.stat(get_blob_path(file_hash))):
+                return None
+        except FileNotFoundError:
+            pass
+        if stat.st_size == size and hash_file(dst_path) == file_hash:
+            return None
+        return ("modified", rel_path)
+
+    report = {"missing": [], "modified": []}
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        for result in pool.map(check_file, manifest["files"].items()):
+            if result:
+                report[result[0]].append(result[1])
+
+    damaged = report["missing"] + report["modified"]
+    if damaged:
+        logging.warning(
+            f"{modpack} differs from {version} in {len(damaged)} files"
+            f"{', repairing' if repair else ''}: {', '.join(sorted(damaged)[:5])}"
+            f"{' ...' if len(damaged) > 5 else ''}")
+    if repair:
+        for rel_path in damaged:
+            dst_path = os.path.join(version_path, rel_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
+            place_blob(manifest["files"][rel_path][2], rel_path, dst_path)
+
+    logging.info(
+        f"Verified {modpack} against {version}: {len(report['missing'])} missing, "
+        f"{len(report['modified'])} modified{' (repaired)' if repair else ''}")
+    return report
+
+def copy_file_atomic(src_path, dst_path):
+    temp_path = f"{dst_path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        copy_file_fast(src_path, temp_path)
+        os.replace(temp_path, dst_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def write_json_atomic(path, data, indent=4):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(json.dumps(data, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+def link_blob(blob_path, dst_path):
+    try:
+        os.link(blob_path, dst_path)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        raise
+    except OSError:
+        if not os.path.exists(dst_path):
+            copy_file_atomic(blob_path, dst_path)
+
+def place_blob(file_hash, rel_path, dst_path):
+    blob_path = get_blob_path(file_hash)
+    if rel_path in MUTABLE_TREE_FILES:
+        if not os.path.exists(dst_path):
+            copy_file_atomic(blob_path, dst_path)
+    else:
+        link_blob(blob_path, dst_path)
 
-        source_button = QPushButton("Browse")
-        dest_button = QPushButton("Browse")
+def link_or_copy(src_path, dst_path):
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    if os.path.lexists(dst_path):
+        os.remove(dst_path)
+    try:
+        os.link(src_path, dst_path)
+    except OSError:
+        copy_file_fast(src_path, dst_path)
+
+def break_hardlink(path, keep_contents=True):
+    try:
+        if os.stat(path).st_nlink <= 1:
+            return
+    except FileNotFoundError:
+        return
+
+    if not keep_contents:
+        os.remove(path)
+        return
+
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    copy_file_fast(path, temp_path)
+    os.replace(temp_path, path)
+
+def collect_blob_garbage():
+    with blob_writers_lock:
+        if blob_writers:
+            logging.info(f"Skipping blob garbage collection: {blob_writers} blob writers are active")
+            return 0
+        return collect_blob_garbage_locked()
+
+def collect_blob_garbage_locked():
+    if not os.path.exists(blob_objects_dir):
+        return 0
+
+    used_versions = set()
+    if os.path.exists(modpacks_dir):
+        for modpack in os.listdir(modpacks_dir):
+            if os.path.isdir(os.path.join(modpacks_dir, modpack)):
+                used_versions.add(get_modpack_version(modpack))
+
+    live_hashes = set()
+    if os.path.exists(manifests_dir):
+        for manifest_file in os.listdir(manifests_dir):
+            if not manifest_file.endswith(".json"):
+                continue
+            version = manifest_file[:-5]
+            manifest = load_version_manifest(version)
+            if version in used_versions or manifest["source"] and os.path.exists(manifest["source"]):
+                live_hashes.update(entry[2] for entry in manifest["files"].values() if entry)
+                continue
+            try:
+                os.remove(os.path.join(manifests_dir, manifest_file))
+                with version_manifests_lock:
+                    version_manifests.pop(version, None)
+                logging.info(f"Dropped manifest of {version}: its source is gone and no modpack uses it")
+            except OSError as e:
+                logging.warning(f"Could not remove manifest {manifest_file}: {e}")
+                live_hashes.update(entry[2] for entry in manifest["files"].values() if entry)
+
+    removed = 0
+    for root, dirs, files in os.walk(blob_objects_dir):
+        for file in files:
+            blob_path = os.path.join(root, file)
+            try:
+                if file not in live_hashes and os.stat(blob_path).st_nlink <= 1:
+                    os.remove(blob_path)
+                    removed += 1
+            except OSError as e:
+                logging.warning(f"Could not remove blob {blob_path}: {e}")
+
+    logging.info(f"Removed {removed} unreferenced blobs from {blob_objects_dir}")
+    return removed
+
+class BackupStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.owners = None
+        self.refs = {}
+
+    def index_path(self):
+        return os.path.join(backup_store_dir, "refs.json")
+
+    def object_path(self, file_hash):
+        return os.path.join(backup_store_dir, "objects", file_hash[:2], file_hash)
+
+    def load(self):
+        if self.owners is not None:
+            return
+        try:
+            with open(self.index_path(), "r") as f:
+                self.owners = json.load(f)["owners"]
+        except (OSError, ValueError):
+            self.owners = {}
+        self.refs = {}
+        for mods in self.owners.values():
+            for files in mods.values():
+                for file_hash in files.values():
+                    self.refs[file_hash] = self.refs.get(file_hash, 0) + 1
+
+    def save(self):
+        os.makedirs(backup_store_dir, exist_ok=True)
+        write_json_atomic(self.index_path(), {"owners": self.owners}, indent=None)
+
+    def has(self, file_hash):
+        path = self.object_path(file_hash)
+        return os.path.exists(path) or os.path.exists(path + ".z")
+
+    def should_compress(self, src_path):
+        if os.path.splitext(src_path)[1].lower() in ALREADY_COMPRESSED_EXTENSIONS:
+            return False
+        with open(src_path, "rb") as f:
+            sample = f.read(BACKUP_COMPRESSION_SAMPLE)
+        return bool(sample) and len(zlib.compress(sample, 1)) < len(sample) * 0.9
+
+    def store_object(self, src_path, file_hash):
+        if self.has(file_hash):
+            return
+        path = self.object_path(file_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not self.should_compress(src_path):
+            link_blob(src_path, path)
+            return
+
+        temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        compressor = zlib.compressobj(6)
+        with open(src_path, "rb") as src, open(temp_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                dst.write(compressor.compress(chunk))
+            dst.write(compressor.flush())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temp_path, path + ".z")
+
+    def entries(self, modpack, internal_name):
+        with self.lock:
+            self.load()
+            return dict(self.owners.get(modpack, {}).get(internal_name, {}))
+
+    def backup(self, modpack, internal_name, files):
+        owned = self.entries(modpack, internal_name)
+        pending = {}
+        for rel_path, src_path, file_hash in files:
+            if rel_path not in owned and rel_path not in pending:
+                pending[rel_path] = (src_path, file_hash)
+        if not pending:
+            return owned
+
+        hashes = map_files_parallel(lambda item: item[1] or hash_file(item[0]), pending.values())
+        stored = dict(zip(pending, hashes))
+        objects = {}
+        for rel_path, file_hash in stored.items():
+            src_path = pending[rel_path][0]
+            if src_path:
+                objects.setdefault(file_hash, src_path)
+        map_files_parallel(lambda item: self.store_object(item[1], item[0]), sorted(objects.items()))
+
+        with self.lock:
+            self.load()
+            owned = self.owners.setdefault(modpack, {}).setdefault(internal_name, {})
+            for rel_path, file_hash in stored.items():
+                if rel_path not in owned:
+                    if file_hash not in self.refs and file_hash in objects and not self.has(file_hash):
+                        self.store_object(objects[file_hash], file_hash)
+                    owned[rel_path] = file_hash
+                    self.refs[file_hash] = self.refs.get(file_hash, 0) + 1
+            self.save()
+            return dict(owned)
+
+    def restore(self, file_hash, dst_path):
+        path = self.object_path(file_hash)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        if os.path.exists(path):
+            if hash_file_cached(path) != file_hash:
+                logging.error(f"Backup {file_hash} for {dst_path} is corrupt")
+                return False
+            if os.path.lexists(dst_path):
+                os.remove(dst_path)
+            link_blob(path, dst_path)
+            return True
+        if not os.path.exists(path + ".z"):
+            logging.error(f"Backup {file_hash} for {dst_path} is missing from {backup_store_dir}")
+            return False
+
+        temp_path = f"{dst_path}.{uuid.uuid4().hex[:8]}.tmp"
+        digest = hashlib.sha256()
+        decompressor = zlib.decompressobj()
+        with open(path + ".z", "rb") as src, open(temp_path, "wb") as dst:
+            for chunk in iter(lambda: src.read(HASH_CHUNK_SIZE), b""):
+                data = decompressor.decompress(chunk)
+                digest.update(data)
+                dst.write(data)
+            data = decompressor.flush()
+            digest.update(data)
+            dst.write(data)
+        if digest.hexdigest() != file_hash:
+            os.remove(temp_path)
+            logging.error(f"Backup {file_hash} for {dst_path} is corrupt")
+            return False
+        os.replace(temp_path, dst_path)
+        return True
+
+    def release(self, modpack, internal_name, rel_paths=None):
+        with self.lock:
+            self.load()
+            mods = self.owners.get(modpack, {})
+            owned = mods.get(internal_name)
+            if not owned or rel_paths is not None and not rel_paths:
+                return
+            for rel_path in list(owned) if rel_paths is None else rel_paths:
+                file_hash = owned.pop(rel_path, None)
+                if file_hash is None:
+                    continue
+                self.refs[file_hash] -= 1
+                if self.refs[file_hash] == 0:
+                    del self.refs[file_hash]
+                    path = self.object_path(file_hash)
+                    for object_path in (path, path + ".z"):
+                        if os.path.exists(object_path):
+                            os.remove(object_path)
+            if not owned:
+                del mods[internal_name]
+            if not mods:
+                self.owners.pop(modpack, None)
+            self.save()
+
+    def copy_owner(self, source, name):
+        with self.lock:
+            self.load()
+            mods = self.owners.get(source)
+            if not mods:
+                return
+            self.owners[name] = {internal_name: dict(files) for internal_name, files in mods.items()}
+            for files in mods.values():
+                for file_hash in files.values():
+                    self.refs[file_hash] += 1
+            self.save()
+
+    def forget_modpack(self, modpack):
+        with self.lock:
+            self.load()
+            for internal_name in list(self.owners.get(modpack, {})):
+                self.release(modpack, internal_name)
+
+backup_store = BackupStore()
+
+def get_tree_file_hash(version_files, rel_path, path):
+    entry = version_files.get(rel_path)
+    stat = os.stat(path)
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+    return hash_file(path)
+
+def prepare_modpack_tree(folder, dst_folder):
+    for rel_path in MUTABLE_TREE_FILES:
+        src_path = os.path.join(folder, rel_path)
+        dst_path = os.path.join(dst_folder, rel_path)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        if os.path.exists(src_path) and not os.path.exists(dst_path):
+            copy_file_fast(src_path, dst_path)
+
+    settings_file = os.path.join(dst_folder, "ClientSettings", "ClientAppSettings.json")
+    if not os.path.exists(settings_file):
+        with open(settings_file, "w") as f:
+            json.dump({}, f, indent=4)
+
+class ModpackMaterializer:
+    def __init__(self, modpack, source_folder, dst_folder):
+        self.modpack = modpack
+        self.source_folder = source_folder
+        self.dst_folder = dst_folder
+        self.version = os.path.basename(source_folder)
+        self.condition = threading.Condition()
+        self.scanned = threading.Event()
+        self.finished = threading.Event()
+        self.cancelled = False
+        self.rel_paths = []
+        self.stats = {}
+        self.states = {}
+        self.entries = {}
+        self.empty_dirs = []
+        self.manifest_changed = False
+        self.done_count = 0
+        self.failed = []
+        self.error = None
+
+    def start(self):
+        begin_blob_writes()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        try:
+            manifest = load_version_manifest(self.version)
+            if manifest["complete"]:
+                entries = dict(manifest["files"])
+                self.empty_dirs = manifest["dirs"]
+                self.manifest_changed = manifest["source"] != self.source_folder
+            else:
+                files, self.empty_dirs = scan_tree(self.source_folder)
+                self.stats = dict(files)
+                entries = {
+                    rel_path: manifest["files"].get(rel_path) for rel_path, _ in files}
+                self.manifest_changed = True
+            with self.condition:
+                self.entries = entries
+                self.rel_paths = sorted(entries)
+                self.states = {rel_path: "pending" for rel_path in self.rel_paths}
+            for rel_dir in self.empty_dirs:
+                os.makedirs(os.path.join(self.dst_folder, rel_dir), exist_ok=True)
+            self.scanned.set()
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+                list(pool.map(self.materialize, self.rel_paths))
+            log_copy_stats(
+                f"Materialize {self.modpack}", self.done_count,
+                sum(entry[0] for entry in self.entries.values() if entry), time.perf_counter() - start)
+
+            if self.cancelled:
+                return
+            if self.failed:
+                self.error = f"{len(self.failed)} files could not be copied"
+                logging.error(f"Materializing {self.modpack} failed for {len(self.failed)} files")
+                return
+
+            if self.manifest_changed:
+                save_version_manifest(self.version, {
+                    "version": self.version,
+                    "source": self.source_folder,
+                    "complete": True,
+                    "files": self.entries,
+                    "dirs": self.empty_dirs
+                })
+            marker_path = os.path.join(modpacks_dir, self.modpack, "materializing.json")
+            if os.path.exists(marker_path):
+                os.remove(marker_path)
+            logging.info(f"Modpack {self.modpack} is fully materialized")
+        except Exception as e:
+            self.error = str(e)
+            logging.error(f"Error materializing modpack {self.modpack}: {str(e)}")
+        finally:
+            end_blob_writes()
+            self.scanned.set()
+            self.finished.set()
+            with materializations_lock:
+                if materializations.get(self.modpack) is self:
+                    del materializations[self.modpack]
+
+    def claim(self, rel_path):
+        with self.condition:
+            if self.states.get(rel_path) != "pending":
+                return False
+            self.states[rel_path] = "working"
+            return True
+
+    def materialize(self, rel_path):
+        if self.cancelled or not self.claim(rel_path):
+            return
+
+        entry = None
+        try:
+            with self.condition:
+                entry = self.entries[rel_path]
+            stat = self.stats.get(rel_path)
+            if stat is not None and not is_manifest_entry_fresh(entry, stat):
+                entry = ingest_roblox_file(self.source_folder, rel_path, stat)
+            dst_path = os.path.join(self.dst_folder, rel_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            try:
+                place_blob(entry[2], rel_path, dst_path)
+            except FileNotFoundError:
+                entry = ingest_roblox_file(self.source_folder, rel_path)
+                self.manifest_changed = True
+                place_blob(entry[2], rel_path, dst_path)
+        except Exception as e:
+            logging.error(f"Failed to materialize {rel_path} for {self.modpack}: {e}")
+            entry = None
+        finally:
+            with self.condition:
+                if entry:
+                    self.entries[rel_path] = entry
+                    self.states[rel_path] = "done"
+                else:
+                    self.states[rel_path] = "failed"
+                    self.failed.append(rel_path)
+                self.done_count += 1
+                self.condition.notify_all()
+
+    def match(self, rel_path):
+        rel_path = os.path.normpath(rel_path)
+        if rel_path in self.states:
+            return [rel_path]
+        prefix = rel_path + os.sep
+        matched = []
+        position = bisect.bisect_left(self.rel_paths, prefix)
+        while position < len(self.rel_paths) and self.rel_paths[position].startswith(prefix):
+            matched.append(self.rel_paths[position])
+            position += 1
+        return matched
+
+    def wait_for(self, rel_paths):
+        self.scanned.wait()
+        targets = []
+        with self.condition:
+            for rel_path in rel_paths:
+                targets.extend(self.match(rel_path))
+
+        for rel_path in targets:
+            self.materialize(rel_path)
+
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.cancelled or all(self.states[rel_path] != "working" for rel_path in targets))
+
+    def progress(self):
+        if not self.scanned.is_set() or not self.rel_paths:
+            return 0
+        return int(self.done_count * 100 / len(self.rel_paths))
+
+    def cancel(self):
+        self.cancelled = True
+        with self.condition:
+            self.condition.notify_all()
+        self.finished.wait()
+
+
+materializations = {}
+materializations_lock = threading.Lock()
+
+def start_materialization(modpack, source_folder):
+    dst_folder = os.path.join(modpacks_dir, modpack, "RobloxCopy", os.path.basename(source_folder))
+    os.makedirs(dst_folder, exist_ok=True)
+
+    marker_path = os.path.join(modpacks_dir, modpack, "materializing.json")
+    write_json_atomic(marker_path, {"source": source_folder})
+
+    materializer = ModpackMaterializer(modpack, source_folder, dst_folder)
+    with materializations_lock:
+        materializations[modpack] = materializer
+    materializer.start()
+    return materializer
+
+def resume_materializations():
+    if not os.path.exists(modpacks_dir):
+        return
+
+    for modpack in os.listdir(modpacks_dir):
+        marker_path = os.path.join(modpacks_dir, modpack, "materializing.json")
+        if not os.path.exists(marker_path) or get_materializer(modpack):
+            continue
+        try:
+            with open(marker_path, "r") as f:
+                source_folder = json.load(f)["source"]
+            if not os.path.exists(source_folder):
+                logging.error(f"Cannot resume modpack {modpack}: {source_folder} no longer exists")
+                continue
+            logging.info(f"Resuming materialization of modpack {modpack}")
+            start_materialization(modpack, source_folder)
+        except Exception as e:
+            logging.error(f"Failed to resume materialization of {modpack}: {str(e)}")
+
+def get_materializer(modpack):
+    with materializations_lock:
+        return materializations.get(modpack)
+
+def wait_for_modpack_paths(modpack, rel_paths):
+    materializer = get_materializer(modpack)
+    if materializer:
+        materializer.wait_for(rel_paths)
+
+def cancel_materialization(modpack):
+    materializer = get_materializer(modpack)
+    if materializer:
+        materializer.cancel()
+
+def get_mod_target_paths(internal_name, mod_config=None):
+    if BUILTIN_MODS.get(internal_name, {}).get("replace_files"):
+        plan = get_builtin_mod_plan(internal_name)
+        return plan["exclusive_dirs"] + [rel_path for _, rel_path in plan["files"]]
+
+    if internal_name.startswith("external_"):
+        if mod_config is None:
+            mod_info = load_external_mods().get(internal_name)
+            if not mod_info or not os.path.exists(mod_info["config_path"]):
+                return []
+            with open(mod_info["config_path"], "r") as f:
+                mod_config = json.load(f)
+        return [
+            os.path.normpath(os.path.join("content", file_entry["destination"]))
+            for file_entry in mod_config.get("replace_files", []) if file_entry.get("destination")]
+
+    return MOD_TARGET_PATHS.get(internal_name, [])
+
+def paths_intersect(sorted_paths, target_paths):
+    for target in target_paths:
+        target = os.path.normpath(target)
+        position = bisect.bisect_left(sorted_paths, target)
+        if position < len(sorted_paths) and sorted_paths[position] == target:
+            return True
+        position = bisect.bisect_left(sorted_paths, target + os.sep)
+        if position < len(sorted_paths) and sorted_paths[position].startswith(target + os.sep):
+            return True
+    return False
+
+mod_path_index = None
+mod_path_index_lock = threading.Lock()
+
+def get_mod_path_index():
+    global mod_path_index
+    with mod_path_index_lock:
+        if mod_path_index is not None:
+            return mod_path_index
+
+        start = time.perf_counter()
+        index = {"owners": {}, "paths": {}}
+        try:
+            external_mods = load_external_mods()
+        except (OSError, ValueError):
+            external_mods = {}
+        for internal_name in list(BUILTIN_MODS) + list(external_mods):
+            try:
+                paths = get_mod_target_paths(internal_name)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not index target paths of {internal_name}: {e}")
+                continue
+            add_mod_paths(index, internal_name, paths)
+        mod_path_index = index
+        logging.info(
+            f"Indexed {len(index['owners'])} mod target paths of {len(index['paths'])} mods "
+            f"in {time.perf_counter() - start:.3f}s")
+        return index
+
+def add_mod_paths(index, internal_name, paths):
+    paths = [os.path.normpath(path) for path in paths]
+    index["paths"][internal_name] = paths
+    for path in paths:
+        owners = index["owners"].setdefault(path, [])
+        if internal_name not in owners:
+            owners.append(internal_name)
+
+def remove_mod_paths(index, internal_name):
+    for path in index["paths"].pop(internal_name, []):
+        owners = index["owners"].get(path, [])
+        if internal_name in owners:
+            owners.remove(internal_name)
+        if not owners:
+            index["owners"].pop(path, None)
+
+def register_mod_paths(internal_name, paths):
+    index = get_mod_path_index()
+    with mod_path_index_lock:
+        remove_mod_paths(index, internal_name)
+        add_mod_paths(index, internal_name, paths)
+
+def unregister_mod_paths(internal_name):
+    index = get_mod_path_index()
+    with mod_path_index_lock:
+        remove_mod_paths(index, internal_name)
+
+def find_path_conflicts(internal_name, paths):
+    index = get_mod_path_index()
+    conflicts = {}
+    with mod_path_index_lock:
+        for path in paths:
+            path = os.path.normpath(path)
+            prefix = path
+            while prefix:
+                for owner in index["owners"].get(prefix, []):
+                    if owner != internal_name:
+                        conflicts.setdefault(owner, []).append(path)
+                prefix = os.path.dirname(prefix)
+    return conflicts
+
+def describe_path_conflicts(mod_name, conflicts):
+    return f"'{mod_name}' replaces files also replaced by " + ", ".join(
+        f"{INTERNAL_TO_DISPLAY.get(owner, owner)} ({len(paths)} files)" for owner, paths in conflicts.items())
+
+def get_saved_mod_file(modpack, name):
+    modpack_path = os.path.join(modpacks_dir, modpack)
+    for file in os.listdir(modpack_path):
+        if os.path.splitext(file)[0] == name:
+            return os.path.join(modpack_path, file)
+    return None
+
+def save_mod_file(modpack, name, src_path):
+    saved_path = get_saved_mod_file(modpack, name)
+    if saved_path:
+        os.remove(saved_path)
+    dst_path = os.path.join(modpacks_dir, modpack, name + os.path.splitext(src_path)[1])
+    shutil.copy(src_path, dst_path)
+    return dst_path
+
+def index_modpack_tree(folder, reference_files):
+    files, _ = scan_tree(folder)
+
+    def index_file(item):
+        rel_path, stat = item
+        if rel_path not in reference_files or stat.st_size != reference_files[rel_path][0]:
+            return rel_path, [stat.st_size, stat.st_mtime_ns, None]
+        return rel_path, [stat.st_size, stat.st_mtime_ns, hash_file(os.path.join(folder, rel_path))]
+
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        return dict(pool.map(index_file, files))
+
+def upgrade_modpack(modpack, new_folder, new_manifest=None):
+    new_version = os.path.basename(new_folder)
+    roblox_copy_dir = os.path.join(modpacks_dir, modpack, "RobloxCopy")
+    old_version = get_modpack_version(modpack)
+    if not old_version or old_version == new_version:
+        return False
+
+    old_path = os.path.join(roblox_copy_dir, old_version)
+    if new_manifest is None:
+        new_manifest = get_version_manifest(new_folder)
+    new_files = new_manifest["files"]
+
+    mod_state = mod_state_store.get(modpack)
+    old_files = load_version_manifest(old_version)["files"]
+    indexed = not old_files
+    if indexed:
+        logging.info(f"No manifest for {old_version}, comparing {modpack} against its files")
+        old_files = index_modpack_tree(old_path, new_files)
+
+    changed = [
+        rel_path for rel_path, entry in new_files.items()
+        if rel_path not in MUTABLE_TREE_FILES
+        and (rel_path not in old_files or old_files[rel_path][2] != entry[2])]
+    removed = [
+        rel_path for rel_path in old_files
+        if rel_path not in new_files and rel_path not in MUTABLE_TREE_FILES]
+    if indexed:
+        owned_paths = [
+            path for internal_name, enabled in mod_state.items() if enabled
+            for path in get_mod_target_paths(internal_name)]
+        removed = [
+            rel_path for rel_path in removed
+            if not is_backup_path(rel_path) and rel_path.split(os.sep)[0] != "builtin_swap"
+            and not paths_intersect([rel_path], owned_paths)]
+    touched = sorted(changed + removed)
+
+    affected_mods = [
+        internal_name for internal_name, enabled in mod_state.items()
+        if enabled and paths_intersect(touched, get_mod_target_paths(internal_name))]
+    logging.info(
+        f"Upgrading {modpack} {old_version} -> {new_version}: {len(changed)} changed, "
+        f"{len(removed)} removed, re-applying {affected_mods}")
+
+    journal = {
+        "source": new_folder,
+        "old_version": old_version,
+        "new_version": new_version,
+        "changed": changed,
+        "removed": removed,
+        "affected_mods": affected_mods,
+        "phase": "disable"
+    }
+    write_json_atomic(os.path.join(modpacks_dir, modpack, "upgrading.json"), journal)
+    run_modpack_upgrade(modpack, journal, new_manifest)
+    return True
+
+def stage_upgraded_tree(old_path, stage_path, journal, new_manifest):
+    skipped = set(journal["changed"]) | set(journal["removed"])
+    files, empty_dirs = scan_tree(old_path)
+    for rel_dir in empty_dirs + new_manifest["dirs"]:
+        os.makedirs(os.path.join(stage_path, rel_dir), exist_ok=True)
+
+    created_dirs = set()
+    def prepare_path(rel_path):
+        dst_path = os.path.join(stage_path, rel_path)
+        dst_dir = os.path.dirname(dst_path)
+        if dst_dir not in created_dirs:
+            os.makedirs(dst_dir, exist_ok=True)
+            created_dirs.add(dst_dir)
+        return dst_path
+
+    for rel_path, stat in files:
+        if rel_path in skipped or rel_path.endswith(".tmp"):
+            continue
+        dst_path = prepare_path(rel_path)
+        if rel_path in MUTABLE_TREE_FILES:
+            if not os.path.exists(dst_path):
+                copy_file_atomic(os.path.join(old_path, rel_path), dst_path)
+        else:
+            link_blob(os.path.join(old_path, rel_path), dst_path)
+
+    for rel_path in journal["changed"]:
+        dst_path = prepare_path(rel_path)
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        place_blob(new_manifest["files"][rel_path][2], rel_path, dst_path)
+
+def run_modpack_upgrade(modpack, journal, new_manifest=None):
+    start = time.perf_counter()
+    modpack_path = os.path.join(modpacks_dir, modpack)
+    journal_path = os.path.join(modpack_path, "upgrading.json")
+    roblox_copy_dir = os.path.join(modpack_path, "RobloxCopy")
+    old_path = os.path.join(roblox_copy_dir, journal["old_version"])
+    new_path = os.path.join(roblox_copy_dir, journal["new_version"])
+    stage_path = os.path.join(modpack_path, "Staging", journal["new_version"])
+    retired_path = os.path.join(modpack_path, "Staging", journal["old_version"] + ".old")
+    external_mods = load_external_mods()
+
+    def advance(phase):
+        journal["phase"] = phase
+        write_json_atomic(journal_path, journal)
+
+    if journal["phase"] == "disable":
+        for internal_name in reversed(journal["affected_mods"]):
+            apply_mod_to_modpack(modpack, internal_name, False, external_mods)
+        advance("stage")
+
+    if journal["phase"] == "stage":
+        if new_manifest is None:
+            new_manifest = get_version_manifest(journal["source"])
+        stage_upgraded_tree(old_path, stage_path, journal, new_manifest)
+        prepare_modpack_tree(journal["source"], stage_path)
+        advance("swap")
+
+    if journal["phase"] == "swap":
+        if not os.path.exists(new_path):
+            if os.path.exists(old_path):
+                os.rename(old_path, retired_path)
+            os.rename(stage_path, new_path)
+        advance("enable")
+
+    if journal["phase"] == "enable":
+        for internal_name in journal["affected_mods"]:
+            apply_mod_to_modpack(modpack, internal_name, True, external_mods)
+        os.remove(journal_path)
+
+    shutil.rmtree(os.path.join(modpack_path, "Staging"), ignore_errors=True)
+    logging.info(
+        f"Upgraded {modpack} to {journal['new_version']} in {time.perf_counter() - start:.2f}s")
+
+upgrade_threads = {}
+upgrade_threads_lock = threading.Lock()
+
+def resume_modpack_upgrade(modpack):
+    journal_path = os.path.join(modpacks_dir, modpack, "upgrading.json")
+    try:
+        with open(journal_path, "r") as f:
+            journal = json.load(f)
+        if journal["phase"] == "stage" and not os.path.exists(journal["source"]):
+            logging.error(f"Cannot resume upgrade of {modpack}: {journal['source']} no longer exists")
+            return
+        logging.info(f"Resuming upgrade of modpack {modpack} at phase {journal['phase']}")
+        run_modpack_upgrade(modpack, journal)
+    except Exception as e:
+        logging.error(f"Failed to resume upgrade of {modpack}: {str(e)}")
+    finally:
+        with upgrade_threads_lock:
+            upgrade_threads.pop(modpack, None)
+
+def resume_modpack_builds():
+    if os.path.exists(staging_dir):
+        for leftover in os.listdir(staging_dir):
+            logging.info(f"Discarding unfinished modpack staging folder {leftover}")
+            shutil.rmtree(os.path.join(staging_dir, leftover), ignore_errors=True)
+
+    resume_materializations()
+    if not os.path.exists(modpacks_dir):
+        return
+
+    for modpack in os.listdir(modpacks_dir):
+        if not os.path.exists(os.path.join(modpacks_dir, modpack, "upgrading.json")):
+            continue
+        thread = threading.Thread(target=resume_modpack_upgrade, args=(modpack,), daemon=True)
+        with upgrade_threads_lock:
+            upgrade_threads[modpack] = thread
+        thread.start()
+
+def wait_for_modpack_upgrade(modpack):
+    with upgrade_threads_lock:
+        thread = upgrade_threads.get(modpack)
+    if thread:
+        thread.join()
+
+def is_backup_path(rel_path):
+    return any(
+        part == "backup" or part.startswith("backup_") or part.endswith("_backup")
+        for part in rel_path.split(os.sep)[:-1])
+
+def duplicate_modpack(source, name):
+    wait_for_modpack_upgrade(source)
+    materializer = get_materializer(source)
+    if materializer:
+        materializer.finished.wait()
+
+    mod_state_store.flush(source)
+    start = time.perf_counter()
+    source_folder = os.path.join(modpacks_dir, source)
+    stage_folder = os.path.join(staging_dir, name)
+    if os.path.exists(stage_folder):
+        shutil.rmtree(stage_folder)
+
+    files, empty_dirs = scan_tree(source_folder)
+    for rel_dir in empty_dirs:
+        os.makedirs(os.path.join(stage_folder, rel_dir), exist_ok=True)
+
+    copy_pairs = []
+    created_dirs = set()
+    for rel_path, stat in files:
+        parts = rel_path.split(os.sep)
+        if parts[0] == "Staging" or rel_path == "upgrading.json" or rel_path.endswith(".tmp"):
+            continue
+        src_path = os.path.join(source_folder, rel_path)
+        dst_path = os.path.join(stage_folder, rel_path)
+        tree_path = os.sep.join(parts[2:]) if parts[0] == "RobloxCopy" else None
+        if tree_path is None or tree_path in MUTABLE_TREE_FILES or is_backup_path(tree_path):
+            copy_pairs.append((src_path, dst_path))
+            continue
+        dst_dir = os.path.dirname(dst_path)
+        if dst_dir not in created_dirs:
+            os.makedirs(dst_dir, exist_ok=True)
+            created_dirs.add(dst_dir)
+        link_blob(src_path, dst_path)
+
+    stats = copy_files_parallel(copy_pairs, label=f"Duplicate {source}")
+    if stats["errors"]:
+        shutil.rmtree(stage_folder, ignore_errors=True)
+        raise OSError(f"Failed to copy {len(stats['errors'])} files from {source}")
+
+    os.rename(stage_folder, os.path.join(modpacks_dir, name))
+    backup_store.copy_owner(source, name)
+    mod_state_store.load(name)
+    logging.info(
+        f"Duplicated {source} as {name}: {len(files)} files in {time.perf_counter() - start:.2f}s")
+
+    marker_path = os.path.join(modpacks_dir, name, "materializing.json")
+    if os.path.exists(marker_path):
+        with open(marker_path, "r") as f:
+            start_materialization(name, json.load(f)["source"])
+
+def build_modpack_from_template(name, source_folder, mod_state, image_path=None):
+    start = time.perf_counter()
+    mod_state = dict(mod_state)
+    disabled = []
+    for internal_name in SAVED_MOD_FILES:
+        if mod_state.get(internal_name):
+            logging.info(f"Template for {name} enables {internal_name}, which needs a file; leaving it off")
+            mod_state[internal_name] = False
+            disabled.append(internal_name)
+
+    # Vanilla files are hard links to blobs, so materializing them before the mods replace their
+    # targets costs a link per file, and each mod waits only for its own target paths.
+    materializer = create_modpack_folder(name, source_folder, mod_state, image_path)
+    begin_client_settings_batch()
+    try:
+        reapply_enabled_mods(name)
+    finally:
+        flush_client_settings_batch()
+
+    logging.info(
+        f"Built {name} from template with {sum(1 for enabled in mod_state.values() if enabled)} mods "
+        f"in {time.perf_counter() - start:.2f}s")
+    return materializer, disabled
+
+def upgrade_all_modpacks(progress_callback=None):
+    folder = get_roblox_folder()
+    if not folder:
+        return None
+
+    manifest = get_version_manifest(folder)
+    modpacks = []
+    if os.path.exists(modpacks_dir):
+        modpacks = [
+            modpack for modpack in sorted(os.listdir(modpacks_dir))
+            if os.path.isdir(os.path.join(modpacks_dir, modpack, "RobloxCopy"))]
+    workers = max(1, int(load_app_settings()["io_concurrency"]))
+    results = {}
+    lock = threading.Lock()
+
+    def upgrade(modpack):
+        try:
+            wait_for_modpack_upgrade(modpack)
+            materializer = get_materializer(modpack)
+            if materializer:
+                materializer.finished.wait()
+            if upgrade_modpack(modpack, folder, manifest):
+                result = "upgraded"
+            else:
+                verify_modpack_tree(modpack, repair=True)
+                result = "current"
+        except Exception as e:
+            logging.error(f"Error upgrading modpack {modpack}: {str(e)}")
+            result = f"failed: {e}"
+        with lock:
+            results[modpack] = result
+            if progress_callback:
+                progress_callback(len(results), len(modpacks), modpack)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(upgrade, modpacks))
+
+    if any(result == "upgraded" for result in results.values()):
+        collect_blob_garbage()
+    logging.info(
+        f"Upgraded {len(modpacks)} modpacks to {os.path.basename(folder)} with {workers} workers "
+        f"in {time.perf_counter() - start:.2f}s")
+    return results
+
+def create_modpack_folder(name, source_folder, mod_state, image_path=None):
+    stage_folder = os.path.join(staging_dir, name)
+    if os.path.exists(stage_folder):
+        shutil.rmtree(stage_folder)
+
+    prepare_modpack_tree(
+        source_folder, os.path.join(stage_folder, "RobloxCopy", os.path.basename(source_folder)))
+    write_json_atomic(os.path.join(stage_folder, "mod_state.json"), mod_state)
+    if image_path and os.path.exists(image_path):
+        shutil.copy(image_path, os.path.join(stage_folder, "image.png"))
+    write_json_atomic(os.path.join(stage_folder, "materializing.json"), {"source": source_folder})
+
+    os.makedirs(modpacks_dir, exist_ok=True)
+    os.rename(stage_folder, os.path.join(modpacks_dir, name))
+    mod_state_store.load(name)
+    return start_materialization(name, source_folder)
+
+def generate_unique_internal_name(display_name):
+    base_name = display_name.lower().replace(' ', '_')
+    unique_id = str(uuid.uuid4())[:8]
+    return f"external_{base_name}_{unique_id}"
+
+
+def save_external_mods(mod_data):
+    try:
+        with open(external_mods_file, "w") as f:
+            json.dump(mod_data, f, indent=4)
+        catalog = get_catalog()
+        if catalog:
+            catalog.sync_external_mods(mod_data)
+        return True
+    except Exception as e:
+        logging.error(f"Error saving external mods: {str(e)}")
+        return False
+
+
+class ModCatalog:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS modpacks (
+                name TEXT PRIMARY KEY,
+                signature TEXT
+            );
+            CREATE TABLE IF NOT EXISTS mods (
+                internal_name TEXT PRIMARY KEY,
+                display_name TEXT NOT NULL,
+                type TEXT NOT NULL,
+                source TEXT NOT NULL,
+                config_path TEXT
+            );
+            CREATE TABLE IF NOT EXISTS modpack_mods (
+                modpack TEXT NOT NULL,
+                internal_name TEXT NOT NULL,
+                enabled INTEGER NOT NULL,
+                PRIMARY KEY (modpack, internal_name)
+            );
+            CREATE TABLE IF NOT EXISTS mod_flags (
+                internal_name TEXT NOT NULL,
+                flag TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (internal_name, flag)
+            );
+            CREATE TABLE IF NOT EXISTS mod_files (
+                internal_name TEXT NOT NULL,
+                destination TEXT NOT NULL,
+                PRIMARY KEY (internal_name, destination)
+            );
+            CREATE INDEX IF NOT EXISTS idx_modpack_mods_mod ON modpack_mods(internal_name, enabled);
+            CREATE INDEX IF NOT EXISTS idx_mods_type ON mods(type, display_name);
+            CREATE INDEX IF NOT EXISTS idx_mods_name ON mods(display_name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_mod_flags_flag ON mod_flags(flag);
+            CREATE INDEX IF NOT EXISTS idx_mod_files_destination ON mod_files(destination);
+        """)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(modpacks)")]
+        if "signature" not in columns:
+            self.connection.execute("ALTER TABLE modpacks ADD COLUMN signature TEXT")
+
+    def execute(self, query, params=()):
+        with self.lock:
+            return self.connection.execute(query, params).fetchall()
+
+    def get_meta(self, key):
+        rows = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchall()
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key, value):
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def import_json(self):
+        start = time.perf_counter()
+        builtin_signature = json.dumps([get_file_stamp(builtin_mods_file), get_file_stamp(builtin_manifest_file)])
+        external_mods = load_external_mods()
+        external_signature = json.dumps([get_file_stamp(external_mods_file)] + [
+            get_file_stamp(mod_info["config_path"]) for _, mod_info in sorted(external_mods.items())])
+
+        modpacks = set()
+        if os.path.exists(modpacks_dir):
+            modpacks = {
+                modpack for modpack in os.listdir(modpacks_dir)
+                if os.path.isdir(os.path.join(modpacks_dir, modpack))}
+        with self.lock:
+            known = dict(self.connection.execute("SELECT name, signature FROM modpacks").fetchall())
+        stale = {}
+        for modpack in modpacks:
+            signature = mod_state_store.signature(modpack)
+            if signature is not None and known.get(modpack) != json.dumps(signature):
+                stale[modpack] = (mod_state_store.get(modpack), signature)
+        removed = [(modpack,) for modpack in known if modpack not in modpacks]
+
+        with self.lock, self.connection:
+            if self.get_meta("builtin_signature") != builtin_signature:
+                self.insert_builtin_mods()
+                self.set_meta("builtin_signature", builtin_signature)
+            if self.get_meta("external_signature") != external_signature:
+                self.replace_external_mods(external_mods)
+                self.set_meta("external_signature", external_signature)
+            self.connection.executemany("DELETE FROM modpack_mods WHERE modpack = ?", removed)
+            self.connection.executemany("DELETE FROM modpacks WHERE name = ?", removed)
+            for modpack, (mod_state, signature) in stale.items():
+                self.insert_modpack(modpack, mod_state, signature)
+
+        logging.info(
+            f"Synced catalog in {time.perf_counter() - start:.3f}s: {len(stale)} modpacks re-read, "
+            f"{len(removed)} removed")
+
+    def insert_builtin_mods(self):
+        builtin_names = [(internal_name,) for internal_name in BUILTIN_MODS]
+        self.connection.executemany("DELETE FROM mod_flags WHERE internal_name = ?", builtin_names)
+        self.connection.executemany("DELETE FROM mod_files WHERE internal_name = ?", builtin_names)
+        self.connection.execute(
+            "DELETE FROM mods WHERE source = 'builtin' AND internal_name NOT IN (%s)"
+            % ",".join("?" * len(builtin_names)), [name for (name,) in builtin_names])
+        for internal_name, mod in BUILTIN_MODS.items():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO mods VALUES (?, ?, ?, 'builtin', NULL)",
+                (internal_name, mod["name"], mod["type"]))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO mod_flags VALUES (?, ?, ?)",
+                [(internal_name, flag, str(value)) for flag, value in MOD_FLAG_LAYERS.get(internal_name, {}).items()])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO mod_files VALUES (?, ?)",
+                [(internal_name, path) for path in get_mod_target_paths(internal_name)])
+
+    def insert_external_mods(self, external_mods):
+        for internal_name, mod_info in external_mods.items():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO mods VALUES (?, ?, ?, 'external', ?)",
+                (internal_name, mod_info["name"], mod_info["type"], mod_info["config_path"]))
+            self.connection.execute("DELETE FROM mod_flags WHERE internal_name = ?", (internal_name,))
+            self.connection.execute("DELETE FROM mod_files WHERE internal_name = ?", (internal_name,))
+            try:
+                with open(mod_info["config_path"], "r") as f:
+                    mod_config = json.load(f)
+            except Exception as e:
+                logging.warning(f"Could not read config for {internal_name}: {e}")
+                continue
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO mod_flags VALUES (?, ?, ?)",
+                [(internal_name, flag, str(value)) for flag, value in mod_config.get("fast_flags", {}).items()])
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO mod_files VALUES (?, ?)",
+                [(internal_name, path) for path in get_mod_target_paths(internal_name, mod_config)])
+
+    def replace_external_mods(self, external_mods):
+        removed = [
+            (internal_name,) for (internal_name,) in self.connection.execute(
+                "SELECT internal_name FROM mods WHERE source = 'external'").fetchall()
+            if internal_name not in external_mods]
+        self.connection.executemany("DELETE FROM mods WHERE internal_name = ?", removed)
+        self.connection.executemany("DELETE FROM mod_flags WHERE internal_name = ?", removed)
+        self.connection.executemany("DELETE FROM mod_files WHERE internal_name = ?", removed)
+        self.connection.executemany("DELETE FROM modpack_mods WHERE internal_name = ?", removed)
+        self.insert_external_mods(external_mods)
+
+    def insert_modpack(self, modpack, mod_state, signature):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO modpacks VALUES (?, ?)", (modpack, json.dumps(list(signature))))
+        self.connection.execute("DELETE FROM modpack_mods WHERE modpack = ?", (modpack,))
+        self.connection.executemany(
+            "INSERT INTO modpack_mods VALUES (?, ?, ?)",
+            [(modpack, internal_name, int(bool(enabled))) for internal_name, enabled in mod_state.items()])
+
+    def sync_modpack(self, modpack, mod_state, signature):
+        with self.lock, self.connection:
+            self.insert_modpack(modpack, mod_state, signature)
+
+    def remove_modpack(self, modpack):
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM modpack_mods WHERE modpack = ?", (modpack,))
+            self.connection.execute("DELETE FROM modpacks WHERE name = ?", (modpack,))
+
+    def sync_external_mods(self, external_mods):
+        external_signature = json.dumps([get_file_stamp(external_mods_file)] + [
+            get_file_stamp(mod_info["config_path"]) for _, mod_info in sorted(external_mods.items())])
+        with self.lock, self.connection:
+            self.replace_external_mods(external_mods)
+            self.set_meta("external_signature", external_signature)
+
+    def list_mods(self, mod_type=None, search=None):
+        query = "SELECT internal_name FROM mods WHERE 1 = 1"
+        params = []
+        if mod_type:
+            query += " AND type = ?"
+            params.append(mod_type)
+        if search:
+            query += " AND display_name LIKE ? ESCAPE '\\'"
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        return [name for (name,) in self.execute(query + " ORDER BY display_name", params)]
+
+    def modpacks_using(self, internal_name):
+        return [name for (name,) in self.execute(
+            "SELECT modpack FROM modpack_mods WHERE internal_name = ? AND enabled = 1 ORDER BY modpack",
+            (internal_name,))]
+
+    def flag_owners(self, flag):
+        return self.execute("SELECT internal_name, value FROM mod_flags WHERE flag = ?", (flag,))
+
+    def destination_owners(self, destination):
+        return [name for (name,) in self.execute(
+            "SELECT internal_name FROM mod_files WHERE destination = ?", (os.path.normpath(destination),))]
+
+
+catalog_file = os.path.join(script_dir, "catalog.db")
+mod_catalog = None
+mod_catalog_checked = False
+mod_catalog_lock = threading.Lock()
+
+def get_catalog():
+    global mod_catalog, mod_catalog_checked
+    if mod_catalog_checked:
+        return mod_catalog
+    with mod_catalog_lock:
+        if mod_catalog_checked:
+            return mod_catalog
+        if sqlite3 is not None and load_app_settings()["use_catalog"]:
+            try:
+                catalog = ModCatalog(catalog_file)
+                catalog.import_json()
+                mod_catalog = catalog
+            except Exception as e:
+                logging.error(f"Could not open mod catalog {catalog_file}: {str(e)}")
+        mod_catalog_checked = True
+        return mod_catalog
+
+
+def get_mod_state_matrix():
+    global mod_state_matrix
+    with mod_state_matrix_lock:
+        if mod_state_matrix is not None:
+            return mod_state_matrix
+
+    start = time.perf_counter()
+    with mod_state_store.lock:
+        if mod_state_matrix is not None:
+            return mod_state_matrix
+        matrix = ModStateMatrix()
+        matrix.load()
+        modpacks = set()
+        if os.path.exists(modpacks_dir):
+            modpacks = {
+                modpack for modpack in os.listdir(modpacks_dir)
+                if os.path.isdir(os.path.join(modpacks_dir, modpack))}
+
+        refreshed = 0
+        for modpack in list(matrix.modpack_index):
+            if modpack not in modpacks:
+                matrix.remove_row(modpack)
+        for modpack in modpacks:
+            pending = modpack in mod_state_store.dirty
+            signature = mod_state_store.signature(modpack)
+            if signature is None and not pending:
+                matrix.remove_row(modpack)
+                continue
+            if pending or matrix.stamps.get(modpack) != signature:
+                matrix.set_row(modpack, mod_state_store.get(modpack), None if pending else signature)
+                refreshed += 1
+
+        with mod_state_matrix_lock:
+            mod_state_matrix = matrix
+
+    matrix.save()
+    logging.info(
+        f"Loaded mod state matrix: {len(matrix.modpack_index)} modpacks x {len(matrix.mods)} mods, "
+        f"{refreshed} rows re-read in {time.perf_counter() - start:.3f}s")
+    return matrix
+
+def find_modpacks_using(internal_name):
+    catalog = get_catalog()
+    if catalog:
+        mod_state_store.flush()
+        return catalog.modpacks_using(internal_name)
+    return get_mod_state_matrix().modpacks_enabling(internal_name)
+
+
+def create_external_mod():
+    dialog = QDialog()
+    dialog.setWindowTitle("Create External Mod")
+    dialog.setMinimumSize(500, 600)
+
+    layout = QVBoxLayout()
+
+    name_label = QLabel("Mod Name:")
+    name_input = QLineEdit()
+    layout.addWidget(name_label)
+    layout.addWidget(name_input)
+
+    type_label = QLabel("Mod Type:")
+    type_combo = QComboBox()
+    type_combo.addItems(["mod", "texturepack"])
+    layout.addWidget(type_label)
+    layout.addWidget(type_combo)
+
+    icon_label = QLabel("Mod Icon:")
+    icon_preview = QLabel()
+    icon_preview.setFixedSize(100, 100)
+    icon_preview.setStyleSheet("background-color: #333; border: 1px solid #444;")
+
+    def select_icon():
+        icon_path, _ = QFileDialog.getOpenFileName(
+            dialog,
+            "Select Mod Icon",
+            "",
+            "Image Files (*.png *.jpg *.jpeg)"
+        )
+        if icon_path:
+            try:
+                img = Image.open(icon_path)
+                img = img.resize((100, 100))
+                img.save("temp_icon.png")
+                pixmap = QPixmap("temp_icon.png")
+                os.remove("temp_icon.png")
+                icon_preview.setPixmap(pixmap)
+                return icon_path
+            except Exception as e:
+                QMessageBox.warning(dialog, "Error", f"Could not load image: {str(e)}")
+        return None
+
+    icon_button = QPushButton("Select Icon")
+    icon_button.clicked.connect(select_icon)
+
+    icon_layout = QHBoxLayout()
+    icon_layout.addWidget(icon_preview)
+    icon_layout.addWidget(icon_button)
+    layout.addLayout(icon_layout)
+
+    files_label = QLabel("File Replacements:")
+    files_table = QTableWidget()
+    files_table.setColumnCount(2)
+    files_table.setHorizontalHeaderLabels(["Source Path", "Destination Path"])
+    files_table.horizontalHeader().setStretchLastSection(True)
+
+    def add_file_replacement():
+        row = files_table.rowCount()
+        files_table.insertRow(row)
+
+        source_button = QPushButton("Browse")
+        dest_button = QPushButton("Browse")
 
         def browse_source():
             path, _ = QFileDialog.getOpenFileName(dialog, "Select Source File")
@@ -459,15 +3163,22 @@ def create_external_mod():
             if conflicts:
                 CONFLICTING_MODS[mod_name] = conflicts
 
-            def mod_apply_function(enabled):
-                apply_external_mod(selected_modpack, internal_name, mod_config, enabled)
+            def mod_apply_function(enabled, modpack=None):
+                apply_external_mod(modpack or selected_modpack, internal_name, mod_config, enabled)
 
             mod_apply_functions[internal_name] = mod_apply_function
 
             if mod_type == "texturepack":
                 texture_packs.append(mod_name)
 
-            QMessageBox.information(dialog, "Success", f"Mod '{mod_name}' created successfully!")
+            target_paths = get_mod_target_paths(internal_name, mod_config)
+            path_conflicts = find_path_conflicts(internal_name, target_paths)
+            register_mod_paths(internal_name, target_paths)
+            message = f"Mod '{mod_name}' created successfully!"
+            if path_conflicts:
+                message += "\n\n" + describe_path_conflicts(mod_name, path_conflicts) + \
+                    ". The mod enabled last wins for those files."
+            QMessageBox.information(dialog, "Success", message)
             return True
         else:
             QMessageBox.warning(dialog, "Error", "Failed to save mod configuration!")
@@ -486,7 +3197,7 @@ def update_all_external_mods():
     progress.setWindowModality(Qt.WindowModality.WindowModal)
     progress.setMinimumDuration(0)
 
-    updated_count = 0
+    updated = []
 
     for i, (internal_name, mod_info) in enumerate(external_mods.items()):
         progress.setValue(i)
@@ -504,18 +3215,19 @@ def update_all_external_mods():
             with open(config_path, "r") as f:
                 mod_config = json.load(f)
 
-            def mod_apply_function(enabled, name=internal_name, config=mod_config):
-                apply_external_mod(selected_modpack, name, config, enabled)
+            def mod_apply_function(enabled, modpack=None, name=internal_name, config=mod_config):
+                return apply_external_mod(modpack or selected_modpack, name, config, enabled)
 
             mod_apply_functions[internal_name] = mod_apply_function
-            updated_count += 1
+            register_mod_paths(internal_name, get_mod_target_paths(internal_name, mod_config))
+            updated.append(internal_name)
 
         except Exception as e:
             logging.error(f"Failed to update mod {mod_info['name']}: {str(e)}")
 
     progress.setValue(len(external_mods))
-    QMessageBox.information(None, "Complete",
-                            f"Successfully updated {updated_count}/{len(external_mods)} external mods.")
+    start_external_mod_refresh(
+        updated, f"Successfully updated {len(updated)}/{len(external_mods)} external mods.")
 
 
 def update_single_external_mod(internal_name):
@@ -535,24 +3247,53 @@ def update_single_external_mod(internal_name):
         with open(config_path, "r") as f:
             mod_config = json.load(f)
 
-        def mod_apply_function(enabled, name=internal_name, config=mod_config):
-            apply_external_mod(selected_modpack, name, config, enabled)
+        def mod_apply_function(enabled, modpack=None, name=internal_name, config=mod_config):
+            return apply_external_mod(modpack or selected_modpack, name, config, enabled)
 
         mod_apply_functions[internal_name] = mod_apply_function
-
-        if selected_modpack:
-            mod_state_path = os.path.join(modpacks_dir, selected_modpack, "mod_state.json")
-            if os.path.exists(mod_state_path):
-                with open(mod_state_path, "r") as f:
-                    mod_state = json.load(f)
-                if mod_state.get(internal_name, False):
-                    apply_external_mod(selected_modpack, internal_name, mod_config, True)
-
-        QMessageBox.information(None, "Success",
-                                f"Mod '{mod_info['name']}' updated successfully!")
+        register_mod_paths(internal_name, get_mod_target_paths(internal_name, mod_config))
     except Exception as e:
         QMessageBox.critical(None, "Error",
                              f"Failed to update mod {mod_info['name']}:\n{str(e)}")
+        return
+
+    start_external_mod_refresh([internal_name], f"Mod '{mod_info['name']}' updated successfully!")
+
+external_mod_refresh_thread = None
+
+def start_external_mod_refresh(internal_names, message):
+    global external_mod_refresh_thread
+    if external_mod_refresh_thread and external_mod_refresh_thread.isRunning():
+        QMessageBox.warning(None, "Busy", "External mods are already being refreshed.")
+        return
+
+    loading_dialog = LoadingDialog(None, "Finding modpacks that use the updated mods...")
+    loading_dialog.show()
+
+    thread = RefreshExternalModsThread(internal_names)
+    thread.progress.connect(
+        lambda done, total, modpack: (
+            loading_dialog.set_progress(done, total),
+            loading_dialog.update_message(f"Refreshed {done}/{total} modpacks ({modpack})")))
+    thread.finished.connect(lambda: on_external_mod_refresh_finished(loading_dialog, thread, message))
+    external_mod_refresh_thread = thread
+    thread.start()
+
+def on_external_mod_refresh_finished(loading_dialog, thread, message):
+    loading_dialog.close()
+    if thread.error:
+        QMessageBox.critical(None, "Error", f"{message}\n\nFailed to refresh modpacks using it: {thread.error}")
+        return
+    results = thread.results or {}
+    failed = [
+        f"{modpack}: {result}" for modpack, result in results.items()
+        if isinstance(result, str)]
+    message += f"\n\nRefreshed {len(results) - len(failed)} of {len(results)} modpacks using it."
+    if failed:
+        message += "\n\nFailed:\n" + "\n".join(failed)
+        QMessageBox.warning(None, "Refresh", message)
+    else:
+        QMessageBox.information(None, "Success", message)
 
 
 def show_external_mod_manager():
@@ -595,14 +3336,13 @@ def show_external_mod_manager():
 
         status_item = QTableWidgetItem()
         if selected_modpack:
-            mod_state_path = os.path.join(modpacks_dir, selected_modpack, "mod_state.json")
-            if os.path.exists(mod_state_path):
-                with open(mod_state_path, "r") as f:
-                    mod_state = json.load(f)
-                status = "Enabled" if mod_state.get(internal_name, False) else "Disabled"
+            if mod_state_store.exists(selected_modpack):
+                status = "Enabled" if mod_state_store.is_enabled(selected_modpack, internal_name) else "Disabled"
                 status_item.setText(status)
         else:
             status_item.setText("N/A")
+        used_by = find_modpacks_using(internal_name)
+        status_item.setToolTip(f"Enabled in: {', '.join(used_by)}" if used_by else "Not enabled in any modpack")
         mods_table.setItem(row, 2, status_item)
 
         action_widget = QWidget()
@@ -672,16 +3412,11 @@ def toggle_external_mod(internal_name):
         QMessageBox.warning(None, "Warning", "Please select a modpack first.")
         return
 
-    mod_state_path = os.path.join(modpacks_dir, selected_modpack, "mod_state.json")
-    if not os.path.exists(mod_state_path):
+    if not mod_state_store.exists(selected_modpack):
         QMessageBox.warning(None, "Warning", "No mod state file found for this modpack.")
         return
 
-    with open(mod_state_path, "r") as f:
-        mod_state = json.load(f)
-
-    current_state = mod_state.get(internal_name, False)
-    new_state = not current_state
+    new_state = not mod_state_store.is_enabled(selected_modpack, internal_name)
 
     external_mods = load_external_mods()
     mod_info = external_mods.get(internal_name)
@@ -694,10 +3429,6 @@ def toggle_external_mod(internal_name):
 
     apply_external_mod(selected_modpack, internal_name, mod_config, new_state)
 
-    mod_state[internal_name] = new_state
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f, indent=4)
-
     QMessageBox.information(None, "Success",
                             f"Mod '{mod_info['name']}' is now {'enabled' if new_state else 'disabled'}.")
 
@@ -825,6 +3556,7 @@ def remove_selected_mods(table):
             if mod_name in CONFLICTING_MODS:
                 del CONFLICTING_MODS[mod_name]
 
+            unregister_mod_paths(internal_name)
             mod_dir = os.path.join(external_mods_dir, internal_name)
             if os.path.exists(mod_dir):
                 shutil.rmtree(mod_dir)
@@ -833,7 +3565,301 @@ def remove_selected_mods(table):
         QMessageBox.information(None, "Success", "Selected mods removed successfully!")
         show_external_mod_manager()
 
+replace_journal_locks = {}
+replace_journal_locks_lock = threading.Lock()
+
+def get_replace_journal_lock(modpack):
+    with replace_journal_locks_lock:
+        return replace_journal_locks.setdefault(modpack, threading.Lock())
+
+def get_replace_journal_path(modpack):
+    return os.path.join(modpacks_dir, modpack, "replace_journal.json")
+
+def load_replace_journal(modpack):
+    try:
+        with open(get_replace_journal_path(modpack), "r") as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        journal = {"mods": {}}
+    stacks = journal.setdefault("stacks", {})
+    for internal_name, entries in journal["mods"].items():
+        for dst_rel_path in entries:
+            stack = stacks.setdefault(dst_rel_path, [])
+            if internal_name not in stack:
+                stack.append(internal_name)
+    return journal
+
+def get_file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def restore_journaled_file(internal_name, version_path, dst_rel_path, entry):
+    dst_path = os.path.join(version_path, "content", dst_rel_path)
+    backup_file = os.path.join(version_path, "backup_external", internal_name, dst_rel_path)
+    original = entry["original"]
+    dst_stamp = get_file_stamp(dst_path)
+
+    if original is None:
+        if dst_stamp is not None:
+            os.remove(dst_path)
+    elif dst_stamp is None or dst_stamp == entry["stamp"] or hash_file(dst_path) != original:
+        if backup_store.has(original):
+            restored = backup_store.restore(original, dst_path)
+        elif os.path.exists(backup_file) and hash_file(backup_file) == original:
+            link_or_copy(backup_file, dst_path)
+            restored = True
+        elif os.path.exists(get_blob_path(original)):
+            if dst_stamp is not None:
+                os.remove(dst_path)
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            link_blob(get_blob_path(original), dst_path)
+            restored = True
+        else:
+            restored = False
+        if not restored:
+            logging.error(f"No copy of the original {dst_rel_path} ({original}) is left to restore")
+            return False
+
+    if os.path.exists(backup_file):
+        os.remove(backup_file)
+    return True
+
+def pop_journal_stack(journal, internal_name, dst_rel_path):
+    stack = journal["stacks"].get(dst_rel_path, [])
+    was_top = not stack or stack[-1] == internal_name
+    if internal_name in stack:
+        stack.remove(internal_name)
+    if not stack:
+        journal["stacks"].pop(dst_rel_path, None)
+        return "restore", None
+    if not was_top:
+        return "keep", None
+
+    top = stack[-1]
+    top_entry = journal["mods"].get(top, {}).get(dst_rel_path)
+    if not top_entry or not top_entry.get("file") or not os.path.exists(top_entry["file"]):
+        logging.warning(f"{top} no longer provides {dst_rel_path}, restoring the original")
+        return "restore", None
+    return "uncover", top_entry
+
+def find_builtin_holders(modpack, internal_name, version_path, entries, dst_rel_paths):
+    mod_state = mod_state_store.get(modpack)
+    held = {}
+    for dst_rel_path in dst_rel_paths:
+        dst_path = os.path.join(version_path, "content", dst_rel_path)
+        if get_file_stamp(dst_path) == entries[dst_rel_path]["stamp"]:
+            continue
+        conflicts = find_path_conflicts(internal_name, [os.path.join("content", dst_rel_path)])
+        owners = [owner for owner in conflicts if owner in BUILTIN_MODS and mod_state.get(owner)]
+        if owners:
+            held[dst_rel_path] = owners[0]
+    return held
+
+def drop_journaled_files(modpack, journal, internal_name, version_path, dst_rel_paths):
+    entries = journal["mods"][internal_name]
+    actions = [
+        (dst_rel_path, *pop_journal_stack(journal, internal_name, dst_rel_path))
+        for dst_rel_path in dst_rel_paths]
+    held = find_builtin_holders(
+        modpack, internal_name, version_path, entries,
+        [dst_rel_path for dst_rel_path, action, _ in actions if action != "keep"])
+    make_parent_dirs(
+        os.path.join(version_path, "content", dst_rel_path)
+        for dst_rel_path, action, _ in actions if action == "uncover")
+
+    def drop_file(item):
+        dst_rel_path, action, top_entry = item
+        if action == "keep":
+            return True
+        if dst_rel_path in held:
+            logging.info(f"Leaving {dst_rel_path} to {held[dst_rel_path]}, which replaced it after {internal_name}")
+            return True
+        if action == "restore":
+            return restore_journaled_file(internal_name, version_path, dst_rel_path, entries[dst_rel_path])
+
+        src_path = top_entry["file"]
+        dst_path = os.path.join(version_path, "content", dst_rel_path)
+        copy_file_fast(src_path, dst_path)
+        src_stamp = get_file_stamp(src_path)
+        if top_entry.get("source") != src_stamp:
+            top_entry.update(mod=hash_file_cached(src_path), source=src_stamp)
+        top_entry["stamp"] = get_file_stamp(dst_path)
+        logging.info(f"Uncovered {dst_rel_path} after removing {internal_name}")
+        return True
+
+    results = map_files_parallel(drop_file, actions)
+    return [dst_rel_path for (dst_rel_path, _, _), dropped in zip(actions, results) if dropped]
+
+def replace_external_mod_files(modpack, version, internal_name, mod_dir, replace_files):
+    version_path = os.path.join(modpacks_dir, modpack, "RobloxCopy", version)
+    backup_dir = os.path.join(version_path, "backup_external", internal_name)
+    planned = {}
+    for file_entry in replace_files:
+        src_rel_path = file_entry.get("source")
+        dst_rel_path = file_entry.get("destination")
+        if not src_rel_path or not dst_rel_path:
+            logging.warning(f"Invalid file entry in {internal_name}: {file_entry}")
+            continue
+        src_path = os.path.join(mod_dir, src_rel_path)
+        if os.path.exists(src_path):
+            planned[os.path.normpath(dst_rel_path)] = src_path
+
+    unchanged = 0
+    covered = 0
+    with get_replace_journal_lock(modpack):
+        journal = load_replace_journal(modpack)
+        entries = journal["mods"].setdefault(internal_name, {})
+        stacks = journal["stacks"]
+        vanilla_files = None
+
+        stale = [rel_path for rel_path in entries if rel_path not in planned]
+        dropped = drop_journaled_files(modpack, journal, internal_name, version_path, stale)
+        for dst_rel_path in dropped:
+            del entries[dst_rel_path]
+        backup_store.release(
+            modpack, internal_name, [os.path.join("content", dst_rel_path) for dst_rel_path in dropped])
+        failed = len(dropped) < len(stale)
+
+        backups = []
+        checks = []
+        for dst_rel_path, src_path in planned.items():
+            entry = entries.get(dst_rel_path)
+            stack = stacks.setdefault(dst_rel_path, [])
+            if entry is None and stack:
+                base_entry = journal["mods"].get(stack[0], {}).get(dst_rel_path)
+                if base_entry is not None:
+                    original = base_entry["original"]
+                    if original and backup_store.has(original):
+                        backups.append((os.path.join("content", dst_rel_path), None, original))
+                    entry = entries[dst_rel_path] = {"original": original, "source": None, "stamp": None}
+            if internal_name not in stack:
+                stack.append(internal_name)
+            checks.append((dst_rel_path, src_path, entry, stack[-1] == internal_name))
+
+        def check_file(item):
+            dst_rel_path, src_path, entry, on_top = item
+            src_stamp = get_file_stamp(src_path)
+            if not on_top:
+                src_hash = hash_file_cached(src_path) if entry["source"] != src_stamp else None
+                return src_stamp, None, src_hash, None
+            dst_path = os.path.join(version_path, "content", dst_rel_path)
+            dst_stamp = get_file_stamp(dst_path)
+            if entry and dst_stamp and entry["source"] == src_stamp and entry["stamp"] == dst_stamp:
+                return src_stamp, dst_stamp, None, None
+            return src_stamp, dst_stamp, hash_file_cached(src_path), hash_file(dst_path) if dst_stamp else None
+
+        results = map_files_parallel(check_file, checks)
+
+        legacy_backups = []
+        copies = []
+        for (dst_rel_path, src_path, entry, on_top), (src_stamp, dst_stamp, src_hash, dst_hash) in zip(checks, results):
+            if not on_top:
+                covered += 1
+                if src_hash is not None:
+                    entry.update(mod=src_hash, source=src_stamp)
+                entry["file"] = src_path
+                continue
+            if src_hash is None:
+                unchanged += 1
+                entry["file"] = src_path
+                continue
+
+            dst_path = os.path.join(version_path, "content", dst_rel_path)
+            if entry is None:
+                store_path = os.path.join("content", dst_rel_path)
+                backup_file = os.path.join(backup_dir, dst_rel_path)
+                if os.path.exists(backup_file):
+                    original = hash_file(backup_file)
+                    backups.append((store_path, backup_file, original))
+                    legacy_backups.append(backup_file)
+                elif dst_hash is not None and dst_hash != src_hash:
+                    original = dst_hash
+                    backups.append((store_path, dst_path, original))
+                else:
+                    if vanilla_files is None:
+                        vanilla_files = load_version_manifest(version)["files"]
+                    vanilla_entry = vanilla_files.get(store_path)
+                    original = vanilla_entry[2] if vanilla_entry else None
+                    if original and os.path.exists(get_blob_path(original)):
+                        backups.append((store_path, get_blob_path(original), original))
+                entry = entries[dst_rel_path] = {"original": original}
+
+            entry["file"] = src_path
+            if dst_hash == src_hash:
+                unchanged += 1
+                entry.update(mod=src_hash, source=src_stamp, stamp=dst_stamp)
+            else:
+                copies.append((src_path, dst_path, src_hash, src_stamp, entry))
+
+        backup_store.backup(modpack, internal_name, backups)
+        for backup_file in legacy_backups:
+            os.remove(backup_file)
+
+        stats = copy_files_parallel(
+            [(src_path, dst_path) for src_path, dst_path, _, _, _ in copies], label=f"Apply {internal_name}")
+        copy_errors = {dst_path for _, dst_path, _ in stats["errors"]}
+        for src_path, dst_path, src_hash, src_stamp, entry in copies:
+            if dst_path in copy_errors:
+                entry.update(mod=src_hash, source=None, stamp=None)
+                failed = True
+            else:
+                entry.update(mod=src_hash, source=src_stamp, stamp=get_file_stamp(dst_path))
+
+        write_json_atomic(get_replace_journal_path(modpack), journal, indent=None)
+
+    logging.info(
+        f"Applied {internal_name} to {modpack}: {len(copies)} files copied, {unchanged} already current, "
+        f"{covered} covered by mods enabled later")
+    return not failed
+
+def restore_external_mod_files(modpack, version, internal_name, replace_files):
+    version_path = os.path.join(modpacks_dir, modpack, "RobloxCopy", version)
+    backup_dir = os.path.join(version_path, "backup_external", internal_name)
+    with get_replace_journal_lock(modpack):
+        journal = load_replace_journal(modpack)
+        entries = journal["mods"].get(internal_name, {})
+
+        for file_entry in replace_files:
+            dst_rel_path = file_entry.get("destination")
+            if not dst_rel_path:
+                logging.warning(f"Invalid destination in {internal_name}: {file_entry}")
+                continue
+            dst_rel_path = os.path.normpath(dst_rel_path)
+            if dst_rel_path in entries:
+                continue
+            dst_path = os.path.join(version_path, "content", dst_rel_path)
+            backup_file = os.path.join(backup_dir, dst_rel_path)
+            if os.path.exists(backup_file):
+                link_or_copy(backup_file, dst_path)
+                logging.debug(f"Restored unjournaled {backup_file} to {dst_path}")
+            elif os.path.exists(dst_path):
+                os.remove(dst_path)
+                logging.debug(f"Removed unjournaled modded file {dst_path} (no backup)")
+
+        restored = drop_journaled_files(modpack, journal, internal_name, version_path, list(entries)) if entries else []
+        for dst_rel_path in restored:
+            del entries[dst_rel_path]
+        backup_store.release(
+            modpack, internal_name, [os.path.join("content", dst_rel_path) for dst_rel_path in restored])
+
+        if entries:
+            write_json_atomic(get_replace_journal_path(modpack), journal, indent=None)
+            logging.error(f"Could not restore {len(entries)} files of {internal_name}, keeping its backups")
+            return False
+        journal["mods"].pop(internal_name, None)
+        write_json_atomic(get_replace_journal_path(modpack), journal, indent=None)
+
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    return True
+
 def apply_external_mod(modpack, internal_name, mod_config, enabled):
+    with get_reconcile_lock(modpack):
+        return apply_external_mod_locked(modpack, internal_name, mod_config, enabled)
+
+def apply_external_mod_locked(modpack, internal_name, mod_config, enabled):
     if not modpack:
         logging.error("No modpack selected for apply_external_mod.")
         return
@@ -850,100 +3876,47 @@ def apply_external_mod(modpack, internal_name, mod_config, enabled):
             version,
             "ClientSettings",
             "ClientAppSettings.json")
-        roblox_content_path = os.path.join(roblox_path, version, "content")
-        backup_path = os.path.join(
-            roblox_path,
-            version,
-            "backup_external",
-            internal_name)
-        mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
         mod_dir = os.path.join(external_mods_dir, internal_name)
 
         fast_flags = mod_config.get("fast_flags", {})
         replace_files = mod_config.get("replace_files", [])
         mod_name = mod_config.get("name")
 
-        mod_state = {}
-        if os.path.exists(mod_state_path):
-            with open(mod_state_path, "r") as f:
-                mod_state = json.load(f)
-
-        if internal_name not in mod_state:
-            mod_state[internal_name] = False
-            logging.debug(
-                f"Initialized mod state for {internal_name} in {modpack}")
+        wait_for_modpack_paths(modpack, get_mod_target_paths(internal_name, mod_config))
 
         if enabled:
             logging.info(
                 f"Enabling external mod '{mod_name}' ({internal_name}) for modpack '{modpack}'")
-            handle_mod_conflicts(mod_name)
+            handle_mod_conflicts(mod_name, modpack)
 
             if os.path.exists(settings_path):
-                with open(settings_path, "r") as f:
-                    settings = json.load(f)
-                settings.update(fast_flags)
-                with open(settings_path, "w") as f:
-                    json.dump(settings, f, indent=4)
-                    logging.debug(
-                        f"Updated FastFlags for {internal_name}: {fast_flags}")
-
-            os.makedirs(backup_path, exist_ok=True)
-            for file_entry in replace_files:
-                src_rel_path = file_entry.get("source")
-                dst_rel_path = file_entry.get("destination")
-                if not src_rel_path or not dst_rel_path:
-                    logging.warning(
-                        f"Invalid file entry in {internal_name}: {file_entry}")
-                    continue
-                src_path = os.path.join(mod_dir, src_rel_path)
-                dst_path = os.path.join(roblox_content_path, dst_rel_path)
-                if os.path.exists(src_path):
-                    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
-                    if os.path.exists(dst_path):
-                        shutil.copy2(
-                            dst_path, os.path.join(
-                                backup_path, dst_rel_path))
-                        logging.debug(f"Backed up {dst_path} to {backup_path}")
-                    shutil.copy2(src_path, dst_path)
-                    logging.debug(f"Copied {src_path} to {dst_path}")
+                set_mod_flag_layer(modpack, internal_name, fast_flags)
+                logging.debug(
+                    f"Updated FastFlags for {internal_name}: {fast_flags}")
+
+            if not replace_external_mod_files(
+                    modpack, version, internal_name, mod_dir, replace_files):
+                return False
         else:
             logging.info(
                 f"Disabling external mod '{mod_name}' ({internal_name}) for modpack '{modpack}'")
 
             if os.path.exists(settings_path):
-                with open(settings_path, "r") as f:
-                    settings = json.load(f)
-                for key in fast_flags.keys():
-                    settings.pop(key, None)
-                with open(settings_path, "w") as f:
-                    json.dump(settings, f, indent=4)
-                    logging.debug(
-                        f"Removed FastFlags for {internal_name}: {fast_flags}")
-
-            for file_entry in replace_files:
-                dst_rel_path = file_entry.get("destination")
-                if not dst_rel_path:
-                    logging.warning(
-                        f"Invalid destination in {internal_name}: {file_entry}")
-                    continue
-                dst_path = os.path.join(roblox_content_path, dst_rel_path)
-                backup_file = os.path.join(backup_path, dst_rel_path)
-                if os.path.exists(backup_file):
-                    shutil.copy2(backup_file, dst_path)
-                    logging.debug(f"Restored {backup_file} to {dst_path}")
-                elif os.path.exists(dst_path):
-                    os.remove(dst_path)
-                    logging.debug(
-                        f"Removed modded file {dst_path} (no backup)")
+                set_mod_flag_layer(modpack, internal_name, None)
+                logging.debug(
+                    f"Removed FastFlags for {internal_name}: {fast_flags}")
 
-        mod_state[internal_name] = enabled
-        with open(mod_state_path, "w") as f:
-            json.dump(mod_state, f, indent=4)
-            logging.debug(f"Saved mod state for {internal_name}: {enabled}")
+            if not restore_external_mod_files(modpack, version, internal_name, replace_files):
+                return False
+
+        mod_state_store.set(modpack, internal_name, enabled)
+        logging.debug(f"Saved mod state for {internal_name}: {enabled}")
+        return True
 
     except Exception as e:
         logging.error(
             f"Error applying external mod {internal_name} for modpack {modpack}: {str(e)}")
+        return False
 
 
 def validate_external_mod_entry(internal_name, mod_info):
@@ -1028,19 +4001,11 @@ def _import_external_mod_worker(zip_path, result_queue):
                     if os.path.isdir(os.path.join(modpacks_dir, d))]
 
         for modpack in modpacks:
-            mod_state_path = os.path.join(
-                modpacks_dir, modpack, "mod_state.json")
-            mod_state = {}
-            if os.path.exists(mod_state_path):
-                with open(mod_state_path, "r") as f:
-                    mod_state = json.load(f)
-            mod_state[internal_name] = False
-            with open(mod_state_path, "w") as f:
-                json.dump(mod_state, f, indent=4)
+            mod_state_store.set(modpack, internal_name, False)
 
-        def mod_apply_function(enabled):
+        def mod_apply_function(enabled, modpack=None):
             apply_external_mod(
-                selected_modpack,
+                modpack or selected_modpack,
                 internal_name,
                 mod_config,
                 enabled)
@@ -1058,6 +4023,12 @@ def _import_external_mod_worker(zip_path, result_queue):
             INTERNAL_TO_DISPLAY[internal_name] = mod_name
             CONFLICTING_MODS[mod_name] = conflicts
 
+        target_paths = get_mod_target_paths(internal_name, mod_config)
+        path_conflicts = find_path_conflicts(internal_name, target_paths)
+        register_mod_paths(internal_name, target_paths)
+        if path_conflicts:
+            result_queue.put(("log_warning", describe_path_conflicts(mod_name, path_conflicts)))
+
         result_queue.put(("success", mod_name))
 
     except Exception as e:
@@ -1116,37 +4087,50 @@ def import_external_mod():
     timer.start(100)
 
 
-def apply_day_night_cycle(enabled):
-    modpack = selected_modpack
+def apply_day_night_cycle(enabled, modpack=None):
+    modpack = modpack or selected_modpack
     if not modpack:
         print("Please select a modpack.")
         return
 
     roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
     version = os.listdir(roblox_path)[0]
+    wait_for_modpack_paths(modpack, get_mod_target_paths("celestials"))
 
     sky_path = os.path.join(roblox_path, version, "content", "sky")
 
     moon_path = os.path.join(sky_path, "moon.jpg")
     sun_path = os.path.join(sky_path, "sun.jpg")
 
-    if enabled:
+    moon_rel_path = os.path.join("content", "sky", "moon.jpg")
+    sun_rel_path = os.path.join("content", "sky", "sun.jpg")
+    moon_original_path = os.path.join(sky_path, "moon_original.jpg")
+    sun_original_path = os.path.join(sky_path, "sun_original.jpg")
+    owned = backup_store.entries(modpack, "celestials")
 
-        if os.path.exists(moon_path) and os.path.exists(sun_path):
+    if enabled:
 
-            shutil.copy(moon_path, os.path.join(sky_path, "moon_original.jpg"))
-            shutil.copy(sun_path, os.path.join(sky_path, "sun_original.jpg"))
-
-            os.rename(moon_path, os.path.join(sky_path, "temp.jpg"))
-            os.rename(sun_path, moon_path)
-            os.rename(os.path.join(sky_path, "temp.jpg"), sun_path)
+        if not owned and os.path.exists(moon_original_path) and os.path.exists(sun_original_path):
+            owned = backup_store.backup(modpack, "celestials", [
+                (moon_rel_path, moon_original_path, None), (sun_rel_path, sun_original_path, None)])
+            os.remove(moon_original_path)
+            os.remove(sun_original_path)
+        elif not owned and os.path.exists(moon_path) and os.path.exists(sun_path):
+            owned = backup_store.backup(modpack, "celestials", [
+                (moon_rel_path, moon_path, None), (sun_rel_path, sun_path, None)])
+
+        if moon_rel_path in owned and sun_rel_path in owned:
+            backup_store.restore(owned[sun_rel_path], moon_path)
+            backup_store.restore(owned[moon_rel_path], sun_path)
             print(f"Switched day/night cycle for modpack '{modpack}'")
     else:
 
-        moon_original_path = os.path.join(sky_path, "moon_original.jpg")
-        sun_original_path = os.path.join(sky_path, "sun_original.jpg")
-
-        if os.path.exists(moon_original_path) and os.path.exists(
+        if moon_rel_path in owned and sun_rel_path in owned:
+            if backup_store.restore(owned[moon_rel_path], moon_path) and backup_store.restore(
+                    owned[sun_rel_path], sun_path):
+                backup_store.release(modpack, "celestials")
+            print(f"Restored original day/night cycle for modpack '{modpack}'")
+        elif os.path.exists(moon_original_path) and os.path.exists(
                 sun_original_path):
 
             os.remove(moon_path)
@@ -1156,53 +4140,63 @@ def apply_day_night_cycle(enabled):
             shutil.copy(sun_original_path, sun_path)
             print(f"Restored original day/night cycle for modpack '{modpack}'")
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["celestials"] = enabled
+    mod_state_store.set(modpack, "celestials", enabled)
 
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-def replace_font(enabled):
-    modpack = selected_modpack
+def replace_font(enabled, modpack=None):
+    interactive = modpack is None
+    modpack = modpack or selected_modpack
     if not modpack:
         print("Please select a modpack.")
         return
 
     roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
     version = os.listdir(roblox_path)[0]
+    wait_for_modpack_paths(modpack, get_mod_target_paths("replace_font"))
 
     fonts_dir = os.path.join(roblox_path, version, "content", "fonts")
 
     if enabled:
 
-        custom_font_path = filedialog.askopenfilename(
-            title="Select a font file", filetypes=[
-                ("Font files", "*.otf;*.ttf")])
+        custom_font_path = None if interactive else get_saved_mod_file(modpack, "custom_font")
+        if not custom_font_path:
+            custom_font_path = filedialog.askopenfilename(
+                title="Select a font file", filetypes=[
+                    ("Font files", "*.otf;*.ttf")])
+            if custom_font_path:
+                custom_font_path = save_mod_file(modpack, "custom_font", custom_font_path)
         if custom_font_path:
 
             backup_dir = os.path.join(fonts_dir, "backup")
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
+            vanilla_files = load_version_manifest(version)["files"]
+            backups = []
             for font_file in os.listdir(fonts_dir):
                 if font_file.endswith(".otf") or font_file.endswith(".ttf"):
-                    shutil.copy(os.path.join(fonts_dir, font_file), backup_dir)
+                    rel_path = os.path.join("content", "fonts", font_file)
+                    font_path = os.path.join(backup_dir, font_file)
+                    if not os.path.exists(font_path):
+                        font_path = os.path.join(fonts_dir, font_file)
+                    backups.append((rel_path, font_path, get_tree_file_hash(vanilla_files, rel_path, font_path)))
+            backup_store.backup(modpack, "replace_font", backups)
+            shutil.rmtree(backup_dir, ignore_errors=True)
 
             for font_file in os.listdir(fonts_dir):
                 if font_file.endswith(".otf") or font_file.endswith(".ttf"):
-                    shutil.copy(
-                        custom_font_path, os.path.join(
-                            fonts_dir, font_file))
+                    font_path = os.path.join(fonts_dir, font_file)
+                    break_hardlink(font_path, keep_contents=False)
+                    shutil.copy(custom_font_path, font_path)
             print(
                 f"Replaced all fonts in modpack '{modpack}' with {custom_font_path}")
     else:
 
+        version_path = os.path.join(roblox_path, version)
+        owned = backup_store.entries(modpack, "replace_font")
+        if all(backup_store.restore(file_hash, os.path.join(version_path, rel_path))
+               for rel_path, file_hash in owned.items()):
+            backup_store.release(modpack, "replace_font")
+
         backup_dir = os.path.join(fonts_dir, "backup")
-        if os.path.exists(backup_dir):
+        legacy_backup = os.path.exists(backup_dir)
+        if legacy_backup:
             for font_file in os.listdir(backup_dir):
 
                 os.remove(os.path.join(fonts_dir, font_file))
@@ -1210,609 +4204,23 @@ def replace_font(enabled):
                     os.path.join(
                         backup_dir, font_file), os.path.join(
                         fonts_dir, font_file))
+            shutil.rmtree(backup_dir, ignore_errors=True)
+        if owned or legacy_backup:
             print(f"Restored original fonts in modpack '{modpack}'")
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["replace_font"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def apply_optimizer(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["FFlagOptimizeNetwork"] = "True"
-        settings["FFlagOptimizeNetworkRouting"] = "True"
-        settings["FFlagOptimizeNetworkTransport"] = "True"
-        settings["FFlagOptimizeServerTickRate"] = "True"
-        print(f"Enabled 'Optimizer' mod for modpack '{modpack}'")
-    else:
-
-        settings.pop("FFlagOptimizeNetwork", None)
-        settings.pop("FFlagOptimizeNetworkRouting", None)
-        settings.pop("FFlagOptimizeNetworkTransport", None)
-        settings.pop("FFlagOptimizeServerTickRate", None)
-        print(f"Disabled 'Optimizer' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["optimizer"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def apply_remove_grass_mesh(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["FIntFRMMinGrassDistance"] = "0"
-        settings["FIntFRMMaxGrassDistance"] = "0"
-        settings["FIntRenderGrassDetailStrands"] = "0"
-        settings["FIntRenderGrassHeightScaler"] = "0"
-        print(f"Enabled 'Remove grass mesh' mod for modpack '{modpack}'")
-    else:
-
-        settings.pop("FIntFRMMinGrassDistance", None)
-        settings.pop("FIntFRMMaxGrassDistance", None)
-        settings.pop("FIntRenderGrassDetailStrands", None)
-        settings.pop("FIntRenderGrassHeightScaler", None)
-        print(f"Disabled 'Remove grass mesh' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["remove_grass_mesh"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def apply_hide_gui(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["FFlagUserShowGuiHideToggles"] = "True"
-        settings["GuiHidingApiSupport2"] = "True"
-        settings["DFIntCanHideGuiGroupId"] = "3375285"
-
-        print(f"Enabled 'Hide gui' mod for modpack '{modpack}'")
-    else:
-
-        settings.pop("FFlagUserShowGuiHideToggles", None)
-        settings.pop("GuiHidingApiSupport2", None)
-        settings.pop("DFIntCanHideGuiGroupId", None)
-        print(f"Disabled 'Hide gui' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["hidegui"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def apply_display_fps(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-        settings["FFlagDebugDisplayFPS"] = "True"
-
-        print(f"Enabled 'Display fps' mod for modpack '{modpack}'")
-    else:
-        settings.pop("FFlagDebugDisplayFPS", None)
-        print(f"Disabled 'Display fps' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["displayfps"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def apply_cheat(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["FFlagDebugSimDefaultPrimalSolver"] = "True"
-        settings["DFIntDebugSimPrimalLineSearch"] = "22222222"
-        settings["DFIntSolidFloorPercentForceApplication"] = "-1000"
-        settings["DFIntNonSolidFloorPercentForceApplication"] = "-5000"
-        settings["DFIntMaxMissedWorldStepsRemembered"] = "1000"
-        print(f"Enabled 'Cheat' mod for modpack '{modpack}'")
-    else:
-        settings.pop("DFIntMaxMissedWorldStepsRemembered", None)
-        settings.pop("DFIntNonSolidFloorPercentForceApplication", None)
-        settings.pop("DFIntSolidFloorPercentForceApplication", None)
-        settings.pop("DFIntDebugSimPrimalLineSearch", None)
-        settings.pop("FFlagDebugSimDefaultPrimalSolver", None)
-        print(f"Disabled 'Cheat' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["cheat"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def disable_remotes(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["DFIntRemoteEventSingleInvocationSizeLimit"] = "1"
-        print(f"Enabled 'Disable remotes' mod for modpack '{modpack}'")
-    else:
-        settings.pop("DFIntRemoteEventSingleInvocationSizeLimit", None)
-        print(f"Disabled 'Disable remotes' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
+    mod_state_store.set(modpack, "replace_font", enabled)
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
 
-    mod_state["disable_remotes"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def google_browser(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        handle_mod_conflicts("Google browser")
-
-        settings["FFlagPlatformEventEnabled2"] = "True"
-        settings["FStringPlatformEventUrl"] = "https://google.com/"
-        settings["FFlagTopBarUseNewBadge"] = "True"
-        settings["FStringTopBarBadgeLearnMoreLink"] = "https://google.com/"
-        settings["FStringVoiceBetaBadgeLearnMoreLink"] = "https://google.com/"
-        settings["FFlagDebugEnableNewWebView2DevTool"] = "True"
-        print(f"Enabled 'Google browser' mod for modpack '{modpack}'")
-    else:
-        settings.pop("FFlagPlatformEventEnabled2", None)
-        settings.pop("FStringPlatformEventUrl", None)
-        settings.pop("FFlagTopBarUseNewBadge", None)
-        settings.pop("FStringTopBarBadgeLearnMoreLink", None)
-        settings.pop("FStringVoiceBetaBadgeLearnMoreLink", None)
-        settings.pop("FFlagDebugEnableNewWebView2DevTool", None)
-        print(f"Disabled 'Google browser' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["google_browser"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def replace_character_meshes(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-    original_meshes_path = os.path.join(
-        roblox_path, version, "content", "avatar", "meshes")
-    backup_meshes_path = os.path.join(
-        roblox_path,
-        version,
-        "content",
-        "avatar",
-        "meshes_backup")
-    custom_meshes_path = os.path.join(meshes_folder, "chan")
-
-    if enabled:
-
-        if not os.path.exists(backup_meshes_path):
-            shutil.copytree(original_meshes_path, backup_meshes_path)
-            print("Created backup of original meshes")
-
-        shutil.rmtree(original_meshes_path)
-        os.makedirs(original_meshes_path)
-
-        for mesh_file in os.listdir(custom_meshes_path):
-            if mesh_file.endswith(".mesh"):
-                shutil.copy(
-                    os.path.join(custom_meshes_path, mesh_file),
-                    os.path.join(original_meshes_path, mesh_file)
-                )
-        print(
-            f"Replaced character meshes with custom ones in modpack '{modpack}'")
-    else:
-
-        if os.path.exists(backup_meshes_path):
-            shutil.rmtree(original_meshes_path)
-            shutil.copytree(backup_meshes_path, original_meshes_path)
-            print(f"Restored original character meshes in modpack '{modpack}'")
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["character_meshes"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def chat_gpt(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        handle_mod_conflicts("Chat gpt")
-
-        settings["FFlagPlatformEventEnabled2"] = "True"
-        settings["FStringPlatformEventUrl"] = "https://chatbotchatapp.com/"
-        settings["FFlagTopBarUseNewBadge"] = "True"
-        settings["FStringTopBarBadgeLearnMoreLink"] = "https://chatbotchatapp.com/"
-        settings["FStringVoiceBetaBadgeLearnMoreLink"] = "https://chatbotchatapp.com/"
-        settings["FFlagDebugEnableNewWebView2DevTool"] = "True"
-        print(f"Enabled 'Google browser' mod for modpack '{modpack}'")
-    else:
-        settings.pop("FFlagPlatformEventEnabled2", None)
-        settings.pop("FStringPlatformEventUrl", None)
-        settings.pop("FFlagTopBarUseNewBadge", None)
-        settings.pop("FStringTopBarBadgeLearnMoreLink", None)
-        settings.pop("FStringVoiceBetaBadgeLearnMoreLink", None)
-        settings.pop("FFlagDebugEnableNewWebView2DevTool", None)
-        print(f"Disabled 'Google browser' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["chat_gpt"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def faster_inputs(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["FIntActivatedCountTimerMSKeyboard"] = 1
-        print(f"Enabled 'Faster inputs' mod for modpack '{modpack}'")
-    else:
-        settings.pop("FIntActivatedCountTimerMSKeyboard", None)
-        print(f"Disabled 'Faster inputs' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["faster_inputs"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def unlock_fps(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-
-        settings["FFlagTaskSchedulerLimitTargetFpsTo2402"] = "False"
-        settings["DFIntTaskSchedulerTargetFps"] = "9999"
-        print(f"Enabled 'Unlock fps' mod for modpack '{modpack}'")
-    else:
-        settings.pop("FFlagTaskSchedulerLimitTargetFpsTo2402", None)
-        settings.pop("DFIntTaskSchedulerTargetFps", None)
-        print(f"Disabled 'Unlock fps' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["unlock_fps"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def graphic_boost(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    settings_path = os.path.join(
-        roblox_path,
-        version,
-        "ClientSettings",
-        "ClientAppSettings.json")
-
-    with open(settings_path, "r") as f:
-        settings = json.load(f)
-
-    if enabled:
-        settings["FFlagMovePrerenderV2"] = "True"
-        settings["FFlagCommitToGraphicsQualityFix"] = "True"
-        settings["FFlagFixGraphicsQuality"] = "True"
-        settings["DFIntDebugFRMQualityLevelOverride"] = "21"
-        settings["FFlagCommitToGraphicsQualityFix"] = "True"
-        settings["FFlagFixGraphicsQuality"] = "True"
-        settings["FFlagDebugGraphicsDisableDirect3D11"] = "True"
-        settings["FFlagDebugGraphicsPreferOpenGL"] = "True"
-        settings["DFIntMaxFrameBufferSize"] = "4"
-        settings["DFFlagTextureQualityOverrideEnabled"] = "True"
-        settings["DFIntTextureQualityOverride"] = "3"
-        settings["FFlagDebugForceFutureIsBrightPhase3"] = "True"
-        print(f"Enabled 'Graphic boost' mod for modpack '{modpack}'")
-    else:
-        settings.pop("FFlagFixGraphicsQuality", None)
-        settings.pop("FFlagCommitToGraphicsQualityFix", None)
-        settings.pop("FFlagMovePrerenderV2", None)
-        settings.pop("DFIntDebugFRMQualityLevelOverride", None)
-        settings.pop("FFlagCommitToGraphicsQualityFix", None)
-        settings.pop("FFlagFixGraphicsQuality", None)
-        settings.pop("FFlagDebugGraphicsDisableDirect3D11", None)
-        settings.pop("FFlagDebugGraphicsPreferOpenGL", None)
-        settings.pop("FFlagCommitToGraphicsQualityFix", None)
-        settings.pop("DFIntMaxFrameBufferSize", None)
-        settings.pop("DFFlagTextureQualityOverrideEnabled", None)
-        settings.pop("DFIntTextureQualityOverride", None)
-        settings.pop("FFlagDebugForceFutureIsBrightPhase3", None)
-        print(f"Disabled 'Graphic boost' mod for modpack '{modpack}'")
-
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=4)
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["graphic_boost"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def apply_custom_ouch_sound(enabled):
-    modpack = selected_modpack
+def apply_custom_ouch_sound(enabled, modpack=None):
+    interactive = modpack is None
+    modpack = modpack or selected_modpack
     if not modpack:
         print("Please select a modpack.")
         return
 
     roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
     version = os.listdir(roblox_path)[0]
+    wait_for_modpack_paths(modpack, get_mod_target_paths("custom_ouch_sound"))
 
     ouch_path = os.path.join(
         roblox_path,
@@ -1821,503 +4229,706 @@ def apply_custom_ouch_sound(enabled):
         "sounds",
         "ouch.ogg")
 
-    if enabled:
-
-        if os.path.exists(ouch_path):
+    rel_path = os.path.join("content", "sounds", "ouch.ogg")
+    original_ouch_path = os.path.join(
+        roblox_path, version, "content", "sounds", "ouch_original.ogg")
 
-            shutil.copy(
-                ouch_path,
-                os.path.join(
-                    roblox_path,
-                    version,
-                    "content",
-                    "sounds",
-                    "ouch_original.ogg"))
+    if enabled:
 
-        new_ouch_path = filedialog.askopenfilename(
-            title="Select a new ouch.ogg file", filetypes=[
-                ("Ogg files", "*.ogg")])
+        backup_path = original_ouch_path if os.path.exists(original_ouch_path) else ouch_path
+        if os.path.exists(backup_path):
+            backup_store.backup(modpack, "custom_ouch_sound", [(rel_path, backup_path, None)])
+            if backup_path == original_ouch_path:
+                os.remove(original_ouch_path)
+
+        new_ouch_path = None if interactive else get_saved_mod_file(modpack, "custom_ouch")
+        if not new_ouch_path:
+            new_ouch_path = filedialog.askopenfilename(
+                title="Select a new ouch.ogg file", filetypes=[
+                    ("Ogg files", "*.ogg")])
+            if new_ouch_path:
+                new_ouch_path = save_mod_file(modpack, "custom_ouch", new_ouch_path)
         if new_ouch_path:
+            break_hardlink(ouch_path, keep_contents=False)
             shutil.copy(new_ouch_path, ouch_path)
             print(
                 f"Replaced ouch.ogg in modpack '{modpack}' with {new_ouch_path}")
     else:
 
-        original_ouch_path = os.path.join(
-            roblox_path, version, "content", "sounds", "ouch_original.ogg")
-        if os.path.exists(original_ouch_path):
-            shutil.copy(original_ouch_path, ouch_path)
+        original_hash = backup_store.entries(modpack, "custom_ouch_sound").get(rel_path)
+        if original_hash and backup_store.restore(original_hash, ouch_path):
+            backup_store.release(modpack, "custom_ouch_sound")
+            print(f"Restored original ouch.ogg in modpack '{modpack}'")
+        elif os.path.exists(original_ouch_path):
+            link_or_copy(original_ouch_path, ouch_path)
             print(f"Restored original ouch.ogg in modpack '{modpack}'")
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["custom_ouch_sound"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f)
-
-
-def beautiful_sky(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Please select a modpack.")
-        return
-
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
-
-    sky_textures = {
-        'bk': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_bk.tex"),
-        'dn': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_dn.tex"),
-        'ft': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_ft.tex"),
-        'lf': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_lf.tex"),
-        'rt': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_rt.tex"),
-        'up': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_up.tex")}
-
-    new_sky_path = os.path.join(os.path.dirname(
-        __file__), "Assets", "sky", "beautiful")
+    mod_state_store.set(modpack, "custom_ouch_sound", enabled)
 
-    if enabled:
 
-        handle_mod_conflicts("Beautiful sky")
+builtin_mod_plans = {}
+builtin_manifest = None
 
-        backup_path = os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "backup")
-        if not os.path.exists(backup_path):
-            os.makedirs(backup_path)
-
-        for direction in ['bk', 'dn', 'ft', 'lf', 'rt', 'up']:
-            original_path = sky_textures[direction]
-            backup_file = os.path.join(
-                backup_path, f"sky512_{direction}_original.tex")
-
-            if os.path.exists(original_path):
-                shutil.copy2(original_path, backup_file)
-
-            new_texture = os.path.join(new_sky_path, f"sky512_{direction}.tex")
-            if os.path.exists(new_texture):
-                shutil.copy2(new_texture, original_path)
-
-        print(f"Replaced outdoor sky textures for modpack '{modpack}'")
+def scan_builtin_asset(source, hash_files=False):
+    src_path = os.path.join(script_dir, "Assets", source)
+    if os.path.isfile(src_path):
+        paths = [("", src_path)]
     else:
+        paths = []
+        for root, dirs, files in os.walk(src_path):
+            for file in files:
+                path = os.path.join(root, file)
+                paths.append((os.path.relpath(path, src_path), path))
+    return {
+        rel_path: [os.path.getsize(path), hash_file(path) if hash_files else None]
+        for rel_path, path in sorted(paths)}
+
+def get_builtin_manifest():
+    global builtin_manifest
+    if builtin_manifest is None:
+        try:
+            with open(builtin_manifest_file, "r") as f:
+                sources = json.load(f)["sources"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Could not load {builtin_manifest_file}, built-in packs will be scanned: {e}")
+            sources = {}
+        builtin_manifest = {
+            os.path.normpath(source): {
+                os.path.normpath(rel_path) if rel_path else "": entry for rel_path, entry in files.items()}
+            for source, files in sources.items()}
+    return builtin_manifest
+
+def build_builtin_manifest():
+    sources = {}
+    for mod in BUILTIN_MODS.values():
+        for file_entry in mod.get("replace_files", []):
+            files = scan_builtin_asset(file_entry["source"], hash_files=True)
+            sources[file_entry["source"].replace(os.sep, "/")] = {
+                rel_path.replace(os.sep, "/"): entry for rel_path, entry in files.items()}
+    write_json_atomic(builtin_manifest_file, {"sources": dict(sorted(sources.items()))})
+    return sum(len(files) for files in sources.values())
+
+def get_builtin_mod_plan(internal_name):
+    plan = builtin_mod_plans.get(internal_name)
+    if plan is not None:
+        return plan
+
+    plan = {"files": [], "exclusive_dirs": [], "manifest": {}}
+    manifest = get_builtin_manifest()
+    for file_entry in BUILTIN_MODS[internal_name].get("replace_files", []):
+        source = file_entry["source"]
+        src_path = os.path.join(script_dir, "Assets", source)
+        files = manifest.get(source)
+        if files is None:
+            logging.warning(f"{source} is not in {builtin_manifest_file}, scanning it")
+            files = scan_builtin_asset(source)
+        if not files:
+            logging.warning(f"Missing asset {src_path} for built-in mod {internal_name}")
+        for rel_path, entry in files.items():
+            dst_rel_path = os.path.join(file_entry["destination"], rel_path) if rel_path else file_entry["destination"]
+            plan["files"].append((os.path.join(src_path, rel_path) if rel_path else src_path, dst_rel_path))
+            plan["manifest"][dst_rel_path] = entry
+        if file_entry.get("exclusive") and "" not in files:
+            plan["exclusive_dirs"].append(file_entry["destination"])
+    builtin_mod_plans[internal_name] = plan
+    return plan
+
+def get_builtin_swap_dirs(version_path, internal_name):
+    swap_dir = os.path.join(version_path, "builtin_swap", internal_name)
+    return os.path.join(swap_dir, "parked"), os.path.join(swap_dir, "prepared"), os.path.join(swap_dir, "enabled")
+
+def matches_manifest_size(path, entry):
+    try:
+        return entry is None or os.path.getsize(path) == entry[0]
+    except OSError:
+        return False
 
-        backup_path = os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "backup")
-        if os.path.exists(backup_path):
-            for direction in ['bk', 'dn', 'ft', 'lf', 'rt', 'up']:
-                original_path = sky_textures[direction]
-                backup_file = os.path.join(
-                    backup_path, f"sky512_{direction}_original.tex")
-
-                if os.path.exists(backup_file):
-                    shutil.copy2(backup_file, original_path)
-
-        print(
-            f"Restored original outdoor sky textures for modpack '{modpack}'")
+def load_builtin_swap_marker(marker_path):
+    try:
+        with open(marker_path, "r") as f:
+            return set(json.load(f)["absent"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return set()
+
+def absorb_legacy_builtin_backups(modpack, internal_name, version_path):
+    backups = []
+    legacy_dirs = []
+    for file_entry in BUILTIN_MODS[internal_name].get("replace_files", []):
+        legacy_dir = file_entry.get("legacy_backup")
+        if not legacy_dir or not os.path.isdir(os.path.join(version_path, legacy_dir)):
+            continue
+        suffix = file_entry.get("legacy_suffix", "")
+        backup_dir = os.path.join(version_path, legacy_dir)
+        for root, dirs, files in os.walk(backup_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                stem, ext = os.path.splitext(os.path.relpath(path, backup_dir))
+                if suffix and stem.endswith(suffix):
+                    stem = stem[:-len(suffix)]
+                backups.append((os.path.join(file_entry["destination"], stem + ext), path, None))
+        legacy_dirs.append(legacy_dir)
+    if not legacy_dirs:
+        return
 
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
+    backup_store.backup(modpack, internal_name, backups)
+    for legacy_dir in legacy_dirs:
+        shutil.rmtree(os.path.join(version_path, legacy_dir), ignore_errors=True)
+        if is_backup_path(legacy_dir):
+            try:
+                os.rmdir(os.path.join(version_path, os.path.dirname(legacy_dir)))
+            except OSError:
+                pass
+    logging.info(f"Moved {len(backups)} legacy backups of {internal_name} in {modpack} into {backup_store_dir}")
 
-    mod_state["beautiful_sky"] = enabled
+def remove_empty_dirs(folder):
+    for root, dirs, files in os.walk(folder, topdown=False):
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+
+def replace_builtin_mod_files(modpack, internal_name, version, version_path, plan):
+    parked_dir, prepared_dir, marker_path = get_builtin_swap_dirs(version_path, internal_name)
+    backup_dir = os.path.join(version_path, "backup_builtin", internal_name)
+    absorb_legacy_builtin_backups(modpack, internal_name, version_path)
+    owned = backup_store.entries(modpack, internal_name)
+    exclusive_dirs = plan["exclusive_dirs"]
+    swapped = os.path.exists(marker_path) or bool(owned) or os.path.exists(backup_dir)
+    absent = load_builtin_swap_marker(marker_path)
+
+    for rel_dir in [] if swapped else exclusive_dirs:
+        dst_dir = os.path.join(version_path, rel_dir)
+        parked_path = os.path.join(parked_dir, rel_dir)
+        prepared_path = os.path.join(prepared_dir, rel_dir)
+        if os.path.exists(dst_dir):
+            os.makedirs(os.path.dirname(parked_path), exist_ok=True)
+            os.rename(dst_dir, parked_path)
+        if os.path.exists(prepared_path):
+            os.makedirs(os.path.dirname(dst_dir), exist_ok=True)
+            os.rename(prepared_path, dst_dir)
+
+    wanted = {rel_path for _, rel_path in plan["files"]}
+    for rel_dir in exclusive_dirs:
+        for root, dirs, files in os.walk(os.path.join(version_path, rel_dir)):
+            for file in files:
+                path = os.path.join(root, file)
+                if os.path.relpath(path, version_path) not in wanted:
+                    os.remove(path)
+
+    def in_exclusive_dir(rel_path):
+        return any(rel_path.startswith(rel_dir + os.sep) for rel_dir in exclusive_dirs)
+
+    make_parent_dirs(
+        os.path.join(folder, rel_path) for _, rel_path in plan["files"] if not in_exclusive_dir(rel_path)
+        for folder in (version_path, parked_dir))
+
+    def swap_in(item):
+        src_path, rel_path = item
+        entry = plan["manifest"].get(rel_path)
+        dst_path = os.path.join(version_path, rel_path)
+        if in_exclusive_dir(rel_path):
+            return None if matches_manifest_size(dst_path, entry) else (src_path, dst_path), None
+
+        parked_path = os.path.join(parked_dir, rel_path)
+        prepared_path = os.path.join(prepared_dir, rel_path)
+        was_absent = None
+        if os.path.lexists(dst_path):
+            if swapped or os.path.lexists(parked_path):
+                if matches_manifest_size(dst_path, entry):
+                    return None, None
+            else:
+                os.replace(dst_path, parked_path)
+        elif not swapped:
+            was_absent = rel_path
+        if os.path.exists(prepared_path) and matches_manifest_size(prepared_path, entry):
+            os.replace(prepared_path, dst_path)
+            return None, was_absent
+        return (src_path, dst_path), was_absent
+
+    results = map_files_parallel(swap_in, plan["files"])
+    copies = [pair for pair, _ in results if pair]
+    absent.update(rel_path for _, rel_path in results if rel_path)
+    os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+    write_json_atomic(marker_path, {"absent": sorted(absent)}, indent=None)
+    stats = copy_files_parallel(copies, label=f"Apply {internal_name}")
+    logging.info(
+        f"Swapped {len(plan['files']) - len(copies)} files of {internal_name} into {modpack}, "
+        f"copied {stats['files']}")
+    return not stats["errors"]
+
+def restore_builtin_mod_files(modpack, internal_name, version, version_path, plan):
+    parked_dir, prepared_dir, marker_path = get_builtin_swap_dirs(version_path, internal_name)
+    backup_dir = os.path.join(version_path, "backup_builtin", internal_name)
+    absorb_legacy_builtin_backups(modpack, internal_name, version_path)
+    manifest = load_version_manifest(version)
+    vanilla_files = manifest["files"]
+    owned = backup_store.entries(modpack, internal_name)
+    absent = load_builtin_swap_marker(marker_path)
+
+    swapped_dirs = []
+    for rel_dir in plan["exclusive_dirs"]:
+        dst_dir = os.path.join(version_path, rel_dir)
+        parked_path = os.path.join(parked_dir, rel_dir)
+        prepared_path = os.path.join(prepared_dir, rel_dir)
+        if not os.path.exists(parked_path):
+            continue
+        if os.path.exists(dst_dir):
+            if os.path.exists(prepared_path):
+                shutil.rmtree(dst_dir)
+            else:
+                os.makedirs(os.path.dirname(prepared_path), exist_ok=True)
+                os.rename(dst_dir, prepared_path)
+        os.rename(parked_path, dst_dir)
+        swapped_dirs.append(rel_dir)
+
+    def in_swapped_dir(rel_path):
+        return any(rel_path.startswith(rel_dir + os.sep) for rel_dir in swapped_dirs)
+
+    restored = {rel_path for _, rel_path in plan["files"]} | set(owned)
+    for rel_dir in plan["exclusive_dirs"]:
+        restored.update(
+            rel_path for rel_path in vanilla_files if rel_path.startswith(rel_dir + os.sep))
+    for root, dirs, files in os.walk(backup_dir):
+        for file in files:
+            restored.add(os.path.relpath(os.path.join(root, file), backup_dir))
+
+    restored = sorted(rel_path for rel_path in restored if not in_swapped_dir(rel_path))
+    make_parent_dirs(
+        [os.path.join(version_path, rel_path) for rel_path in restored
+         if rel_path in owned or rel_path in vanilla_files] +
+        [os.path.join(prepared_dir, rel_path) for rel_path in restored if rel_path in plan["manifest"]])
+
+    def restore_file(rel_path):
+        dst_path = os.path.join(version_path, rel_path)
+        parked_path = os.path.join(parked_dir, rel_path)
+        prepared_path = os.path.join(prepared_dir, rel_path)
+        backup_path = os.path.join(backup_dir, rel_path)
+        vanilla_entry = vanilla_files.get(rel_path)
+        has_blob = bool(vanilla_entry and vanilla_entry[2] and os.path.exists(get_blob_path(vanilla_entry[2])))
+        added_by_mod = rel_path in absent or manifest["complete"] and vanilla_entry is None
+        try:
+            if not (os.path.lexists(parked_path) or rel_path in owned or os.path.exists(backup_path)
+                    or has_blob or added_by_mod):
+                return not os.path.lexists(dst_path)
+            if rel_path in plan["manifest"] and os.path.lexists(dst_path) and not os.path.lexists(prepared_path) \
+                    and matches_manifest_size(dst_path, plan["manifest"][rel_path]):
+                os.replace(dst_path, prepared_path)
+            if os.path.lexists(parked_path):
+                os.replace(parked_path, dst_path)
+                return True
+            if rel_path in owned and backup_store.restore(owned[rel_path], dst_path):
+                return True
+            if os.path.exists(backup_path):
+                link_or_copy(backup_path, dst_path)
+            elif has_blob:
+                if os.path.lexists(dst_path):
+                    os.remove(dst_path)
+                place_blob(vanilla_entry[2], rel_path, dst_path)
+            elif added_by_mod:
+                if os.path.lexists(dst_path):
+                    os.remove(dst_path)
+            else:
+                return False
+        except OSError as e:
+            logging.error(f"Failed to restore {rel_path} for {internal_name}: {e}")
+            return False
+        return True
 
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f, indent=4)
+    failed = [rel_path for rel_path, ok in zip(restored, map_files_parallel(restore_file, restored)) if not ok]
 
+    if failed:
+        logging.error(
+            f"Could not restore {len(failed)} files of {internal_name} in {modpack}, keeping its backups "
+            f"and leaving files with no known original in place: {', '.join(failed[:5])}")
+        return False
+    backup_store.release(modpack, internal_name)
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    try:
+        os.rmdir(os.path.dirname(backup_dir))
+    except OSError:
+        pass
+    remove_empty_dirs(parked_dir)
+    if os.path.exists(marker_path):
+        os.remove(marker_path)
+    return True
 
-def anime_chan_sky(enabled):
-    modpack = selected_modpack
+def apply_builtin_mod(internal_name, enabled, modpack=None):
+    modpack = modpack or selected_modpack
     if not modpack:
         print("Please select a modpack.")
         return
 
-    roblox_path = os.path.join(modpacks_dir, modpack, "RobloxCopy")
-    version = os.listdir(roblox_path)[0]
+    mod = BUILTIN_MODS[internal_name]
+    version = get_modpack_version(modpack)
+    if not version:
+        print(f"Error: No version folder found for modpack '{modpack}'")
+        return False
+    version_path = os.path.join(modpacks_dir, modpack, "RobloxCopy", version)
 
-    sky_textures = {
-        'bk': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_bk.tex"),
-        'dn': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_dn.tex"),
-        'ft': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_ft.tex"),
-        'lf': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_lf.tex"),
-        'rt': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_rt.tex"),
-        'up': os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "sky512_up.tex")}
-
-    new_sky_path = os.path.join(
-        os.path.dirname(__file__),
-        "Assets",
-        "sky",
-        "chan")
+    plan = get_builtin_mod_plan(internal_name)
+    if plan["files"]:
+        wait_for_modpack_paths(modpack, get_mod_target_paths(internal_name))
 
     if enabled:
-
-        handle_mod_conflicts("Anime chan sky")
-
-        backup_path = os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "backup")
-        if not os.path.exists(backup_path):
-            os.makedirs(backup_path)
-
-        for direction in ['bk', 'dn', 'ft', 'lf', 'rt', 'up']:
-            original_path = sky_textures[direction]
-            backup_file = os.path.join(
-                backup_path, f"sky512_{direction}_original.tex")
-
-            if os.path.exists(original_path):
-                shutil.copy2(original_path, backup_file)
-
-            new_texture = os.path.join(new_sky_path, f"sky512_{direction}.tex")
-            if os.path.exists(new_texture):
-                shutil.copy2(new_texture, original_path)
-
-        print(f"Replaced outdoor sky textures for modpack '{modpack}'")
+        if mod.get("conflicts"):
+            handle_mod_conflicts(mod["name"], modpack)
+        if "fast_flags" in mod:
+            set_mod_flag_layer(modpack, internal_name, mod["fast_flags"])
+        if plan["files"] and not replace_builtin_mod_files(modpack, internal_name, version, version_path, plan):
+            print(f"Errors occurred while applying '{mod['name']}' to modpack '{modpack}'. Check logs above.")
+            return False
+        print(f"Enabled '{mod['name']}' mod for modpack '{modpack}'")
     else:
+        if "fast_flags" in mod:
+            set_mod_flag_layer(modpack, internal_name, None)
+        if plan["files"] and not restore_builtin_mod_files(modpack, internal_name, version, version_path, plan):
+            print(f"Errors occurred while removing '{mod['name']}' from modpack '{modpack}'. Check logs above.")
+            return False
+        print(f"Disabled '{mod['name']}' mod for modpack '{modpack}'")
 
-        backup_path = os.path.join(
-            roblox_path,
-            version,
-            "PlatformContent",
-            "pc",
-            "textures",
-            "sky",
-            "backup")
-        if os.path.exists(backup_path):
-            for direction in ['bk', 'dn', 'ft', 'lf', 'rt', 'up']:
-                original_path = sky_textures[direction]
-                backup_file = os.path.join(
-                    backup_path, f"sky512_{direction}_original.tex")
-
-                if os.path.exists(backup_file):
-                    shutil.copy2(backup_file, original_path)
-
-        print(
-            f"Restored original outdoor sky textures for modpack '{modpack}'")
-
-    mod_state_path = os.path.join(modpacks_dir, modpack, "mod_state.json")
-    mod_state = {}
-    if os.path.exists(mod_state_path):
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-    mod_state["anime_chan_sky"] = enabled
-
-    with open(mod_state_path, "w") as f:
-        json.dump(mod_state, f, indent=4)
-
-
-def apply_bloxstrap_theme(enabled):
-    modpack = selected_modpack
-    if not modpack:
-        print("Error: Please select a modpack first.")
-
-        return
-
-    modpacks_base_dir = modpacks_dir
-    modpack_path = os.path.join(modpacks_base_dir, modpack)
-    roblox_copy_path = os.path.join(modpack_path, "RobloxCopy")
-
-    if not os.path.exists(roblox_copy_path):
-        print(
-            f"Error: RobloxCopy folder not found for modpack '{modpack}' at {roblox_copy_path}")
-        return
-
-    try:
-        versions = [
-            d for d in os.listdir(roblox_copy_path) if os.path.isdir(
-                os.path.join(
-                    roblox_copy_path, d))]
-        if not versions:
-            print(f"Error: No version folder found inside {roblox_copy_path}")
-            return
-
-        version = versions[0]
-        roblox_version_path = os.path.join(roblox_copy_path, version)
-    except Exception as e:
-        print(
-            f"Error accessing Roblox version folder in {roblox_copy_path}: {e}")
-        return
-
-    script_dir = os.path.dirname(__file__)
-    theme_base_path = os.path.join(
-        script_dir, "Assets", "ui", "bloxstraptheme")
-    theme_content_path = os.path.join(theme_base_path, "content")
-    theme_extracontent_path = os.path.join(theme_base_path, "ExtraContent")
-
-    roblox_content_path = os.path.join(roblox_version_path, "content")
-    roblox_extracontent_path = os.path.join(
-        roblox_version_path, "ExtraContent")
-
-    backup_path = os.path.join(roblox_version_path, "backup_bloxstrap_theme")
-
-    def copy_files_with_backup(src_base, dst_base, backup_base):
-        print(f"Processing: {src_base} -> {dst_base}")
-        if not os.path.exists(src_base):
-            print(f"Warning: Source path {src_base} does not exist. Skipping.")
-            return
-
-        copied_files = 0
-        errors = 0
-        for root, dirs, files in os.walk(src_base):
-
-            relative_path = os.path.relpath(root, src_base)
-            dst_dir = os.path.join(dst_base, relative_path)
-            backup_dir = os.path.join(backup_base, relative_path)
-
-            if files:
-                os.makedirs(dst_dir, exist_ok=True)
-
-            for file in files:
-                src_file = os.path.join(root, file)
-                dst_file = os.path.join(dst_dir, file)
-                backup_file = os.path.join(backup_dir, file)
-
-                try:
-
-                    if os.path.exists(dst_file):
-
-                        if not os.path.exists(backup_file):
-                            os.makedirs(
-                                os.path.dirname(backup_file), exist_ok=True)
-                            print(f"  Backing up: {dst_file} -> {backup_file}")
-                            shutil.copy2(dst_file, backup_file)
-                        else:
-                            print(f"  Backup exists: {backup_file}")
-
-                    print(f"  Copying: {src_file} -> {dst_file}")
-                    shutil.copy2(src_file, dst_file)
-                    copied_files += 1
-
-                except Exception as e:
-                    print(f"  Error processing file {src_file}: {e}")
-                    errors += 1
-        print(
-            f"Finished processing {src_base}. Copied: {copied_files}, Errors: {errors}")
-        return errors == 0
-
-    def restore_files_from_backup(backup_base, dst_base):
-        print(f"Restoring from: {backup_base} -> {dst_base}")
-        if not os.path.exists(backup_base):
-            print(f"Backup path {backup_base} not found. Nothing to restore.")
-            return True
-
-        restored_files = 0
-        errors = 0
-        for root, dirs, files in os.walk(backup_base):
-            relative_path = os.path.relpath(root, backup_base)
-            dst_dir = os.path.join(dst_base, relative_path)
-
-            for file in files:
-                backup_file = os.path.join(root, file)
-                dst_file = os.path.join(dst_dir, file)
-
-                try:
-
-                    os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+    mod_state_store.set(modpack, internal_name, enabled)
+    return True
 
-                    print(f"  Restoring: {backup_file} -> {dst_file}")
-                    shutil.copy2(backup_file, dst_file)
-                    restored_files += 1
-                except Exception as e:
-                    print(f"  Error restoring file {backup_file}: {e}")
-                    errors += 1
+builtin_mod_handlers = {
+    "replace_font": replace_font,
+    "celestials": apply_day_night_cycle,
+    "custom_ouch_sound": apply_custom_ouch_sound
+}
 
-        print(
-            f"Finished restoring {backup_base}. Restored: {restored_files}, Errors: {errors}")
-        return errors == 0
+mod_apply_functions = {
+    internal_name: builtin_mod_handlers[mod["handler"]] if "handler" in mod
+    else partial(apply_builtin_mod, internal_name)
+    for internal_name, mod in BUILTIN_MODS.items()
+}
 
+file_hash_cache = {}
+file_hash_cache_lock = threading.Lock()
+
+def hash_file_cached(path):
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    with file_hash_cache_lock:
+        cached = file_hash_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    file_hash = hash_file(path)
+    with file_hash_cache_lock:
+        file_hash_cache[path] = (key, file_hash)
+    return file_hash
+
+def get_mod_file_plan(modpack, internal_name, vanilla_files, external_mods):
+    if internal_name.startswith("external_"):
+        mod_info = external_mods.get(internal_name)
+        if not mod_info or not os.path.exists(mod_info["config_path"]):
+            return [], []
+        with open(mod_info["config_path"], "r") as f:
+            mod_config = json.load(f)
+        mod_dir = os.path.join(external_mods_dir, internal_name)
+        entries = []
+        for file_entry in mod_config.get("replace_files", []):
+            if not file_entry.get("source") or not file_entry.get("destination"):
+                continue
+            src_path = os.path.join(mod_dir, file_entry["source"])
+            if os.path.exists(src_path):
+                entries.append((
+                    os.path.normpath(os.path.join("content", file_entry["destination"])), src_path, None))
+        return entries, []
+
+    mod = BUILTIN_MODS.get(internal_name)
+    if mod is None:
+        return [], []
+
+    handler = mod.get("handler")
+    if handler == "celestials":
+        moon_path, sun_path = mod["target_paths"]
+        if moon_path not in vanilla_files or sun_path not in vanilla_files:
+            return [], []
+        moon_hash = vanilla_files[moon_path][2]
+        sun_hash = vanilla_files[sun_path][2]
+        return [
+            (moon_path, get_blob_path(sun_hash), sun_hash),
+            (sun_path, get_blob_path(moon_hash), moon_hash)], []
+
+    if handler:
+        saved_path = get_saved_mod_file(modpack, mod["saved_file"])
+        if not saved_path:
+            return [], []
+        if handler == "replace_font":
+            fonts_dir = mod["target_paths"][0]
+            return [
+                (rel_path, saved_path, None) for rel_path in vanilla_files
+                if os.path.dirname(rel_path) == fonts_dir and rel_path.endswith((".otf", ".ttf"))], []
+        return [(rel_path, saved_path, None) for rel_path in mod["target_paths"]], []
+
+    plan = get_builtin_mod_plan(internal_name)
+    return [(rel_path, src_path, None) for src_path, rel_path in plan["files"]], plan["exclusive_dirs"]
+
+reconcile_locks = {}
+reconcile_locks_lock = threading.Lock()
+
+def get_reconcile_lock(modpack):
+    with reconcile_locks_lock:
+        return reconcile_locks.setdefault(modpack, threading.RLock())
+
+def reconcile_modpack(modpack):
+    with get_reconcile_lock(modpack):
+        return reconcile_modpack_locked(modpack)
+
+def reconcile_modpack_locked(modpack):
+    start = time.perf_counter()
+    report = {"copied": 0, "restored": 0, "removed": 0, "flags": 0}
+    version = get_modpack_version(modpack)
+    if not version or not mod_state_store.exists(modpack):
+        return report
+
+    mod_state = mod_state_store.get(modpack)
     try:
-        if enabled:
-            print(f"\nApplying Bloxstrap theme to modpack '{modpack}'...")
-
-            os.makedirs(backup_path, exist_ok=True)
-
-            success1 = copy_files_with_backup(
-                theme_content_path,
-                roblox_content_path,
-                os.path.join(backup_path, "content")
-            )
-
-            success2 = copy_files_with_backup(
-                theme_extracontent_path,
-                roblox_extracontent_path,
-                os.path.join(backup_path, "ExtraContent")
-            )
-
-            if success1 and success2:
-                print(
-                    f"\nSuccessfully applied Bloxstrap theme to modpack '{modpack}'")
-                update_mod_state(modpack_path, "bloxstrap_theme", True)
-            else:
-                print(
-                    f"\nErrors occurred while applying Bloxstrap theme to modpack '{modpack}'. Check logs above.")
-
-        else:
-            print(f"\nRemoving Bloxstrap theme from modpack '{modpack}'...")
-            if not os.path.exists(backup_path):
-                print(
-                    "No backup found. Assuming theme was not applied or backup was removed.")
-
-                update_mod_state(modpack_path, "bloxstrap_theme", False)
-                return
-
-            success1 = restore_files_from_backup(
-                os.path.join(backup_path, "content"),
-                roblox_content_path
-            )
-
-            success2 = restore_files_from_backup(
-                os.path.join(backup_path, "ExtraContent"),
-                roblox_extracontent_path
-            )
+        external_mods = load_external_mods()
+    except (OSError, ValueError):
+        external_mods = {}
 
-            if success1 and success2:
+    compositor = get_flag_compositor(modpack)
+    compositor.sync()
+    for internal_name, enabled in mod_state.items():
+        if internal_name not in BUILTIN_MODS and internal_name not in external_mods:
+            continue
+        flags = get_mod_flags(internal_name, external_mods) if enabled else None
+        if compositor.set_layer(internal_name, flags, restore_removed=False):
+            report["flags"] += 1
+
+    manifest = load_version_manifest(version)
+    if not manifest["complete"]:
+        logging.info(f"Skipping file reconciliation of {modpack}: no complete manifest for {version}")
+        return report
+    vanilla_files = manifest["files"]
+    version_path = os.path.join(modpacks_dir, modpack, "RobloxCopy", version)
+
+    desired = {}
+    relevant = set()
+    exclusive_dirs = []
+    external_sources = {}
+    for internal_name in sorted(mod_state, key=lambda name: name.startswith("external_")):
+        try:
+            entries, mod_exclusive_dirs = get_mod_file_plan(modpack, internal_name, vanilla_files, external_mods)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not plan files of {internal_name} for {modpack}: {e}")
+            continue
+        for rel_dir in mod_exclusive_dirs:
+            relevant.update(
+                rel_path for rel_path in vanilla_files if rel_path.startswith(rel_dir + os.sep))
+            for root, dirs, files in os.walk(os.path.join(version_path, rel_dir)):
+                relevant.update(
+                    os.path.relpath(os.path.join(root, file), version_path) for file in files)
+            if mod_state[internal_name]:
+                exclusive_dirs.append(rel_dir)
+        for rel_path, src_path, src_hash in entries:
+            relevant.add(rel_path)
+            if mod_state[internal_name]:
+                desired[rel_path] = (src_path, src_hash)
+                if internal_name.startswith("external_"):
+                    external_sources[internal_name, rel_path] = (src_path, src_hash)
+
+    stacks = load_replace_journal(modpack)["stacks"]
+    journaled = {}
+    for dst_rel_path, stack in stacks.items():
+        rel_path = os.path.join("content", dst_rel_path)
+        for owner in reversed(stack):
+            if (owner, rel_path) in external_sources:
+                desired[rel_path] = external_sources[owner, rel_path]
+                journaled[rel_path] = (owner, dst_rel_path)
+                break
+
+    for rel_path in relevant:
+        if rel_path in desired:
+            continue
+        if any(rel_path.startswith(rel_dir + os.sep) for rel_dir in exclusive_dirs):
+            desired[rel_path] = None
+        elif rel_path in vanilla_files:
+            file_hash = vanilla_files[rel_path][2]
+            desired[rel_path] = (get_blob_path(file_hash), file_hash)
+        else:
+            desired[rel_path] = None
 
-                try:
-                    print(f"Removing backup directory: {backup_path}")
-                    shutil.rmtree(backup_path)
-                    print(
-                        f"\nSuccessfully removed Bloxstrap theme and restored original files for modpack '{modpack}'")
-                    update_mod_state(modpack_path, "bloxstrap_theme", False)
-                except Exception as e:
-                    print(
-                        f"Error removing backup directory {backup_path}: {e}")
+    wait_for_modpack_paths(modpack, sorted(relevant))
 
-                    update_mod_state(modpack_path, "bloxstrap_theme", False)
-            else:
-                print(
-                    f"\nErrors occurred while restoring from backup for modpack '{modpack}'. Backup NOT removed. Check logs above.")
+    cache_path = os.path.join(modpacks_dir, modpack, "reconcile_cache.json")
+    try:
+        with open(cache_path, "r") as f:
+            saved_cache = json.load(f)
+    except (OSError, ValueError):
+        saved_cache = {}
+    if "targets" not in saved_cache:
+        saved_cache = {"targets": saved_cache, "sources": {}}
+    cache = saved_cache["targets"]
+    sources = saved_cache.get("sources", {})
+    cached_before = {rel_path: list(entry) for rel_path, entry in cache.items()}
+    sources_before = {src_path: list(entry) for src_path, entry in sources.items()}
+    cache_lock = threading.Lock()
+
+    def source_hash(src_path):
+        stat = os.stat(src_path)
+        key = [stat.st_size, stat.st_mtime_ns]
+        with cache_lock:
+            cached = sources.get(src_path)
+        if cached and cached[:2] == key:
+            return cached[2]
+        file_hash = hash_file_cached(src_path)
+        with cache_lock:
+            sources[src_path] = key + [file_hash]
+        return file_hash
+
+    def check_path(rel_path):
+        dst_path = os.path.join(version_path, rel_path)
+        try:
+            stat = os.stat(dst_path)
+        except FileNotFoundError:
+            stat = None
+        if desired[rel_path] is None:
+            return None if stat is None else ("remove", rel_path)
+
+        src_path, src_hash = desired[rel_path]
+        if stat is None:
+            return ("place", rel_path)
+        with cache_lock:
+            cached = cache.get(rel_path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            dst_hash = cached[2]
+        else:
+            dst_hash = hash_file(dst_path)
+            with cache_lock:
+                cache[rel_path] = [stat.st_size, stat.st_mtime_ns, dst_hash]
+        if src_hash is None:
+            src_hash = source_hash(src_path)
+        return None if dst_hash == src_hash else ("place", rel_path)
+
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        actions = [action for action in pool.map(check_path, sorted(relevant)) if action]
+
+    copy_pairs = []
+    for action, rel_path in actions:
+        dst_path = os.path.join(version_path, rel_path)
+        if action == "remove":
+            os.remove(dst_path)
+            cache.pop(rel_path, None)
+            report["removed"] += 1
+            continue
+        src_path, src_hash = desired[rel_path]
+        if src_hash is None:
+            copy_pairs.append((src_path, dst_path))
+            continue
+        if not os.path.exists(src_path):
+            logging.warning(f"Cannot restore {rel_path} in {modpack}: blob {src_hash} is missing")
+            continue
+        if os.path.lexists(dst_path):
+            os.remove(dst_path)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        link_blob(src_path, dst_path)
+        report["restored"] += 1
+
+    failed = set()
+    if copy_pairs:
+        stats = copy_files_parallel(copy_pairs, label=f"Reconcile {modpack}")
+        report["copied"] = stats["files"]
+        failed = {os.path.relpath(dst_path, version_path) for _, dst_path, _ in stats["errors"]}
+
+    for action, rel_path in actions:
+        if action == "remove" or rel_path in failed:
+            cache.pop(rel_path, None)
+            continue
+        src_path, src_hash = desired[rel_path]
+        try:
+            stat = os.stat(os.path.join(version_path, rel_path))
+            cache[rel_path] = [stat.st_size, stat.st_mtime_ns, src_hash or source_hash(src_path)]
+        except FileNotFoundError:
+            cache.pop(rel_path, None)
+
+    placed = [
+        journaled[rel_path] for action, rel_path in actions
+        if action == "place" and rel_path in journaled and rel_path not in failed]
+    if placed:
+        with get_replace_journal_lock(modpack):
+            journal = load_replace_journal(modpack)
+            for owner, dst_rel_path in placed:
+                entry = journal["mods"].get(owner, {}).get(dst_rel_path)
+                if entry is not None:
+                    entry["stamp"] = get_file_stamp(os.path.join(version_path, "content", dst_rel_path))
+            write_json_atomic(get_replace_journal_path(modpack), journal, indent=None)
+
+    for rel_path in list(cache):
+        if rel_path not in relevant:
+            del cache[rel_path]
+    used_sources = {entry[0] for entry in desired.values() if entry is not None and entry[1] is None}
+    for src_path in list(sources):
+        if src_path not in used_sources:
+            del sources[src_path]
+    if cache != cached_before or sources != sources_before:
+        write_json_atomic(cache_path, {"targets": cache, "sources": sources}, indent=None)
+
+    logging.info(
+        f"Reconciled {modpack} in {time.perf_counter() - start:.3f}s: {report['copied']} copied, "
+        f"{report['restored']} restored, {report['removed']} removed, {report['flags']} flag layers fixed")
+    return report
+
+def reconcile_all_modpacks():
+    if not os.path.exists(modpacks_dir):
+        return {}
+
+    modpacks = [
+        modpack for modpack in os.listdir(modpacks_dir)
+        if os.path.isdir(os.path.join(modpacks_dir, modpack))
+        and not os.path.exists(os.path.join(modpacks_dir, modpack, "upgrading.json"))
+        and get_materializer(modpack) is None]
+
+    def reconcile(modpack):
+        try:
+            return modpack, reconcile_modpack(modpack)
+        except Exception as e:
+            logging.error(f"Failed to reconcile {modpack}: {e}")
+            return modpack, None
 
-    except Exception as e:
-        print(f"\nAn unexpected error occurred during theme operation: {e}")
+    with ThreadPoolExecutor(max_workers=max(1, load_app_settings()["io_concurrency"])) as pool:
+        return dict(pool.map(reconcile, modpacks))
 
+def refresh_external_mods_in_modpack(modpack, internal_names, external_mods):
+    for internal_name in internal_names:
+        with open(external_mods[internal_name]["config_path"], "r") as f:
+            mod_config = json.load(f)
+        if not apply_external_mod(modpack, internal_name, mod_config, True):
+            raise RuntimeError(f"could not re-apply {internal_name}")
+    return True
 
-mod_apply_functions = {
-            "replace_font": replace_font,
-            "optimizer": apply_optimizer,
-            "cheat": apply_cheat,
-            "celestials": apply_day_night_cycle,
-            "hidegui": apply_hide_gui,
-            "remove_grass_mesh": apply_remove_grass_mesh,
-            "displayfps": apply_display_fps,
-            "disable_remotes": disable_remotes,
-            "unlock_fps": unlock_fps,
-            "custom_ouch_sound": apply_custom_ouch_sound,
-            "google_browser": google_browser,
-            "chat_gpt": chat_gpt,
-            "character_meshes": replace_character_meshes,
-            "faster_inputs": faster_inputs,
-            "graphic_boost": graphic_boost,
-            "beautiful_sky": beautiful_sky,
-            "anime_chan_sky": anime_chan_sky,
-            "bloxstrap_theme": apply_bloxstrap_theme
-}
+def refresh_external_mods(internal_names, progress_callback=None):
+    external_mods = load_external_mods()
+    internal_names = [name for name in internal_names if name in external_mods]
+    users = {}
+    for internal_name in internal_names:
+        for modpack in find_modpacks_using(internal_name):
+            users.setdefault(modpack, []).append(internal_name)
+
+    modpacks = sorted(users)
+    workers = max(1, int(load_app_settings()["io_concurrency"]))
+    results = {}
+    lock = threading.Lock()
+
+    def refresh(modpack):
+        try:
+            wait_for_modpack_upgrade(modpack)
+            result = refresh_external_mods_in_modpack(modpack, users[modpack], external_mods)
+        except Exception as e:
+            logging.error(f"Failed to refresh external mods in {modpack}: {e}")
+            result = f"failed: {e}"
+        with lock:
+            results[modpack] = result
+            if progress_callback:
+                progress_callback(len(results), len(modpacks), modpack)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(refresh, modpacks))
+    logging.info(
+        f"Refreshed {len(internal_names)} external mods in {len(modpacks)} modpacks with {workers} workers "
+        f"in {time.perf_counter() - start:.2f}s")
+    return results
 
 class LoadingDialog(QDialog):
     def __init__(self, parent=None, message="Loading..."):
@@ -2339,10 +4950,15 @@ class LoadingDialog(QDialog):
         self.label.setText(message)
         QApplication.processEvents()
 
+    def set_progress(self, value, maximum):
+        self.progress.setRange(0, maximum)
+        self.progress.setValue(value)
+
 
 class ModSwitch(QFrame):
-    def __init__(self, mod_name, icon_path, toggle_callback, parent=None):
+    def __init__(self, mod_name, icon_path, toggle_callback, internal_name=None, parent=None):
         super().__init__(parent)
+        self.internal_name = internal_name
         self.setFixedHeight(80)
         self.setStyleSheet("""
             QFrame {
@@ -2353,6 +4969,10 @@ class ModSwitch(QFrame):
         layout = QHBoxLayout()
         layout.setContentsMargins(10, 5, 10, 5)
 
+        self.select_box = QCheckBox()
+        self.select_box.setToolTip("Select for Enable/Disable Selected")
+        layout.addWidget(self.select_box)
+
         self.icon_label = QLabel()
         self.icon_label.setFixedSize(50, 50)
         self.set_icon(icon_path)
@@ -2568,10 +5188,18 @@ class MainWindow(QMainWindow):
         global selected_modpack
         self.selected_modpack = None
         selected_modpack = self.selected_modpack
+        resume_modpack_builds()
+        self.reconcile_thread = ReconcileModpacksThread()
+        self.reconcile_thread.start()
+        self.materializing_modpacks = set()
         self.update_modpacks_display()
 
         self.mod_states = {}
 
+        self.materialize_timer = QTimer(self)
+        self.materialize_timer.timeout.connect(self.refresh_materialization_status)
+        self.materialize_timer.start(500)
+
     def set_logo_image(self, icon_path):
         try:
             img = Image.open(icon_path)
@@ -2606,8 +5234,9 @@ class MainWindow(QMainWindow):
 
         self.btn_create_modpack = QPushButton("Create Modpack ➕")
         self.btn_import_modpack = QPushButton("Import Modpack 📥")
+        self.btn_update_all = QPushButton("Update All 🔄")
 
-        for btn in [self.btn_create_modpack, self.btn_import_modpack]:
+        for btn in [self.btn_create_modpack, self.btn_import_modpack, self.btn_update_all]:
             btn.setFixedHeight(40)
             btn.setStyleSheet("""
                 QPushButton {
@@ -2625,6 +5254,7 @@ class MainWindow(QMainWindow):
         top_bar_layout.addStretch()
         top_bar_layout.addWidget(self.btn_create_modpack)
         top_bar_layout.addWidget(self.btn_import_modpack)
+        top_bar_layout.addWidget(self.btn_update_all)
         top_bar.setLayout(top_bar_layout)
         layout.addWidget(top_bar)
 
@@ -2643,6 +5273,7 @@ class MainWindow(QMainWindow):
 
         self.btn_create_modpack.clicked.connect(self.show_create_modpack_dialog)
         self.btn_import_modpack.clicked.connect(self.import_modpack)
+        self.btn_update_all.clicked.connect(self.update_all_modpacks)
 
         self.modpacks_page.setLayout(layout)
 
@@ -2674,10 +5305,12 @@ class MainWindow(QMainWindow):
         self.btn_launch = QPushButton("Launch ▶️")
         self.btn_update = QPushButton("Update 🔄")
         self.btn_export = QPushButton("Export 📤")
+        self.btn_duplicate = QPushButton("Duplicate 📄")
         self.btn_delete = QPushButton("Delete ❌")
         self.btn_set_default = QPushButton("Set as Default ⭐")
 
-        for btn in [self.btn_launch, self.btn_update, self.btn_export, self.btn_delete, self.btn_set_default]:
+        for btn in [self.btn_launch, self.btn_update, self.btn_export, self.btn_duplicate, self.btn_delete,
+                    self.btn_set_default]:
             btn.setFixedHeight(30)
             btn.setStyleSheet("""
                 QPushButton {
@@ -2746,8 +5379,11 @@ class MainWindow(QMainWindow):
         self.btn_show_mods = QPushButton("Mods")
         self.btn_show_texturepacks = QPushButton("Texture Packs")
         self.btn_fflags = QPushButton("Fast Flags")
+        self.btn_enable_selected = QPushButton("Enable Selected")
+        self.btn_disable_selected = QPushButton("Disable Selected")
 
-        for btn in [self.btn_show_mods, self.btn_show_texturepacks, self.btn_fflags]:
+        for btn in [self.btn_show_mods, self.btn_show_texturepacks, self.btn_fflags,
+                    self.btn_enable_selected, self.btn_disable_selected]:
             btn.setFixedHeight(40)
             btn.setStyleSheet("""
                 QPushButton {
@@ -2765,6 +5401,8 @@ class MainWindow(QMainWindow):
         filter_bar_layout.addWidget(self.btn_show_mods)
         filter_bar_layout.addWidget(self.btn_show_texturepacks)
         filter_bar_layout.addWidget(self.btn_fflags)
+        filter_bar_layout.addWidget(self.btn_enable_selected)
+        filter_bar_layout.addWidget(self.btn_disable_selected)
         filter_bar.setLayout(filter_bar_layout)
         layout.addWidget(filter_bar)
 
@@ -2784,12 +5422,15 @@ class MainWindow(QMainWindow):
         self.btn_launch.clicked.connect(self.launch_modpack)
         self.btn_update.clicked.connect(self.update_modpack)
         self.btn_export.clicked.connect(self.export_modpack)
+        self.btn_duplicate.clicked.connect(self.duplicate_modpack)
         self.btn_delete.clicked.connect(self.delete_modpack)
         self.btn_set_default.clicked.connect(self.set_as_default_modpack)
 
         self.btn_show_mods.clicked.connect(lambda: self.filter_mods("mods"))
         self.btn_show_texturepacks.clicked.connect(lambda: self.filter_mods("texturepacks"))
         self.btn_fflags.clicked.connect(self.show_fflag_editor)
+        self.btn_enable_selected.clicked.connect(lambda: self.apply_selected_mods(True))
+        self.btn_disable_selected.clicked.connect(lambda: self.apply_selected_mods(False))
         self.search_input.textChanged.connect(self.filter_mods_by_search)
 
         self.mods_page.setLayout(layout)
@@ -2859,6 +5500,33 @@ class MainWindow(QMainWindow):
         multi_instance_frame.setLayout(multi_instance_layout)
         settings_layout.addWidget(multi_instance_frame)
 
+        concurrency_frame = QFrame()
+        concurrency_frame.setStyleSheet("background-color: #333333; border-radius: 5px;")
+        concurrency_layout = QHBoxLayout()
+        concurrency_layout.setContentsMargins(15, 10, 15, 10)
+
+        concurrency_label = QLabel("Modpacks Updated in Parallel")
+        concurrency_label.setStyleSheet("font-size: 14px; color: white;")
+
+        self.io_concurrency_input = QSpinBox()
+        self.io_concurrency_input.setRange(1, COPY_WORKERS)
+        self.io_concurrency_input.setValue(load_app_settings()["io_concurrency"])
+        self.io_concurrency_input.setStyleSheet("""
+            QSpinBox {
+                background-color: #3a3a3a;
+                color: white;
+                border: 1px solid #555555;
+                border-radius: 5px;
+                padding: 3px 8px;
+            }
+        """)
+
+        concurrency_layout.addWidget(concurrency_label)
+        concurrency_layout.addStretch()
+        concurrency_layout.addWidget(self.io_concurrency_input)
+        concurrency_frame.setLayout(concurrency_layout)
+        settings_layout.addWidget(concurrency_frame)
+
         settings_layout.addStretch()
         settings_content.setLayout(settings_layout)
         layout.addWidget(settings_content)
@@ -2866,6 +5534,12 @@ class MainWindow(QMainWindow):
         self.settings_page.setLayout(layout)
 
         self.multi_instance_toggle.stateChanged.connect(self.toggle_multi_roblox)
+        self.io_concurrency_input.valueChanged.connect(self.set_io_concurrency)
+
+    def set_io_concurrency(self, value):
+        settings = load_app_settings()
+        settings["io_concurrency"] = value
+        save_app_settings(settings)
 
     def update_modpacks_display(self):
         for i in reversed(range(self.modpacks_grid.count())):
@@ -2887,6 +5561,8 @@ class MainWindow(QMainWindow):
 
             card = ModpackCard(modpack, icon_path, self.select_modpack)
             card.setFixedSize(160, 180)
+            if get_materializer(modpack):
+                card.name_label.setText(f"{modpack}\n(materializing)")
 
             self.modpacks_grid.addWidget(card, row, col)
 
@@ -2899,6 +5575,22 @@ class MainWindow(QMainWindow):
         for c in range(max_cols):
             self.modpacks_grid.setColumnStretch(c, 1)
 
+    def refresh_materialization_status(self):
+        with materializations_lock:
+            active = set(materializations)
+
+        if active != self.materializing_modpacks:
+            self.materializing_modpacks = active
+            self.update_modpacks_display()
+
+        if self.selected_modpack:
+            materializer = get_materializer(self.selected_modpack)
+            if materializer:
+                self.modpack_name.setText(
+                    f"{self.selected_modpack} (materializing {materializer.progress()}%)")
+            elif self.modpack_name.text() != self.selected_modpack:
+                self.modpack_name.setText(self.selected_modpack)
+
     def select_modpack(self, modpack_name):
         self.selected_modpack = modpack_name
         global selected_modpack
@@ -2925,42 +5617,21 @@ class MainWindow(QMainWindow):
         for i in reversed(range(self.mods_layout.count())):
             self.mods_layout.itemAt(i).widget().setParent(None)
 
-        mod_state_path = os.path.join(self.modpacks_dir, modpack_name, "mod_state.json")
-        if not os.path.exists(mod_state_path):
+        if not mod_state_store.exists(modpack_name):
             return
 
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-        internal_mods = [
-            ("R63 avatar", replace_character_meshes, os.path.join("assets", "images", "girl.jpg")),
-            ("Faster inputs", faster_inputs, os.path.join("assets", "images", "keyboard.png")),
-            ("Replace Font", replace_font, os.path.join("assets", "images", "Replace Font.png")),
-            ("Optimizer", apply_optimizer, os.path.join("assets", "images", "Optimizer.png")),
-            ("Cheat", apply_cheat, os.path.join("assets", "images", "cheat.png")),
-            ("Change celestial bodies", apply_day_night_cycle, os.path.join("assets", "images", "moon.jpg")),
-            ("Hide gui", apply_hide_gui, os.path.join("assets", "images", "hide.png")),
-            ("Remove grass", apply_remove_grass_mesh, os.path.join("assets", "images", "grass.png")),
-            ("Display fps", apply_display_fps, os.path.join("assets", "images", "displayfps.png")),
-            ("Disable remotes", disable_remotes, os.path.join("assets", "images", "RemoteEvent.png")),
-            ("Unlock fps", unlock_fps, os.path.join("assets", "images", "unlock_fps.png")),
-            ("Custom death sound", apply_custom_ouch_sound, os.path.join("assets", "images", "noob.png")),
-            ("Google browser", google_browser, os.path.join("assets", "images", "google.png")),
-            ("Chat gpt", chat_gpt, os.path.join("assets", "images", "ChatGPT_logo.svg.png")),
-            ("Graphic boost", graphic_boost, os.path.join("assets", "images", "graphics.png")),
-            ("Beautiful sky", beautiful_sky, os.path.join("assets", "images", "beautiful.png")),
-            ("Anime chan sky", anime_chan_sky, os.path.join("assets", "images", "Chan.png")),
-            ("Bloxstrap Theme", apply_bloxstrap_theme, os.path.join("assets", "images", "bloxstrap.png")),
-        ]
+        mod_state = mod_state_store.get(modpack_name)
 
-        for mod_name, mod_function, icon_path in internal_mods:
-            internal_name = MOD_NAME_MAPPING.get(mod_name, mod_name.lower().replace(' ', '_'))
+        for internal_name, mod in BUILTIN_MODS.items():
+            mod_name = mod["name"]
+            mod_function = mod_apply_functions[internal_name]
             enabled = mod_state.get(internal_name, False)
 
             mod_switch = ModSwitch(
                 mod_name,
-                icon_path,
-                lambda state, m=mod_name, f=mod_function: self.toggle_mod(m, f, state)
+                os.path.join(images_folder, mod["icon"]),
+                lambda state, m=mod_name, f=mod_function: self.toggle_mod(m, f, state),
+                internal_name
             )
             mod_switch.toggle.setChecked(enabled)
             self.mods_layout.addWidget(mod_switch)
@@ -2980,38 +5651,62 @@ class MainWindow(QMainWindow):
             mod_switch = ModSwitch(
                 mod_name,
                 icon_path,
-                lambda state, iname=internal_name, config=mod_config: self.toggle_external_mod(iname, config, state)
+                lambda state, iname=internal_name, config=mod_config: self.toggle_external_mod(iname, config, state),
+                internal_name
             )
             mod_switch.toggle.setChecked(enabled)
             self.mods_layout.addWidget(mod_switch)
 
         self.filter_mods(current_filter)
 
-    def toggle_mod(self, mod_name, mod_function, state):
+    def apply_selected_mods(self, enabled):
         if not self.selected_modpack:
             QMessageBox.warning(self, "Warning", "Please select a modpack first.")
             return
 
-        mod_state_path = os.path.join(self.modpacks_dir, self.selected_modpack, "mod_state.json")
-        mod_state = {}
-        if os.path.exists(mod_state_path):
-            with open(mod_state_path, "r") as f:
-                mod_state = json.load(f)
+        switches = [
+            self.mods_layout.itemAt(i).widget() for i in range(self.mods_layout.count())]
+        selected = [
+            switch for switch in switches
+            if isinstance(switch, ModSwitch) and switch.select_box.isChecked() and switch.internal_name]
+        if not selected:
+            QMessageBox.information(self, "Info", "Select one or more mods first.")
+            return
+
+        try:
+            apply_mod_batch(self.selected_modpack, {switch.internal_name: enabled for switch in selected})
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to apply mods, no changes were made: {str(e)}")
+
+        mod_state = mod_state_store.get(self.selected_modpack)
+        for switch in switches:
+            if isinstance(switch, ModSwitch) and switch.internal_name:
+                switch.toggle.blockSignals(True)
+                switch.toggle.setChecked(mod_state.get(switch.internal_name, False))
+                switch.toggle.blockSignals(False)
+                switch.select_box.setChecked(False)
+
+    def toggle_mod(self, mod_name, mod_function, state):
+        if not self.selected_modpack:
+            QMessageBox.warning(self, "Warning", "Please select a modpack first.")
+            return
 
         internal_name = MOD_NAME_MAPPING.get(mod_name, mod_name.lower().replace(' ', '_'))
+        mod_state = mod_state_store.get(self.selected_modpack)
 
         if internal_name in mod_state and mod_state[internal_name] == state:
             return
 
         try:
-            mod_function(state)
+            with get_reconcile_lock(self.selected_modpack):
+                if mod_function(state) is False:
+                    QMessageBox.critical(self, "Error", f"Failed to toggle {mod_name}. Check the logs for details.")
+                    return
 
-            mod_state[internal_name] = state
-            with open(mod_state_path, "w") as f:
-                json.dump(mod_state, f, indent=4)
+                mod_state_store.set(self.selected_modpack, internal_name, state)
 
-            if state and mod_name in CONFLICTING_MODS:
-                self.handle_mod_conflicts(mod_name)
+                if state and mod_name in CONFLICTING_MODS:
+                    self.handle_mod_conflicts(mod_name)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to toggle mod: {str(e)}")
@@ -3021,11 +5716,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please select a modpack first.")
             return
 
-        mod_state_path = os.path.join(self.modpacks_dir, self.selected_modpack, "mod_state.json")
-        mod_state = {}
-        if os.path.exists(mod_state_path):
-            with open(mod_state_path, "r") as f:
-                mod_state = json.load(f)
+        mod_state = mod_state_store.get(self.selected_modpack)
 
         if internal_name in mod_state and mod_state[internal_name] == state:
             return
@@ -3033,10 +5724,6 @@ class MainWindow(QMainWindow):
         try:
             apply_external_mod(self.selected_modpack, internal_name, mod_config, state)
 
-            mod_state[internal_name] = state
-            with open(mod_state_path, "w") as f:
-                json.dump(mod_state, f, indent=4)
-
             if state and mod_config.get("name") in CONFLICTING_MODS:
                 self.handle_mod_conflicts(mod_config.get("name"))
 
@@ -3047,37 +5734,38 @@ class MainWindow(QMainWindow):
         if not self.selected_modpack or activated_display_name not in CONFLICTING_MODS:
             return
 
-        mod_state_path = os.path.join(self.modpacks_dir, self.selected_modpack, "mod_state.json")
-        if not os.path.exists(mod_state_path):
+        if not mod_state_store.exists(self.selected_modpack):
             return
 
-        with open(mod_state_path, "r") as f:
-            mod_state = json.load(f)
-
-        changed = False
         for conflicting_display_name in CONFLICTING_MODS[activated_display_name]:
             internal_key = MOD_NAME_MAPPING.get(conflicting_display_name)
             if not internal_key:
                 continue
 
-            if internal_key in mod_state and mod_state[internal_key]:
-                mod_state[internal_key] = False
-                changed = True
-
-                for i in range(self.mods_layout.count()):
-                    widget = self.mods_layout.itemAt(i).widget()
-                    if isinstance(widget, ModSwitch) and widget.name_label.text() == conflicting_display_name:
+            for i in range(self.mods_layout.count()):
+                widget = self.mods_layout.itemAt(i).widget()
+                if isinstance(widget, ModSwitch) and widget.name_label.text() == conflicting_display_name:
+                    if mod_state_store.is_enabled(self.selected_modpack, internal_key):
                         widget.toggle.setChecked(False)
-                        break
-
-        if changed:
-            with open(mod_state_path, "w") as f:
-                json.dump(mod_state, f, indent=4)
+                    elif widget.toggle.isChecked():
+                        widget.toggle.blockSignals(True)
+                        widget.toggle.setChecked(False)
+                        widget.toggle.blockSignals(False)
+                    break
 
     def filter_mods(self, filter_type):
         global current_filter
         current_filter = filter_type
 
+        catalog = get_catalog()
+        if catalog:
+            visible = set(catalog.list_mods(mod_type="texturepack" if filter_type == "texturepacks" else "mod"))
+            for i in range(self.mods_layout.count()):
+                widget = self.mods_layout.itemAt(i).widget()
+                if isinstance(widget, ModSwitch):
+                    widget.setVisible(widget.internal_name in visible)
+            return
+
         for i in range(self.mods_layout.count()):
             widget = self.mods_layout.itemAt(i).widget()
             if isinstance(widget, ModSwitch):
@@ -3091,6 +5779,15 @@ class MainWindow(QMainWindow):
     def filter_mods_by_search(self):
         search_term = self.search_input.text().lower()
 
+        catalog = get_catalog()
+        if catalog:
+            visible = set(catalog.list_mods(search=search_term))
+            for i in range(self.mods_layout.count()):
+                widget = self.mods_layout.itemAt(i).widget()
+                if isinstance(widget, ModSwitch):
+                    widget.setVisible(widget.internal_name in visible)
+            return
+
         for i in range(self.mods_layout.count()):
             widget = self.mods_layout.itemAt(i).widget()
             if isinstance(widget, ModSwitch):
@@ -3284,19 +5981,36 @@ class MainWindow(QMainWindow):
 
         self.update_modpacks_display()
         self.select_modpack(modpack_name)
-        QMessageBox.information(self, "Success", f"Modpack '{modpack_name}' imported successfully!")
+        message = f"Modpack '{modpack_name}' imported successfully!"
+        if self.import_thread.disabled_mods:
+            names = [BUILTIN_MODS[internal_name]["name"] for internal_name in self.import_thread.disabled_mods]
+            message += (
+                "\n\nThese mods need a file of your own and were left disabled:\n" + "\n".join(names) +
+                "\n\nEnable them from the mods page to choose the file.")
+        QMessageBox.information(self, "Success", message)
 
     def launch_modpack(self):
         if not self.selected_modpack:
             QMessageBox.warning(self, "Warning", "Please select a modpack first.")
             return
 
-        try:
-            roblox_path = os.path.join(self.modpacks_dir, self.selected_modpack, "RobloxCopy")
-            version = os.listdir(roblox_path)[0]
-            roblox_exe_path = os.path.join(roblox_path, version, "RobloxPlayerBeta.exe")
+        loading_dialog = LoadingDialog(self, "Preparing modpack...")
+        loading_dialog.show()
+
+        self.launch_thread = LaunchModpackThread(self.selected_modpack)
+        self.launch_thread.progress.connect(
+            lambda percent: loading_dialog.update_message(f"Finishing modpack files... {percent}%"))
+        self.launch_thread.finished.connect(lambda: self.on_modpack_launch_ready(loading_dialog))
+        self.launch_thread.start()
+
+    def on_modpack_launch_ready(self, loading_dialog):
+        loading_dialog.close()
+        if self.launch_thread.error:
+            QMessageBox.critical(self, "Error", f"Failed to launch modpack: {self.launch_thread.error}")
+            return
 
-            subprocess.Popen([roblox_exe_path])
+        try:
+            subprocess.Popen([self.launch_thread.exe_path])
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to launch modpack: {str(e)}")
 
@@ -3314,24 +6028,122 @@ class MainWindow(QMainWindow):
 
     def on_modpack_updated(self, loading_dialog):
         loading_dialog.close()
+        report = self.update_thread.report
+        if report and (report["missing"] or report["modified"]):
+            QMessageBox.information(
+                self, "Success",
+                f"Modpack updated successfully!\n\nRepaired {len(report['missing'])} missing and "
+                f"{len(report['modified'])} modified files.")
+            return
         QMessageBox.information(self, "Success", "Modpack updated successfully!")
 
+    def duplicate_modpack(self):
+        if not self.selected_modpack:
+            QMessageBox.warning(self, "Warning", "Please select a modpack first.")
+            return
+
+        dialog = QInputDialog(self)
+        dialog.setWindowTitle("Duplicate Modpack")
+        dialog.setLabelText("Enter a name for the copy:")
+        dialog.setTextValue(f"{self.selected_modpack} Copy")
+        dialog.setStyleSheet("""
+                    QInputDialog {
+                        background-color: #2a2a2a;
+                        color: white;
+                    }
+                    QLabel {
+                        color: white;
+                    }
+                    QLineEdit {
+                        background-color: #333333;
+                        color: white;
+                        border: 1px solid #444444;
+                    }
+                """)
+
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        new_modpack_name = dialog.textValue().strip()
+        if not new_modpack_name:
+            QMessageBox.warning(self, "Warning", "Please enter a modpack name.")
+            return
+
+        if new_modpack_name in self.modpacks:
+            QMessageBox.warning(self, "Warning", f"A modpack named '{new_modpack_name}' already exists.")
+            return
+
+        loading_dialog = LoadingDialog(self, f"Duplicating modpack '{self.selected_modpack}'...")
+        loading_dialog.show()
+
+        self.duplicate_thread = DuplicateModpackThread(self.selected_modpack, new_modpack_name)
+        self.duplicate_thread.finished.connect(
+            lambda: self.on_modpack_duplicated(new_modpack_name, loading_dialog))
+        self.duplicate_thread.start()
+
+    def on_modpack_duplicated(self, modpack_name, loading_dialog):
+        loading_dialog.close()
+
+        if self.duplicate_thread.error:
+            QMessageBox.critical(self, "Error", f"Failed to duplicate modpack: {self.duplicate_thread.error}")
+            return
+
+        if modpack_name not in self.modpacks:
+            self.modpacks.append(modpack_name)
+
+        self.update_modpacks_display()
+        self.select_modpack(modpack_name)
+        QMessageBox.information(self, "Success", f"Modpack '{modpack_name}' duplicated successfully!")
+
+    def update_all_modpacks(self):
+        if not self.modpacks:
+            QMessageBox.warning(self, "Warning", "There are no modpacks to update.")
+            return
+
+        loading_dialog = LoadingDialog(self, "Reading the current Roblox version...")
+        loading_dialog.show()
+
+        self.update_all_thread = UpdateAllModpacksThread()
+        self.update_all_thread.progress.connect(
+            lambda done, total, modpack: self.on_update_all_progress(loading_dialog, done, total, modpack))
+        self.update_all_thread.finished.connect(lambda: self.on_all_modpacks_updated(loading_dialog))
+        self.update_all_thread.start()
+
+    def on_update_all_progress(self, loading_dialog, done, total, modpack):
+        loading_dialog.set_progress(done, total)
+        loading_dialog.update_message(f"Updated {done}/{total} modpacks ({modpack})")
+
+    def on_all_modpacks_updated(self, loading_dialog):
+        loading_dialog.close()
+        if self.update_all_thread.error:
+            QMessageBox.critical(self, "Error", f"Failed to update modpacks: {self.update_all_thread.error}")
+            self.update_modpacks_display()
+            return
+        results = self.update_all_thread.results
+        if results is None:
+            QMessageBox.critical(self, "Error", "Could not find a Roblox installation.")
+            return
+
+        upgraded = [modpack for modpack, result in results.items() if result == "upgraded"]
+        failed = [f"{modpack}: {result}" for modpack, result in results.items() if result.startswith("failed")]
+        message = f"Updated {len(upgraded)} of {len(results)} modpacks."
+        if failed:
+            message += "\n\nFailed:\n" + "\n".join(failed)
+            QMessageBox.warning(self, "Update All", message)
+        else:
+            QMessageBox.information(self, "Success", message)
+        self.update_modpacks_display()
+
     def export_modpack(self):
         if not self.selected_modpack:
             QMessageBox.warning(self, "Warning", "Please select a modpack first.")
             return
 
-        mod_state_path = os.path.join(self.modpacks_dir, self.selected_modpack, "mod_state.json")
-        if not os.path.exists(mod_state_path):
+        if not mod_state_store.exists(self.selected_modpack):
             QMessageBox.critical(self, "Error", f"Mod state file not found for '{self.selected_modpack}'")
             return
 
-        try:
-            with open(mod_state_path, 'r') as f:
-                mod_state = json.load(f)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to read mod state: {str(e)}")
-            return
+        mod_state = mod_state_store.get(self.selected_modpack)
 
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -3367,20 +6179,30 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.No:
             return
 
-        try:
-            modpack_path = os.path.join(self.modpacks_dir, self.selected_modpack)
-            shutil.rmtree(modpack_path)
+        loading_dialog = LoadingDialog(self, f"Deleting modpack '{self.selected_modpack}'...")
+        loading_dialog.show()
+
+        self.delete_thread = DeleteModpackThread(self.selected_modpack)
+        self.delete_thread.finished.connect(lambda: self.on_modpack_deleted(loading_dialog))
+        self.delete_thread.start()
+
+    def on_modpack_deleted(self, loading_dialog):
+        global selected_modpack
+        loading_dialog.close()
+        if self.delete_thread.error:
+            QMessageBox.critical(self, "Error", f"Failed to delete modpack: {self.delete_thread.error}")
+            return
 
-            self.modpacks.remove(self.selected_modpack)
+        if self.delete_thread.modpack_name in self.modpacks:
+            self.modpacks.remove(self.delete_thread.modpack_name)
+        if self.selected_modpack == self.delete_thread.modpack_name:
             self.selected_modpack = None
             selected_modpack = self.selected_modpack
-            self.update_modpacks_display()
+        self.update_modpacks_display()
 
-            self.stacked_widget.setCurrentIndex(0)
+        self.stacked_widget.setCurrentIndex(0)
 
-            QMessageBox.information(self, "Success", "Modpack deleted successfully!")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to delete modpack: {str(e)}")
+        QMessageBox.information(self, "Success", "Modpack deleted successfully!")
 
     def show_fflag_editor(self):
         if not self.selected_modpack:
@@ -3420,6 +6242,21 @@ class MainWindow(QMainWindow):
             clear_action.triggered.connect(lambda: editor.setPlainText("{}"))
             toolbar.addAction(clear_action)
 
+            explain_action = QAction("Explain", dialog)
+            explain_action.setIcon(QIcon.fromTheme("help-about"))
+            explain_action.triggered.connect(lambda: self.show_fflag_explain(dialog))
+            toolbar.addAction(explain_action)
+
+            search_action = QAction("Search All Modpacks", dialog)
+            search_action.setIcon(QIcon.fromTheme("edit-find"))
+            search_action.triggered.connect(lambda: self.show_fflag_search(dialog))
+            toolbar.addAction(search_action)
+
+            compare_action = QAction("Compare", dialog)
+            compare_action.setIcon(QIcon.fromTheme("view-split-left-right"))
+            compare_action.triggered.connect(lambda: self.show_fflag_compare(dialog))
+            toolbar.addAction(compare_action)
+
             layout.addWidget(toolbar)
 
             editor = QTextEdit()
@@ -3475,6 +6312,95 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to open FFlag editor: {str(e)}")
 
+    def show_fflag_explain(self, parent):
+        try:
+            rows = get_flag_compositor(self.selected_modpack).explain()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to explain fast flags: {str(e)}")
+            return
+
+        lines = []
+        for key, value, owner, shadowed in rows:
+            owner_name = INTERNAL_TO_DISPLAY.get(owner, owner)
+            if value is None:
+                line = f"{key} (removed) <- {owner_name}"
+            else:
+                line = f"{key} = {json.dumps(value)} <- {owner_name}"
+            if shadowed:
+                line += f"  (overrides {', '.join(INTERNAL_TO_DISPLAY.get(layer, layer) for layer in shadowed)})"
+            lines.append(line)
+
+        self.show_fflag_text(parent, "Fast Flag Layers", "\n".join(lines) or "No fast flags set.")
+
+    def show_fflag_text(self, parent, title, text, search=None):
+        dialog = QDialog(parent)
+        dialog.setWindowTitle(title)
+        dialog.setMinimumSize(800, 600)
+
+        layout = QVBoxLayout()
+        view = QTextEdit()
+        view.setReadOnly(True)
+        view.setPlainText(text)
+        view.setStyleSheet("""
+            QTextEdit {
+                background-color: #333333;
+                color: white;
+                font-family: Consolas, monospace;
+                font-size: 12px;
+            }
+        """)
+        if search:
+            search_input = QLineEdit()
+            search_input.setPlaceholderText("Search fast flags...")
+            search_input.textChanged.connect(lambda query: view.setPlainText(search(query)))
+            layout.addWidget(search_input)
+        layout.addWidget(view)
+        dialog.setLayout(layout)
+        dialog.exec()
+
+    def show_fflag_search(self, parent):
+        try:
+            index = get_flag_index(refresh=True)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to index fast flags: {str(e)}")
+            return
+
+        def search(query):
+            if not query:
+                return ""
+            results = index.search(query, limit=500)
+            if not results:
+                return "No modpack sets a matching fast flag."
+            return format_flag_search(results)
+
+        self.show_fflag_text(parent, "Search Fast Flags", "", search=search)
+
+    def show_fflag_compare(self, parent):
+        try:
+            index = get_flag_index(refresh=True)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to index fast flags: {str(e)}")
+            return
+
+        others = [modpack for modpack in index.modpacks() if modpack != self.selected_modpack]
+        if not others:
+            QMessageBox.information(self, "Info", "There are no other modpacks to compare with.")
+            return
+
+        other, ok = QInputDialog.getItem(
+            self,
+            "Compare Fast Flags",
+            f"Compare '{self.selected_modpack}' with:",
+            others,
+            0,
+            False)
+
+        if not ok:
+            return
+
+        text = format_flag_comparison(self.selected_modpack, other, *index.compare(self.selected_modpack, other))
+        self.show_fflag_text(parent, f"{self.selected_modpack} vs {other}", text)
+
     def save_fflag_preset(self, fflags_text):
         try:
             json.loads(fflags_text)
@@ -3530,28 +6456,40 @@ class MainWindow(QMainWindow):
             with open(preset_path, 'r') as f:
                 preset_data = f.read()
 
-            json.loads(preset_data)
+            settings, errors = validate_fflags(preset_data)
+            if settings is None:
+                QMessageBox.critical(self, "Error", f"Preset '{preset}' is not valid JSON:\n{errors[0]}")
+                return
 
             editor.setPlainText(preset_data)
+            if errors:
+                QMessageBox.warning(
+                    self, "Invalid Fast Flags",
+                    f"Preset '{preset}' has {len(errors)} invalid fast flags:\n\n{format_fflag_errors(errors)}")
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load preset: {str(e)}")
 
     def save_fflags(self, fflags_text, dialog):
         try:
-            settings = json.loads(fflags_text)
-
-            roblox_path = os.path.join(self.modpacks_dir, self.selected_modpack, "RobloxCopy")
-            version = os.listdir(roblox_path)[0]
-            settings_path = os.path.join(roblox_path, version, "ClientSettings", "ClientAppSettings.json")
+            settings, errors = validate_fflags(fflags_text)
+            if settings is None:
+                QMessageBox.critical(self, "Error", f"Invalid JSON content:\n{errors[0]}")
+                return
+            if errors:
+                reply = QMessageBox.question(
+                    self,
+                    "Invalid Fast Flags",
+                    f"{len(errors)} fast flags have the wrong type and will not work in game:\n\n"
+                    f"{format_fflag_errors(errors)}\n\nSave anyway?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                if reply == QMessageBox.StandardButton.No:
+                    return
 
-            with open(settings_path, 'w') as f:
-                json.dump(settings, f, indent=4)
+            get_flag_compositor(self.selected_modpack).set_editor_flags(settings)
 
             QMessageBox.information(self, "Success", "Fast flags saved successfully!")
             dialog.accept()
-        except json.JSONDecodeError:
-            QMessageBox.critical(self, "Error", "Invalid JSON content. Please check the syntax.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save fast flags: {str(e)}")
 
@@ -3596,7 +6534,6 @@ class CreateModpackThread(QThread):
                     self.finished.emit()
                     return
 
-                version = os.path.basename(folder)
                 script_dir = os.path.dirname(os.path.abspath(__file__))
                 modpack_folder = os.path.join(script_dir, "ModPacks", self.name)
 
@@ -3604,38 +6541,17 @@ class CreateModpackThread(QThread):
                     self.finished.emit()
                     return
 
-                modpacks_dir = os.path.join(script_dir, "ModPacks")
-                if not os.path.exists(modpacks_dir):
-                    os.makedirs(modpacks_dir)
-
-                dst_folder = os.path.join(modpack_folder, "RobloxCopy", version)
-                shutil.copytree(folder, dst_folder, copy_function=shutil.copy2, dirs_exist_ok=True)
-
-                settings_folder = os.path.join(dst_folder, "ClientSettings")
-                os.makedirs(settings_folder, exist_ok=True)
-                settings_file = os.path.join(settings_folder, "ClientAppSettings.json")
-                if not os.path.exists(settings_file):
-                    with open(settings_file, "w") as f:
-                        json.dump({}, f, indent=4)
-
-                mod_state_path = os.path.join(modpack_folder, "mod_state.json")
                 mod_state = {internal_name: False for internal_name in MOD_NAME_MAPPING.values()}
 
                 external_mods = load_external_mods()
                 for internal_name in external_mods.keys():
                     mod_state[internal_name] = False
 
-                with open(mod_state_path, "w") as f:
-                    json.dump(mod_state, f, indent=4)
-
-                target_image_path = os.path.join(modpack_folder, "image.png")
-                if self.image_path and os.path.exists(self.image_path):
-                    shutil.copy(self.image_path, target_image_path)
-                else:
-                    default_img = os.path.join("assets", "images", "play.png")
-                    if os.path.exists(default_img):
-                        shutil.copy(default_img, target_image_path)
+                image_path = self.image_path
+                if not image_path or not os.path.exists(image_path):
+                    image_path = os.path.join("assets", "images", "play.png")
 
+                create_modpack_folder(self.name, folder, mod_state, image_path)
                 self.finished.emit()
             except Exception as e:
                 print(f"Error creating modpack: {str(e)}")
@@ -3646,36 +6562,20 @@ class ImportModpackThread(QThread):
             super().__init__()
             self.name = name
             self.mod_state = mod_state
+            self.disabled_mods = []
 
         def run(self):
             try:
                 folder = get_roblox_folder()
                 if folder is None:
-                    self.finished.emit()
                     return
 
-                version = os.path.basename(folder)
                 script_dir = os.path.dirname(os.path.abspath(__file__))
                 modpack_folder = os.path.join(script_dir, "ModPacks", self.name)
 
                 if os.path.exists(modpack_folder):
-                    self.finished.emit()
                     return
 
-                modpacks_dir = os.path.join(script_dir, "ModPacks")
-                if not os.path.exists(modpacks_dir):
-                    os.makedirs(modpacks_dir)
-
-                dst_folder = os.path.join(modpack_folder, "RobloxCopy", version)
-                shutil.copytree(folder, dst_folder, copy_function=shutil.copy2, dirs_exist_ok=True)
-
-                settings_folder = os.path.join(dst_folder, "ClientSettings")
-                os.makedirs(settings_folder, exist_ok=True)
-                settings_file = os.path.join(settings_folder, "ClientAppSettings.json")
-                if not os.path.exists(settings_file):
-                    with open(settings_file, "w") as f:
-                        json.dump({}, f, indent=4)
-
                 default_mod_state = {internal_name: False for internal_name in MOD_NAME_MAPPING.values()}
                 for mod in self.mod_state:
                     default_mod_state[mod] = self.mod_state[mod]
@@ -3685,68 +6585,144 @@ class ImportModpackThread(QThread):
                     if internal_name not in default_mod_state:
                         default_mod_state[internal_name] = False
 
-                mod_state_path = os.path.join(modpack_folder, "mod_state.json")
-                with open(mod_state_path, "w") as f:
-                    json.dump(default_mod_state, f, indent=4)
-
-                target_image_path = os.path.join(modpack_folder, "image.png")
                 default_img = os.path.join("assets", "images", "play.png")
-                if os.path.exists(default_img):
-                    shutil.copy(default_img, target_image_path)
-
-                self.finished.emit()
+                _, self.disabled_mods = build_modpack_from_template(
+                    self.name, folder, default_mod_state, default_img)
             except Exception as e:
                 print(f"Error importing modpack: {str(e)}")
-                self.finished.emit()
 
 class UpdateModpackThread(QThread):
         def __init__(self, modpack_name):
             super().__init__()
             self.modpack_name = modpack_name
+            self.report = None
 
         def run(self):
             try:
                 current_roblox_path = get_roblox_folder()
                 if not current_roblox_path:
-                    self.finished.emit()
                     return
 
-                current_version = os.path.basename(current_roblox_path)
-                modpack_dir = os.path.join(os.path.dirname(__file__), "ModPacks", self.modpack_name)
-                roblox_copy_dir = os.path.join(modpack_dir, "RobloxCopy")
+                wait_for_modpack_upgrade(self.modpack_name)
+                materializer = get_materializer(self.modpack_name)
+                if materializer:
+                    materializer.finished.wait()
 
-                existing_versions = os.listdir(roblox_copy_dir)
-                if not existing_versions:
-                    self.finished.emit()
-                    return
+                if upgrade_modpack(self.modpack_name, current_roblox_path):
+                    collect_blob_garbage()
+                else:
+                    self.report = verify_modpack_tree(self.modpack_name, repair=True)
+            except Exception as e:
+                print(f"Error updating modpack: {str(e)}")
 
-                existing_version = existing_versions[0]
-                if existing_version == current_version:
-                    self.finished.emit()
-                    return
+class LaunchModpackThread(QThread):
+        progress = pyqtSignal(int)
+
+        def __init__(self, modpack_name):
+            super().__init__()
+            self.modpack_name = modpack_name
+            self.exe_path = None
+            self.error = None
+
+        def run(self):
+            try:
+                wait_for_modpack_upgrade(self.modpack_name)
+                materializer = get_materializer(self.modpack_name)
+                if materializer:
+                    while not materializer.finished.wait(0.05):
+                        self.progress.emit(materializer.progress())
+                    if materializer.error:
+                        raise RuntimeError(f"modpack files could not be finished: {materializer.error}")
+                if os.path.exists(os.path.join(modpacks_dir, self.modpack_name, "materializing.json")):
+                    raise RuntimeError("modpack files are incomplete, restart the app to finish copying them")
+                reconcile_modpack(self.modpack_name)
+
+                roblox_path = os.path.join(modpacks_dir, self.modpack_name, "RobloxCopy")
+                version = os.listdir(roblox_path)[0]
+                self.exe_path = os.path.join(roblox_path, version, "RobloxPlayerBeta.exe")
+            except Exception as e:
+                print(f"Error preparing modpack launch: {str(e)}")
+                self.error = str(e)
 
-                mod_state_path = os.path.join(modpack_dir, "mod_state.json")
-                with open(mod_state_path, "r") as f:
-                    mod_states = json.load(f)
+class DeleteModpackThread(QThread):
+        def __init__(self, modpack_name):
+            super().__init__()
+            self.modpack_name = modpack_name
+            self.error = None
 
-                shutil.rmtree(roblox_copy_dir)
-                new_version_path = os.path.join(roblox_copy_dir, current_version)
-                shutil.copytree(current_roblox_path, new_version_path)
+        def run(self):
+            try:
+                cancel_materialization(self.modpack_name)
+                wait_for_modpack_upgrade(self.modpack_name)
+                mod_state_store.forget(self.modpack_name)
+                backup_store.forget_modpack(self.modpack_name)
+                forget_flag_compositor(self.modpack_name)
+                forget_flag_index_entry(self.modpack_name)
+                shutil.rmtree(os.path.join(modpacks_dir, self.modpack_name))
+                collect_blob_garbage()
+            except Exception as e:
+                print(f"Error deleting modpack: {str(e)}")
+                self.error = str(e)
 
-                settings_dir = os.path.join(new_version_path, "ClientSettings")
-                os.makedirs(settings_dir, exist_ok=True)
-                settings_file = os.path.join(settings_dir, "ClientAppSettings.json")
-                if not os.path.exists(settings_file):
-                    with open(settings_file, "w") as f:
-                        json.dump({}, f, indent=4)
+class DuplicateModpackThread(QThread):
+        def __init__(self, source_name, name):
+            super().__init__()
+            self.source_name = source_name
+            self.name = name
+            self.error = None
 
-                reapply_enabled_mods(self.modpack_name)
-                self.finished.emit()
+        def run(self):
+            try:
+                duplicate_modpack(self.source_name, self.name)
             except Exception as e:
-                print(f"Error updating modpack: {str(e)}")
-                self.finished.emit()
+                print(f"Error duplicating modpack: {str(e)}")
+                self.error = str(e)
+
+class ReconcileModpacksThread(QThread):
+        def run(self):
+            try:
+                reconcile_all_modpacks()
+            except Exception as e:
+                print(f"Error reconciling modpacks: {str(e)}")
+
+class UpdateAllModpacksThread(QThread):
+        progress = pyqtSignal(int, int, str)
+
+        def __init__(self):
+            super().__init__()
+            self.results = None
+            self.error = None
+
+        def run(self):
+            try:
+                self.results = upgrade_all_modpacks(self.progress.emit)
+            except Exception as e:
+                print(f"Error updating modpacks: {str(e)}")
+                self.error = str(e)
+
+class RefreshExternalModsThread(QThread):
+        progress = pyqtSignal(int, int, str)
+
+        def __init__(self, internal_names):
+            super().__init__()
+            self.internal_names = internal_names
+            self.results = None
+            self.error = None
+
+        def run(self):
+            try:
+                self.results = refresh_external_mods(self.internal_names, self.progress.emit)
+            except Exception as e:
+                print(f"Error refreshing external mods: {str(e)}")
+                self.error = str(e)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "flags":
+        sys.exit(run_flags_cli(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "build-manifest":
+        print(f"Wrote {build_builtin_manifest()} files to {builtin_manifest_file}")
+        sys.exit(0)
+
     app = QApplication([])
 
     app.setStyle("Fusion")